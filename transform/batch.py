@@ -0,0 +1,131 @@
+import os
+import sys
+import argparse
+import multiprocessing
+from multiprocessing.connection import wait
+from main import Orchestrator, SKIPPABLE, logger
+from lib.paths import PathManager
+from lib.rsv import RSVManager
+from lib.act_overrides import ActOverrides
+from lib.filter_loader import FilterLoader
+from lib.filter_sync import FilterSync
+from lib.config import Config
+
+class BatchShared:
+    """
+    What the versions of a batch share: the compiled filter plan, the ACT
+    overrides (looked up once, before the versions start) and the gates
+    limiting how many versions run a phase at the same time. Each version
+    gets a pickled copy, so nothing shared is written by a version.
+    """
+    def __init__(self, config, config_hash, act, gates, workers, zip_workers):
+        self.config = config
+        self.config_hash = config_hash
+        self.act = act
+        self.gates = gates # phase id -> semaphore or lock
+        self.workers = workers # transform workers per version
+        self.zip_workers = zip_workers # compression threads per version
+
+def load_shared(skip, cpu_slots, io_slots, context):
+    pm = PathManager(Config.BASE_DIR, "")
+    cdir = os.path.join(Config.BASE_DIR, "transform", "config")
+
+    logger.info("Phase 0: Syncing filter configuration from Google Sheets...")
+    fl = FilterLoader(cdir, cache_dir=os.path.join(Config.BASE_DIR, "transform", "cache", "filter"))
+    try:
+        if not FilterSync(cdir).update_config(offline="sync" in skip):
+            logger.warning("Warning: Filter sync failed, using cached manual config only.")
+        config = fl.load(compiled=True)
+        config_hash = fl.inputs_hash()
+    finally:
+        if os.path.exists(fl.transient_path):
+            os.remove(fl.transient_path)
+
+    # Imports a changed rsv.json into the store before the versions open it
+    RSVManager(pm.rsv_json_path, db_path=pm.rsv_db_path).store.close()
+
+    act = ActOverrides(pm.act_cache_dir, api_url=Config.ACT_API_URL, raw_url=Config.ACT_RAW_URL,
+                       workers=Config.ACT_WORKERS, timeout=Config.ACT_TIMEOUT,
+                       offline=Config.ACT_OFFLINE or "act" in skip)
+    act.lookup()
+
+    cores = os.cpu_count() or 1
+    io = context.Semaphore(io_slots)
+    gates = {
+        "1": io,
+        "2-7": context.Semaphore(cpu_slots),
+        # RSV keys are stored and synced one version at a time
+        "8": context.Lock(),
+        "package": io,
+        "12": io,
+    }
+    workers = max(1, (Config.TRANSFORM_WORKERS or cores) // cpu_slots)
+    zip_workers = max(1, (Config.ZIP_WORKERS or cores) // max(cpu_slots, io_slots))
+    return BatchShared(config, config_hash, act, gates, workers, zip_workers)
+
+def run_version(folder_name, skip, shared):
+    # Entry point of the process of one version
+    completed = Orchestrator(folder_name, skip=skip, shared=shared).run()
+    sys.exit(0 if completed else 1)
+
+def run_batch(folder_names, skip, jobs, shared, context):
+    """Runs up to jobs versions at once; returns {folder_name: completed}."""
+    queued = list(folder_names)
+    running = {}
+    results = {}
+    while queued or running:
+        while queued and len(running) < jobs:
+            folder_name = queued.pop(0)
+            process = context.Process(target=run_version, args=(folder_name, skip, shared), name=folder_name)
+            process.start()
+            running[folder_name] = process
+            logger.info(f"Batch: started {folder_name}")
+
+        wait([process.sentinel for process in running.values()])
+        for folder_name, process in list(running.items()):
+            if process.is_alive():
+                continue
+            process.join()
+            results[folder_name] = process.exitcode == 0
+            del running[folder_name]
+            logger.info(f"Batch: {folder_name} {'completed' if results[folder_name] else 'failed'}")
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Transform several extracted versions at once. Uploads are left out: "
+                    "publish a version with main.py --resume VERSION.")
+    parser.add_argument("folder_names", nargs="+", metavar="folder_name",
+                        help="extracted version folders under transform/original")
+    parser.add_argument("--jobs", type=int, default=0,
+                        help="versions run at the same time (default: all)")
+    parser.add_argument("--cpu-slots", type=int, default=1,
+                        help="versions transforming at the same time; TRANSFORM_WORKERS is divided between them")
+    parser.add_argument("--io-slots", type=int, default=2,
+                        help="versions isolating, packaging or validating at the same time")
+    parser.add_argument("--skip", action="append", default=[], choices=SKIPPABLE, metavar="STEP",
+                        help="leave a step out (repeatable), as in main.py")
+    args = parser.parse_args()
+
+    if len(set(args.folder_names)) != len(args.folder_names):
+        parser.error("folder names must be unique")
+    if min(args.cpu_slots, args.io_slots) < 1:
+        parser.error("--cpu-slots and --io-slots must be at least 1")
+
+    # The S3 keys are the same for every version, so a batch never uploads
+    skip = list(dict.fromkeys(args.skip + ["upload"]))
+    # Versions run in spawned processes: no locks or connections are inherited mid-use
+    context = multiprocessing.get_context("spawn")
+    shared = load_shared(skip, args.cpu_slots, args.io_slots, context)
+    jobs = args.jobs if args.jobs > 0 else len(args.folder_names)
+
+    logger.info(f"=== Batch of {len(args.folder_names)} versions, {jobs} at a time ===")
+    results = run_batch(args.folder_names, skip, jobs, shared, context)
+    failed = [name for name in args.folder_names if not results[name]]
+    logger.info(f"=== Batch finished: {len(results) - len(failed)} completed, {len(failed)} failed ===")
+    if failed:
+        logger.error(f"Failed: {', '.join(failed)}")
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
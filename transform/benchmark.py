@@ -0,0 +1,206 @@
+import os
+import sys
+import json
+import shutil
+import logging
+import argparse
+import platform
+import datetime
+import tempfile
+import statistics
+import subprocess
+import time
+from lib.rsv import RSVManager
+from lib.processor import CSVProcessor
+from lib.validator import ValidationManager
+from lib.filter_loader import FilterLoader
+from lib.synthetic import CorpusSpec, generate_corpus
+from lib.logging_setup import setup_logging
+
+# Corpus presets; the spec fields not listed keep their defaults
+SIZES = {
+    "small": {"files": 50, "rows": 100, "columns": 8},
+    "medium": {"files": 300, "rows": 500, "columns": 12},
+    "large": {"files": 1000, "rows": 2000, "columns": 16},
+}
+
+def _cleanup(cp, target, config):
+    cp.initial_cleanup(target)
+
+def _transform(cp, target, config):
+    cp.initial_cleanup(target)
+    cp.transform(target, config)
+
+def _rsv(cp, target, config):
+    _transform(cp, target, config)
+    cp.process_rsv(target)
+
+def _synced(cp, target, config):
+    _transform(cp, target, config)
+    # Stand-in for the ACT sync: every key without a Korean value gets a new English one
+    for key, value in cp.rsv_manager.rsv_data.items():
+        if not value[0]:
+            value[1] = f"{value[1]} (ACT)"
+
+def _non_korean(cp, target, config):
+    _rsv(cp, target, config)
+    cp.remove_non_korean_files(target)
+
+# name: (setup run untimed on a fresh copy of the corpus, timed call)
+TARGETS = {
+    "CSVProcessor.initial_cleanup": (None, lambda cp, t, c: cp.initial_cleanup(t)),
+    "CSVProcessor.apply_manual_filters": (_cleanup, lambda cp, t, c: cp.apply_manual_filters(t, c)),
+    "CSVProcessor.apply_column_remapping": (_cleanup, lambda cp, t, c: cp.apply_column_remapping(t, c)),
+    "CSVProcessor.anonymize_chat_phrases": (_cleanup, lambda cp, t, c: cp.anonymize_chat_phrases(t)),
+    "CSVProcessor.filter_columns": (_cleanup, lambda cp, t, c: cp.filter_columns(t, c)),
+    "CSVProcessor.remove_empty_rows": (_cleanup, lambda cp, t, c: cp.remove_empty_rows(t, c)),
+    "CSVProcessor.transform": (_cleanup, lambda cp, t, c: cp.transform(t, c)),
+    "CSVProcessor.process_rsv": (_transform, lambda cp, t, c: cp.process_rsv(t)),
+    "CSVProcessor.patch_rsv": (_synced, lambda cp, t, c: cp.patch_rsv(t)),
+    "CSVProcessor.remove_non_korean_files": (_rsv, lambda cp, t, c: cp.remove_non_korean_files(t)),
+    "CSVProcessor.rename_files": (_non_korean, lambda cp, t, c: cp.rename_files(t)),
+}
+
+class Benchmark:
+    """
+    Times the public CSVProcessor methods, ValidationManager.validate and
+    FilterLoader.load on synthetic corpora (see lib/synthetic.py).
+
+    Every run works on a fresh copy of the corpus with a fresh RSVManager,
+    and the phases a method depends on are replayed untimed beforehand.
+    """
+    def __init__(self, work_dir, repeat=3, workers=1, seed=0, streaming=False):
+        self.work_dir = work_dir
+        self.repeat = repeat
+        self.workers = workers
+        self.streaming = streaming
+        self.seed = seed
+
+    def run(self, sizes, only=None):
+        results = []
+        for size in sizes:
+            spec = CorpusSpec(seed=self.seed, **SIZES[size])
+            source = os.path.join(self.work_dir, size, "raw-exd-all")
+            config_dir = os.path.join(self.work_dir, size, "config")
+            print(f"[{size}] generating corpus ({spec.files} sheets x {spec.rows} rows x {spec.columns} columns)...")
+            generate_corpus(source, spec, config_dir)
+
+            for name, times in self._run_size(source, config_dir, only):
+                results.append({
+                    "size": size,
+                    "corpus": spec.to_dict(),
+                    "target": name,
+                    "times": [round(t, 5) for t in times],
+                    "min": round(min(times), 5),
+                    "median": round(statistics.median(times), 5),
+                })
+                print(f"[{size}] {name:<40} min {min(times):8.4f}s  median {statistics.median(times):8.4f}s")
+            shutil.rmtree(os.path.join(self.work_dir, size), ignore_errors=True)
+        return results
+
+    def _run_size(self, source, config_dir, only):
+        loader = FilterLoader(config_dir)
+        config = loader.load()
+        rsv_path = os.path.join(config_dir, "rsv.json")
+        target = os.path.join(os.path.dirname(source), "work")
+
+        for name, (setup, call) in TARGETS.items():
+            if only and name not in only: continue
+            times = []
+            for _ in range(self.repeat):
+                shutil.rmtree(target, ignore_errors=True)
+                shutil.copytree(source, target)
+                cp = CSVProcessor(RSVManager(rsv_path), workers=self.workers, streaming=self.streaming)
+                if setup:
+                    setup(cp, target, config)
+                start = time.perf_counter()
+                call(cp, target, config)
+                times.append(time.perf_counter() - start)
+            yield name, times
+
+        # The validator scans an output tree: the last copy, after rename_files when that ran
+        validator = ValidationManager(os.path.join(config_dir, "preset.json"))
+        cached_loader = FilterLoader(config_dir, cache_dir=os.path.join(self.work_dir, "filter-cache"))
+        cached_loader.load(compiled=True) # stores the plan the timed runs reuse
+        extra = {
+            "ValidationManager.validate": lambda: validator.validate(target),
+            "FilterLoader.load": lambda: loader.load(),
+            "FilterLoader.load(compiled=True)": lambda: loader.load(compiled=True),
+            "FilterLoader.load(compiled=True) cached": lambda: cached_loader.load(compiled=True),
+        }
+        for name, call in extra.items():
+            if only and name not in only: continue
+            times = []
+            for _ in range(self.repeat):
+                start = time.perf_counter()
+                call()
+                times.append(time.perf_counter() - start)
+            yield name, times
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "HEAD"], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except Exception:
+        return None
+
+def compare(old_path, new_path):
+    """Prints the median of each target in new_path relative to old_path."""
+    with open(old_path, 'r', encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, 'r', encoding='utf-8') as f:
+        new = json.load(f)
+
+    baseline = {(r["size"], r["target"]): r for r in old["results"]}
+    print(f"old: {old.get('commit')}  new: {new.get('commit')}")
+    for r in new["results"]:
+        before = baseline.get((r["size"], r["target"]))
+        if not before: continue
+        ratio = r["median"] / before["median"] if before["median"] else float("inf")
+        print(f"[{r['size']}] {r['target']:<40} {before['median']:8.4f}s -> {r['median']:8.4f}s  x{ratio:.2f}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the transform phases on synthetic corpora.")
+    parser.add_argument("--sizes", nargs="+", choices=list(SIZES), default=["small", "medium"])
+    parser.add_argument("--repeat", type=int, default=3, help="Timed runs per target")
+    parser.add_argument("--workers", type=int, default=1, help="CSVProcessor workers (0 = all cores)")
+    parser.add_argument("--streaming", action="store_true", help="Time the row-streaming mode")
+    parser.add_argument("--seed", type=int, default=0, help="Corpus generator seed")
+    parser.add_argument("--only", nargs="+", metavar="TARGET", help="Only time these targets")
+    parser.add_argument("--output", help="Write results to this JSON file")
+    parser.add_argument("--compare", nargs=2, metavar=("OLD", "NEW"), help="Compare two result files and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    # Phase logging would dominate the timings of small corpora
+    setup_logging(level=logging.WARNING)
+
+    work_dir = tempfile.mkdtemp(prefix="transform-bench-")
+    try:
+        bench = Benchmark(work_dir, repeat=args.repeat, workers=args.workers, seed=args.seed,
+                          streaming=args.streaming)
+        results = bench.run(args.sizes, only=set(args.only) if args.only else None)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "commit": git_commit(),
+        "created": datetime.datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "repeat": args.repeat,
+        "workers": args.workers,
+        "streaming": args.streaming,
+        "results": results,
+    }
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            json.dump(report, f, indent=4, ensure_ascii=False)
+        print(f"Results saved to {args.output}")
+
+if __name__ == "__main__":
+    main()
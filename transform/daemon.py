@@ -0,0 +1,263 @@
+import os
+import sys
+import json
+import time
+import queue
+import socket
+import argparse
+import threading
+import socketserver
+import multiprocessing
+from main import SKIPPABLE, logger
+from batch import load_shared, run_version
+from lib.paths import TARGET_NAME, tree_state
+from lib.config import Config
+
+ORIGINAL_DIR = os.path.join(Config.BASE_DIR, "transform", "original")
+COMMANDS = ("build", "status", "refresh", "stop")
+
+class Daemon:
+    """
+    Long-running pipeline service.
+
+    Keeps the inputs every build shares (batch.BatchShared: the synced and
+    compiled filter plan, the ACT lookup, the imported RSV store) loaded and
+    refreshes them between builds, so a build only does the work of its
+    version. Builds run one at a time, as each publishes to the same S3
+    keys, in a fresh process forked from a server that already imported the
+    pipeline modules (spawned where fork is not available). Requests come
+    from the watcher of transform/original and from clients on a localhost
+    socket.
+    """
+    def __init__(self, skip=(), port=None, poll=None, settle=None, refresh=None, watch=True):
+        self.skip = list(skip) # steps left out of every build (sync and act also of refreshes)
+        self.port = port or Config.DAEMON_PORT
+        self.poll = poll or Config.DAEMON_POLL
+        self.settle = Config.DAEMON_SETTLE if settle is None else settle
+        self.refresh_interval = refresh or Config.DAEMON_REFRESH
+        self.watch = watch
+        if "forkserver" in multiprocessing.get_all_start_methods():
+            self.context = multiprocessing.get_context("forkserver")
+            self.context.set_forkserver_preload(["batch"])
+        else:
+            self.context = multiprocessing.get_context("spawn")
+
+        self.lock = threading.Lock() # guards seen and the state reported by status()
+        self.requests = queue.Queue() # (folder_name, skip) to build
+        self.queued = [] # folder names waiting, in order
+        self.current = None # (folder_name, start time) of the running build
+        self.history = [] # finished builds, latest last
+        self.shared = None
+        self.refreshed = None # time of the last refresh
+        self.refresh_requested = threading.Event()
+        self.stopping = threading.Event()
+        self.seen = set() # folders of transform/original that were there at start or were queued
+        self.changing = {} # folder name -> (state, time it was first seen in that state)
+
+    def refresh(self):
+        started = time.perf_counter()
+        logger.info("Daemon: refreshing filter configuration, RSV store and ACT overrides...")
+        shared = load_shared(self.skip, 1, 1, self.context)
+        with self.lock:
+            self.shared, self.refreshed = shared, time.time()
+        logger.info(f"Daemon: refreshed in {time.perf_counter() - started:.1f}s")
+
+    def submit(self, folder_name, skip=()):
+        """Queues a build of folder_name; returns its position in the queue."""
+        with self.lock:
+            self.queued.append(folder_name)
+            position = len(self.queued)
+        self.requests.put((folder_name, list(skip)))
+        logger.info(f"Daemon: queued {folder_name} ({position} waiting)")
+        return position
+
+    def status(self):
+        with self.lock:
+            return {
+                "current": {"folder": self.current[0], "seconds": round(time.time() - self.current[1], 1)}
+                           if self.current else None,
+                "queued": list(self.queued),
+                "history": list(self.history),
+                "refreshed": time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(self.refreshed))
+                             if self.refreshed else None,
+            }
+
+    def build(self, folder_name, skip):
+        with self.lock:
+            self.queued.remove(folder_name)
+            self.current = (folder_name, time.time())
+            shared = self.shared
+        started = time.perf_counter()
+        skip = list(dict.fromkeys(self.skip + skip))
+        process = self.context.Process(target=run_version, args=(folder_name, skip, shared), name=folder_name)
+        process.start()
+        process.join()
+        seconds = time.perf_counter() - started
+        completed = process.exitcode == 0
+        logger.info(f"Daemon: {folder_name} {'completed' if completed else 'failed'} in {seconds:.1f}s")
+        with self.lock:
+            self.current = None
+            self.history = self.history[-19:] + [{
+                "folder": folder_name,
+                "completed": completed,
+                "seconds": round(seconds, 1),
+                "finished": time.strftime("%Y-%m-%d %H:%M:%S"),
+            }]
+
+    def work(self):
+        # Builds and refreshes run on this thread only, so they never overlap
+        while not self.stopping.is_set():
+            if self.refresh_requested.is_set() or time.time() - self.refreshed >= self.refresh_interval:
+                self.refresh_requested.clear()
+                try:
+                    self.refresh()
+                except Exception as e:
+                    # The previous inputs stay in use
+                    logger.error(f"Daemon: refresh failed: {e}")
+                    self.refreshed = time.time()
+            try:
+                folder_name, skip = self.requests.get(timeout=1)
+            except queue.Empty:
+                continue
+            if self.stopping.is_set():
+                break
+            self.build(folder_name, skip)
+
+    def scan(self):
+        """Queues the folders of transform/original that appeared and stopped changing."""
+        if not os.path.isdir(ORIGINAL_DIR):
+            return
+        now = time.time()
+        for name in sorted(os.listdir(ORIGINAL_DIR)):
+            path = os.path.join(ORIGINAL_DIR, name)
+            with self.lock:
+                seen = name in self.seen
+            if seen or not os.path.isdir(os.path.join(path, TARGET_NAME)):
+                continue
+            # Changes while the extraction is still being written
+            state = tree_state(path)
+            previous = self.changing.get(name)
+            if previous is None or previous[0] != state:
+                self.changing[name] = (state, now)
+            elif now - previous[1] >= self.settle:
+                del self.changing[name]
+                with self.lock:
+                    if name in self.seen:
+                        # Requested by a client meanwhile
+                        continue
+                    self.seen.add(name)
+                logger.info(f"Daemon: extraction {name} finished")
+                self.submit(name)
+
+    def watch_loop(self):
+        while not self.stopping.wait(self.poll):
+            try:
+                self.scan()
+            except Exception as e:
+                logger.error(f"Daemon: scan of {ORIGINAL_DIR} failed: {e}")
+
+    def handle(self, request):
+        """Answers a client request ({"command": ..., ...})."""
+        command = request.get("command")
+        if command == "build":
+            folder_name = request.get("folder")
+            skip = request.get("skip", [])
+            # Only a folder directly under transform/original, never a path out of it
+            if (not isinstance(folder_name, str) or folder_name in ("", ".", "..")
+                    or os.path.basename(folder_name) != folder_name or "/" in folder_name or "\\" in folder_name
+                    or not os.path.isdir(os.path.join(ORIGINAL_DIR, folder_name))):
+                return {"ok": False, "error": f"no extraction folder {folder_name} in {ORIGINAL_DIR}"}
+            if not isinstance(skip, list) or any(s not in SKIPPABLE for s in skip):
+                return {"ok": False, "error": f"steps that can be skipped: {', '.join(SKIPPABLE)}"}
+            with self.lock:
+                self.seen.add(folder_name)
+            return {"ok": True, "position": self.submit(folder_name, skip)}
+        if command == "status":
+            return {"ok": True, **self.status()}
+        if command == "refresh":
+            self.refresh_requested.set()
+            return {"ok": True}
+        if command == "stop":
+            self.stopping.set()
+            return {"ok": True}
+        return {"ok": False, "error": f"unknown command {command}, expected one of {', '.join(COMMANDS)}"}
+
+    def serve(self):
+        self.refresh()
+        if os.path.isdir(ORIGINAL_DIR):
+            # Only folders that appear from now on are built automatically
+            with self.lock:
+                self.seen.update(os.listdir(ORIGINAL_DIR))
+        daemon = self
+
+        class Handler(socketserver.StreamRequestHandler):
+            def handle(self):
+                try:
+                    response = daemon.handle(json.loads(self.rfile.readline()))
+                except Exception as e:
+                    response = {"ok": False, "error": str(e)}
+                self.wfile.write(json.dumps(response, ensure_ascii=False).encode('utf-8') + b"\n")
+
+        socketserver.ThreadingTCPServer.allow_reuse_address = True
+        server = socketserver.ThreadingTCPServer(("127.0.0.1", self.port), Handler)
+        server.daemon_threads = True
+        threads = [threading.Thread(target=self.work, name="build")]
+        if self.watch:
+            threads.append(threading.Thread(target=self.watch_loop, name="watch", daemon=True))
+        for thread in threads:
+            thread.start()
+        threading.Thread(target=server.serve_forever, name="socket", daemon=True).start()
+        logger.info(f"Daemon: listening on 127.0.0.1:{self.port}"
+                    + (f", watching {ORIGINAL_DIR}" if self.watch else ""))
+
+        try:
+            while not self.stopping.wait(1):
+                pass
+        except KeyboardInterrupt:
+            self.stopping.set()
+        logger.info("Daemon: stopping after the running build...")
+        server.shutdown()
+        server.server_close()
+        threads[0].join()
+        if self.queued:
+            logger.warning(f"Daemon: dropped queued builds: {', '.join(self.queued)}")
+
+def send(request, port=None):
+    """Sends a request to a running daemon and returns its response."""
+    with socket.create_connection(("127.0.0.1", port or Config.DAEMON_PORT), timeout=10) as conn:
+        conn.sendall(json.dumps(request, ensure_ascii=False).encode('utf-8') + b"\n")
+        with conn.makefile('r', encoding='utf-8') as f:
+            return json.loads(f.readline())
+
+def main():
+    parser = argparse.ArgumentParser(description="Resident pipeline: keeps the shared inputs loaded, builds new "
+                                                 "extractions of transform/original and takes requests from clients.")
+    parser.add_argument("command", choices=("serve",) + COMMANDS,
+                        help="serve: run the daemon; build, status, refresh, stop: send a request to it")
+    parser.add_argument("folder_name", nargs="?", help="extracted version folder to build")
+    parser.add_argument("--skip", action="append", default=[], choices=SKIPPABLE, metavar="STEP",
+                        help="leave a step out (repeatable), as in main.py; with serve for every build")
+    parser.add_argument("--no-watch", action="store_true", help="serve: only build on request")
+    parser.add_argument("--port", type=int, help=f"localhost port (default: DAEMON_PORT, {Config.DAEMON_PORT})")
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        Daemon(skip=args.skip, port=args.port, watch=not args.no_watch).serve()
+        return
+    if args.command == "build" and not args.folder_name:
+        parser.error("build needs a folder_name")
+
+    request = {"command": args.command}
+    if args.command == "build":
+        request.update(folder=args.folder_name, skip=args.skip)
+    try:
+        response = send(request, args.port)
+    except OSError as e:
+        print(f"Daemon not reachable: {e}", file=sys.stderr)
+        sys.exit(1)
+    print(json.dumps(response, indent=4, ensure_ascii=False))
+    if not response.get("ok"):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
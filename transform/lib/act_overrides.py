@@ -0,0 +1,184 @@
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from .logging_setup import get_logger
+
+logger = get_logger()
+
+API_URL = "https://api.github.com/repos/ravahn/FFXIV_ACT_Plugin/contents/Overrides"
+RAW_URL = "https://raw.githubusercontent.com/ravahn/FFXIV_ACT_Plugin/master/Overrides/"
+USER_AGENT = "FFXIV-Extractor"
+
+def parse_overrides(content):
+    """Parses an override file ("key|value" lines) into a dict."""
+    lookup = {}
+    for line in content.splitlines():
+        if '|' in line:
+            k, v = line.split('|', 1)
+            lookup[k.strip()] = v.strip()
+    return lookup
+
+class ActOverrides:
+    """
+    English names from the global_* override files of the FFXIV_ACT_Plugin
+    repository.
+
+    The file list and the files are kept in cache_dir with their ETag and
+    Last-Modified headers, so later runs only revalidate them, and files
+    whose git sha in the list is unchanged are not requested at all. Files
+    are fetched concurrently and cached already parsed. A failed request
+    falls back to the cached copy; offline mode only uses the cache.
+    """
+    def __init__(self, cache_dir=None, api_url=None, raw_url=None, workers=8, timeout=10, offline=False):
+        self.cache_dir = cache_dir
+        self.api_url = api_url or API_URL
+        raw_url = raw_url or RAW_URL
+        self.raw_url = raw_url if raw_url.endswith('/') else raw_url + '/'
+        self.workers = max(1, workers)
+        self.timeout = timeout
+        self.offline = offline
+        self.index = {"listing": {}, "files": {}} # validators and shas of the list and of each file
+        self.maps = {} # {filename: {key: English name}}
+        self.merged = None # result of lookup(), fetched once per instance
+        self.load()
+
+    def _path(self, name):
+        return os.path.join(self.cache_dir, name)
+
+    def load(self):
+        if not self.cache_dir or not os.path.exists(self._path("index.json")):
+            return
+        try:
+            with open(self._path("index.json"), 'r', encoding='utf-8') as f:
+                index = json.load(f)
+            with open(self._path("overrides.json"), 'r', encoding='utf-8') as f:
+                maps = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable ACT override cache: {e}")
+            return
+        self.index, self.maps = index, maps
+
+    def save(self):
+        if not self.cache_dir:
+            return
+        os.makedirs(self.cache_dir, exist_ok=True)
+        # Parsed maps first, so an index never points at maps that were not written
+        for name, data in (("overrides.json", self.maps), ("index.json", self.index)):
+            temp = self._path(name + ".tmp")
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(data, f, ensure_ascii=False, separators=(',', ':'))
+            os.replace(temp, self._path(name))
+
+    def fetch(self, url, validators):
+        """
+        GETs url, revalidating with the cached validators. Returns the body
+        and the new validators; the body is None when the server answered
+        304 Not Modified.
+        """
+        # Imported here so runs that only use the cache do not load the HTTP stack
+        import urllib.error
+        import urllib.request
+        headers = {"User-Agent": USER_AGENT}
+        if validators.get("etag"):
+            headers["If-None-Match"] = validators["etag"]
+        if validators.get("last_modified"):
+            headers["If-Modified-Since"] = validators["last_modified"]
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                return response.read(), {
+                    "etag": response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+        except urllib.error.HTTPError as e:
+            if e.code == 304:
+                return None, validators
+            raise
+
+    def lookup(self):
+        """Returns the merged {key: English name} map, later files overriding earlier ones."""
+        if self.merged is not None:
+            return self.merged
+        files = self._file_list()
+        if not files:
+            self.merged = {}
+            return self.merged
+        if not self.offline:
+            self._refresh(files)
+
+        lookup_map = {}
+        missing = []
+        for name in files:
+            if name in self.maps:
+                lookup_map.update(self.maps[name])
+            else:
+                missing.append(name)
+        if missing:
+            logger.warning(f"ACT overrides unavailable for {len(missing)} files: {', '.join(missing)}")
+        self.merged = lookup_map
+        return lookup_map
+
+    def _file_list(self):
+        # {filename: git sha} of the global_* files, from the API or the cache
+        cached = self.index["listing"]
+        if self.offline:
+            if not cached.get("files"):
+                logger.warning("ACT offline mode: no cached override list, skipping sync.")
+            return cached.get("files", {})
+
+        try:
+            body, validators = self.fetch(self.api_url, cached)
+        except Exception as e:
+            if cached.get("files"):
+                logger.warning(f"Failed to fetch ACT file list, using the cached one: {e}")
+            else:
+                logger.warning(f"Failed to fetch ACT file list: {e}")
+            return cached.get("files", {})
+
+        if body is not None:
+            data = json.loads(body.decode('utf-8'))
+            files = {f['name']: f.get('sha') for f in data if f['name'].startswith('global_')}
+            self.index["listing"] = {**validators, "files": files}
+        return self.index["listing"].get("files", {})
+
+    def _refresh(self, files):
+        # Revalidates or downloads the files that may have changed since they were cached
+        cached = self.index["files"]
+        stale = [name for name, sha in files.items()
+                 if name not in self.maps or not sha or cached.get(name, {}).get("sha") != sha]
+        downloaded = revalidated = failed = 0
+
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            results = executor.map(self._fetch_file, stale)
+            for name, (lookup_map, validators, error) in zip(stale, results):
+                if error is not None:
+                    failed += 1
+                    fallback = "using the cached copy" if name in self.maps else "no cached copy"
+                    logger.warning(f"Failed to fetch ACT overrides {name} ({fallback}): {error}")
+                    continue
+                if lookup_map is None:
+                    revalidated += 1
+                else:
+                    downloaded += 1
+                    self.maps[name] = lookup_map
+                cached[name] = {**validators, "sha": files[name]}
+
+        # Files removed upstream are dropped from the cache
+        for name in set(self.maps) - set(files):
+            del self.maps[name]
+            cached.pop(name, None)
+
+        logger.info(f"ACT overrides: {len(files)} files, {downloaded} downloaded, {revalidated} not modified, "
+                    f"{len(files) - len(stale)} unchanged, {failed} failed.")
+        self.save()
+
+    def _fetch_file(self, name):
+        # Runs on a pool thread; returns (parsed map or None if not modified, validators, error)
+        validators = self.index["files"].get(name, {}) if name in self.maps else {}
+        try:
+            body, validators = self.fetch(self.raw_url + name, validators)
+            if body is None:
+                return None, validators, None
+            return parse_overrides(body.decode('utf-8')), validators, None
+        except Exception as e:
+            return None, None, e
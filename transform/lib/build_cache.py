@@ -0,0 +1,160 @@
+import os
+import json
+import shutil
+import time
+import hashlib
+from .logging_setup import get_logger
+
+logger = get_logger()
+
+# Modules whose code decides what Phases 2-7 write or what an entry records
+# (e.g. the integrity issue); editing any of them invalidates every cached file
+CODE_MODULES = ("processor.py", "sheet.py", "common.py", "rule_plan.py", "rsv.py", "streaming.py",
+                "validator.py", "build_cache.py")
+
+UNSET_RSV = ["", ""] # value of a key that rsv.json does not define yet
+
+MAX_AGE_DAYS = 30 # entries unused this long are pruned
+
+def hash_file(path):
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+def code_fingerprint():
+    h = hashlib.blake2b(digest_size=16)
+    lib_dir = os.path.dirname(os.path.abspath(__file__))
+    for name in CODE_MODULES:
+        with open(os.path.join(lib_dir, name), 'rb') as f:
+            h.update(f.read())
+    return h.hexdigest()
+
+class BuildCache:
+    """
+    Build cache for the fused CSV transform (Phases 2-7).
+
+    Each processed file is stored with the hash of its source, the hash of
+    the filter rules that apply to it and the RSV values it looked up.
+    A later run reuses the stored output when all three still match, and
+    replays the RSV bookkeeping the file contributed.
+
+    Entries are addressed by the path, source hash, rules hash and code
+    fingerprint, never by version, so every version and every run of a
+    batch share one directory. Each entry and output is its own file,
+    written to a temp file and renamed into place, so concurrent writers
+    never see each other's partial writes. Entries unused for MAX_AGE_DAYS
+    are pruned.
+    """
+    def __init__(self, cache_dir):
+        self.cache_dir = cache_dir
+        self.entries_dir = os.path.join(cache_dir, "entries")
+        self.objects_dir = os.path.join(cache_dir, "objects")
+        self.version = code_fingerprint()
+        self.hits = 0
+        self.stored = 0
+        self._drop_legacy()
+
+    def _drop_legacy(self):
+        # Index and outputs of the layout keyed by relative path alone
+        legacy = os.path.join(self.cache_dir, "index.json")
+        if os.path.exists(legacy):
+            logger.info("Removing build cache in the old per-path layout.")
+            shutil.rmtree(os.path.join(self.cache_dir, "files"), ignore_errors=True)
+            try:
+                os.remove(legacy)
+            except OSError:
+                pass
+
+    def key(self, rel_path, source_hash, rules_hash):
+        h = hashlib.blake2b(digest_size=16)
+        for part in (self.version, rel_path, source_hash, rules_hash):
+            h.update(part.encode('utf-8') + b"\0")
+        return h.hexdigest()
+
+    def _entry_path(self, key):
+        return os.path.join(self.entries_dir, key[:2], key + ".json")
+
+    def _object_path(self, key):
+        return os.path.join(self.objects_dir, key[:2], key)
+
+    @staticmethod
+    def _write_atomic(path, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        temp = f"{path}.{os.getpid()}.tmp"
+        write(temp)
+        os.replace(temp, path)
+
+    def save(self):
+        """Prunes entries no run has used for MAX_AGE_DAYS."""
+        cutoff = time.time() - MAX_AGE_DAYS * 86400
+        pruned = 0
+        for root, _, files in os.walk(self.entries_dir):
+            for f in files:
+                path = os.path.join(root, f)
+                try:
+                    if os.path.getmtime(path) >= cutoff:
+                        continue
+                    os.remove(path)
+                    key = f[:-len(".json")]
+                    if os.path.exists(self._object_path(key)):
+                        os.remove(self._object_path(key))
+                    pruned += 1
+                except OSError:
+                    pass # removed by a concurrent run
+        logger.info(f"Build cache: reused {self.hits} files, stored {self.stored}, pruned {pruned}.")
+
+    def lookup(self, rel_path, source_hash, rules_hash, rsv_data):
+        """Returns the entry for rel_path if its cached output is still valid."""
+        key = self.key(rel_path, source_hash, rules_hash)
+        entry_path = self._entry_path(key)
+        try:
+            with open(entry_path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            return None
+        for rsv_key, ko, en in entry["rsv"]:
+            if list(rsv_data.get(rsv_key, UNSET_RSV)) != [ko, en]:
+                return None
+        if not os.path.exists(self._object_path(key)):
+            return None
+        try:
+            # Marks the entry as used for pruning
+            os.utime(entry_path)
+        except OSError:
+            pass
+        entry["key"] = key
+        return entry
+
+    def restore(self, entry, path):
+        """Copies the cached output of entry (from lookup) to path, which must not exist."""
+        shutil.copyfile(self._object_path(entry["key"]), path)
+        self.hits += 1
+
+    def store(self, rel_path, path, source_hash, rules_hash, rsv_values, rsv_cells, rsv_count, korean, rows,
+              issue=None, anonymized=None):
+        """
+        Records the output written to path for rel_path. issue is the
+        integrity problem found in it, "" if none and None if unchecked;
+        anonymized the row ids Phase 4 anonymized, None if it recorded none.
+        """
+        key = self.key(rel_path, source_hash, rules_hash)
+        entry = {
+            "rsv": [[k, *value] for k, value in rsv_values],
+            "rsv_cells": [list(cell) for cell in rsv_cells],
+            "rsv_count": rsv_count,
+            "korean": korean,
+            "rows": rows,
+            "issue": issue,
+            "anonymized": sorted(anonymized) if anonymized is not None else None,
+        }
+
+        def write_entry(temp):
+            with open(temp, 'w', encoding='utf-8') as f:
+                json.dump(entry, f, ensure_ascii=False)
+
+        # Output first, so an entry never points at an output that was not written
+        self._write_atomic(self._object_path(key), lambda temp: shutil.copyfile(path, temp))
+        self._write_atomic(self._entry_path(key), write_entry)
+        self.stored += 1
@@ -0,0 +1,80 @@
+import os
+import json
+from .logging_setup import get_logger
+
+logger = get_logger()
+
+class Checkpoint:
+    """
+    Completed phases of a pipeline run and the state they left behind.
+
+    Kept as checkpoint.json in the output directory of the version and
+    rewritten after every phase (temp file, fsync, replace), so it always
+    describes the end of the last completed phase. A run resumed from it
+    restores the state and continues with the first phase not listed.
+    """
+    def __init__(self, path, folder_name=None, version_string=None, sub_path="", isolated=False):
+        self.path = path
+        self.data = {"folder_name": folder_name, "version_string": version_string, "sub_path": sub_path,
+                     "isolated": isolated, "phases": [], "state": {}}
+
+    @classmethod
+    def load(cls, path):
+        """Reads the checkpoint at path; None when there is none or it cannot be read."""
+        if not os.path.exists(path):
+            return None
+        try:
+            with open(path, 'r', encoding='utf-8') as f:
+                data = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+        checkpoint = cls(path)
+        checkpoint.data = data
+        return checkpoint
+
+    @property
+    def folder_name(self):
+        return self.data["folder_name"]
+
+    @property
+    def version_string(self):
+        return self.data["version_string"]
+
+    @property
+    def sub_path(self):
+        return self.data["sub_path"]
+
+    @property
+    def isolated(self):
+        # Paths of a batch run (see PathManager)
+        return self.data.get("isolated", False)
+
+    @property
+    def phases(self):
+        return self.data["phases"]
+
+    @property
+    def state(self):
+        return self.data["state"]
+
+    def done(self, phase_id):
+        return phase_id in self.data["phases"]
+
+    def reset(self):
+        self.data["phases"] = []
+        self.data["state"] = {}
+
+    def complete(self, phase_id, state):
+        """Records phase_id as completed with the state the run has after it."""
+        if phase_id not in self.data["phases"]:
+            self.data["phases"].append(phase_id)
+        self.data["state"] = state
+
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        temp = self.path + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(self.data, f, ensure_ascii=False)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp, self.path)
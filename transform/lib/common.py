@@ -1,5 +1,15 @@
 import re
 import os
+import mmap
+
+try:
+    import numpy as np
+except ImportError: # listed in requirements.txt; without it column scans fall back to a regex
+    np = None
+
+HANGUL_RE = re.compile(r'[\uac00-\ud7af]')
+COLUMN_CHUNK = 4096 # cells classified per vectorized step
+TEXT_ENCODINGS = ("utf-8", "utf-16-le", "utf-16-be") # byte forms searched by file_contains
 
 class CommonUtils:
     @staticmethod
@@ -10,6 +20,45 @@ class CommonUtils:
         if not text: return False
         if text.startswith("_rsv_"): return True
         # Hangul
-        return bool(re.search(r'[\uac00-\ud7af]', text))
+        return bool(HANGUL_RE.search(text))
+
+    @staticmethod
+    def column_is_kr(values):
+        """
+        True if any cell passes is_kr, checked a chunk of cells at a time.
+
+        Cells are joined with a NUL separator so each chunk is classified in
+        one pass: ASCII-only chunks are skipped outright, the rest are tested
+        as UTF-32 code points with NumPy (or one regex search without it).
+        Returns as soon as a matching chunk is found.
+        """
+        for start in range(0, len(values), COLUMN_CHUNK):
+            chunk = values[start:start + COLUMN_CHUNK]
+            joined = "\0".join(chunk)
+            if "_rsv_" in joined and any(v.startswith("_rsv_") for v in chunk):
+                return True
+            if joined.isascii():
+                continue
+            if np is not None:
+                codes = np.frombuffer(joined.encode('utf-32-le'), dtype=np.uint32)
+                if ((codes >= 0xAC00) & (codes <= 0xD7AF)).any():
+                    return True
+            elif HANGUL_RE.search(joined):
+                return True
+        return False
 
+    @staticmethod
+    def file_contains(path, needles):
+        """
+        True if the file contains all needles in one of TEXT_ENCODINGS.
 
+        The file is memory-mapped and searched as bytes, so files without a
+        match are rejected without being read into memory or decoded.
+        """
+        with open(path, 'rb') as f:
+            try:
+                data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError: # empty files cannot be mapped
+                return False
+            with data:
+                return any(all(data.find(n.encode(enc)) != -1 for n in needles) for enc in TEXT_ENCODINGS)
@@ -13,6 +13,10 @@ class Config:
     S3_BUCKET_NAME = os.getenv("S3_BUCKET_NAME", "")
     AWS_ACCESS_KEY_ID = os.getenv("AWS_ACCESS_KEY_ID", "")
     AWS_SECRET_ACCESS_KEY = os.getenv("AWS_SECRET_ACCESS_KEY", "")
+    S3_ENDPOINT_URL = os.getenv("S3_ENDPOINT_URL", "") # S3-compatible stand-in (e.g. moto server)
+    S3_LOCAL_DIR = os.getenv("S3_LOCAL_DIR", "") # upload into this directory instead of S3
+    S3_MULTIPART_CHUNK_MB = int(os.getenv("S3_MULTIPART_CHUNK_MB", "16"))
+    S3_MAX_CONCURRENCY = int(os.getenv("S3_MAX_CONCURRENCY", "10")) # threads per file
 
     # Discord
     DISCORD_WEBHOOK_URL = os.getenv("DISCORD_WEBHOOK_URL", "")
@@ -20,6 +24,32 @@ class Config:
     DISCORD_AVATAR_URL = os.getenv("DISCORD_AVATAR_URL", "")
     DISCORD_USERNAME = os.getenv("DISCORD_USERNAME", "FFXIV Extractor")
 
+    # Transform
+    TRANSFORM_WORKERS = int(os.getenv("TRANSFORM_WORKERS", "1")) # 1 = serial, 0 = all cores
+    ZIP_WORKERS = int(os.getenv("ZIP_WORKERS", "0")) # compression threads, 0 = all cores
+    INCREMENTAL_BUILD = os.getenv("INCREMENTAL_BUILD", "false").lower() == "true" # reuse unchanged files
+    TRANSFORM_STREAMING = os.getenv("TRANSFORM_STREAMING", "false").lower() == "true" # constant memory per file
+
+    # ACT overrides (English RSV names)
+    ACT_API_URL = os.getenv("ACT_API_URL", "") # stand-in for the GitHub contents API listing
+    ACT_RAW_URL = os.getenv("ACT_RAW_URL", "") # stand-in for the raw file base URL
+    ACT_WORKERS = int(os.getenv("ACT_WORKERS", "8")) # concurrent downloads
+    ACT_TIMEOUT = float(os.getenv("ACT_TIMEOUT", "10")) # seconds per request
+    ACT_OFFLINE = os.getenv("ACT_OFFLINE", "false").lower() == "true" # only use transform/cache/act
+
+    # Validation
+    VALIDATE_WORKERS = int(os.getenv("VALIDATE_WORKERS", "1")) # threads listing the output tree
+    VALIDATE_INTEGRITY = os.getenv("VALIDATE_INTEGRITY", "false").lower() == "true" # check CSV headers and row widths
+
+    # RSV table
+    RSV_EXPORT_JSON = os.getenv("RSV_EXPORT_JSON", "true").lower() == "true" # mirror changes to rsv.json
+
+    # Daemon (daemon.py)
+    DAEMON_PORT = int(os.getenv("DAEMON_PORT", "8737")) # localhost port for build requests
+    DAEMON_POLL = float(os.getenv("DAEMON_POLL", "10")) # seconds between scans of transform/original
+    DAEMON_SETTLE = float(os.getenv("DAEMON_SETTLE", "30")) # seconds a new folder must stay unchanged
+    DAEMON_REFRESH = float(os.getenv("DAEMON_REFRESH", "900")) # seconds between filter sheet/ACT refreshes
+
     # Paths
     # Paths - Derived relative to this file (transform/lib/config.py)
     # Root is 3 levels up: transform/lib/config.py -> transform/lib -> transform -> [Project Root]
@@ -0,0 +1,48 @@
+import os
+import json
+import filecmp
+from .logging_setup import get_logger
+
+logger = get_logger()
+
+DELTA_MANIFEST = "delta.json" # file list stored inside each delta bundle
+
+def list_files(root_dir):
+    """Relative ('/'-separated) paths of all files under root_dir."""
+    files = set()
+    for root, _, names in os.walk(root_dir):
+        for name in names:
+            files.add(os.path.relpath(os.path.join(root, name), root_dir).replace('\\', '/'))
+    return files
+
+def diff_trees(old_dir, new_dir):
+    """Returns the added, changed and deleted files of new_dir relative to old_dir."""
+    old_files = list_files(old_dir)
+    new_files = list_files(new_dir)
+
+    changed = []
+    for rel_path in sorted(old_files & new_files):
+        # Sizes are compared first, contents only when they match
+        if not filecmp.cmp(os.path.join(old_dir, rel_path), os.path.join(new_dir, rel_path), shallow=False):
+            changed.append(rel_path)
+    filecmp.clear_cache()
+
+    return {
+        "added": sorted(new_files - old_files),
+        "changed": changed,
+        "deleted": sorted(old_files - new_files),
+    }
+
+def build_delta(packager, bundle_path, old_dir, new_dir, from_version, to_version):
+    """
+    Writes a zip with the files of new_dir that are new or differ from old_dir,
+    plus a delta.json listing them and the deleted ones. Returns the listing.
+    """
+    delta = {"from": from_version, "to": to_version, **diff_trees(old_dir, new_dir)}
+
+    os.makedirs(os.path.dirname(bundle_path), exist_ok=True)
+    packager.write(bundle_path, new_dir, names=set(delta["added"] + delta["changed"]),
+                   extra={DELTA_MANIFEST: json.dumps(delta, indent=4, ensure_ascii=False)})
+    logger.info(f"Delta from {from_version}: {len(delta['added'])} added, "
+                f"{len(delta['changed'])} changed, {len(delta['deleted'])} deleted.")
+    return delta
@@ -1,5 +1,4 @@
 import json
-import urllib.request
 from datetime import datetime
 from .logging_setup import get_logger
 from .config import Config
@@ -11,9 +10,10 @@ class DiscordNotifier:
         self.webhook_url = webhook_url
 
     def send_notification(self, version, kr_version):
+        """Returns False if sending failed (and may be retried), True otherwise."""
         if not self.webhook_url:
             logger.warning("Discord Webhook URL is not configured. Notification skipped.")
-            return
+            return True
 
 
         description = "```yaml\n"
@@ -31,6 +31,7 @@ class DiscordNotifier:
             "embeds": [embed]
         }
 
+        import urllib.request
         try:
             req = urllib.request.Request(
                 self.webhook_url,
@@ -40,7 +41,8 @@ class DiscordNotifier:
             with urllib.request.urlopen(req) as response:
                 if 200 <= response.status < 300:
                     logger.info("Discord notification sent successfully.")
-                else:
-                    logger.error(f"Failed to send Discord notification: HTTP {response.status}")
+                    return True
+                logger.error(f"Failed to send Discord notification: HTTP {response.status}")
         except Exception as e:
             logger.error(f"Failed to send Discord notification: {e}")
+        return False
@@ -1,12 +1,18 @@
 import json
 import os
+import pickle
+import hashlib
 from .config import Config
 from .logging_setup import get_logger
+from .rule_plan import RulePlan
 
 logger = get_logger()
 
+# Modules that decide what a compiled plan contains; editing one invalidates the cached plan
+PLAN_MODULES = ("filter_loader.py", "rule_plan.py")
+
 class FilterLoader:
-    def __init__(self, config_dir=None):
+    def __init__(self, config_dir=None, cache_dir=None):
         if config_dir:
             self.config_dir = config_dir
         else:
@@ -14,13 +20,67 @@ class FilterLoader:
             
         self.manual_path = os.path.join(self.config_dir, 'filter.json')
         self.transient_path = os.path.join(self.config_dir, 'managed_filter.tmp.json')
+        # Compiled plans are cached here when set
+        self.plan_path = os.path.join(cache_dir, 'plan.pickle') if cache_dir else None
+
+    def load(self, compiled=False):
+        """
+        Loads and merges manual filter and transient sheet data.
+
+        With compiled=True the merged config is returned as a RulePlan,
+        which resolves the rules of each file once instead of per phase.
+        With a cache_dir, the plan is reused from the last run as long as
+        both JSON files and the code building it are unchanged.
+        """
+        if compiled and self.plan_path:
+            return self._load_cached_plan()
 
-    def load(self):
-        """Loads and merges manual filter and transient sheet data."""
         base_config = self._load_json(self.manual_path)
         transient_config = self._load_json(self.transient_path)
         
-        return self._merge_configs(transient_config, base_config)
+        merged = self._merge_configs(transient_config, base_config)
+        return RulePlan(merged) if compiled else merged
+
+    def inputs_hash(self):
+        """Hash of everything a compiled plan is built from."""
+        h = hashlib.blake2b(digest_size=16)
+        lib_dir = os.path.dirname(os.path.abspath(__file__))
+        paths = [self.manual_path, self.transient_path] + [os.path.join(lib_dir, m) for m in PLAN_MODULES]
+        for path in paths:
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            except FileNotFoundError:
+                data = None
+            h.update(b"-" if data is None else b"+%d:" % len(data))
+            h.update(data or b"")
+        return h.hexdigest()
+
+    def _load_cached_plan(self):
+        key = self.inputs_hash()
+        try:
+            with open(self.plan_path, 'rb') as f:
+                # The key is stored first, so a stale plan is never unpickled
+                if pickle.load(f) == key:
+                    plan = pickle.load(f)
+                    logger.info("Loaded the compiled filter plan from cache.")
+                    return plan
+        except FileNotFoundError:
+            pass
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable filter plan cache: {e}")
+
+        plan = RulePlan(self.load())
+        try:
+            os.makedirs(os.path.dirname(self.plan_path), exist_ok=True)
+            temp = self.plan_path + ".tmp"
+            with open(temp, 'wb') as f:
+                pickle.dump(key, f, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(plan, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, self.plan_path)
+        except Exception as e:
+            logger.warning(f"Failed to cache the compiled filter plan: {e}")
+        return plan
 
     def _load_json(self, path):
         if not os.path.exists(path):
@@ -2,16 +2,28 @@ import csv
 import json
 import os
 import re
-import gspread
-from google.oauth2.service_account import Credentials
+import hashlib
 
 from .config import Config
 from .logging_setup import get_logger
 
 logger = get_logger()
 
+# Sections of managed_filter.tmp.json built from the sheet, per file
+SHEET_SECTIONS = ("delete_rows", "remap_keys", "remap_columns")
+
 class FilterSync:
-    def __init__(self, config_dir):
+    """
+    Builds managed_filter.tmp.json from the filter spreadsheet.
+
+    The last sheet snapshot is kept in cache_dir: the spreadsheet's Drive
+    modified time, a hash of each file's rows and the filter sections built
+    from them. When the modified time is unchanged the rows are not fetched
+    at all; otherwise only files whose rows changed are rebuilt. spreadsheet
+    may be passed in (e.g. a local fake with get_worksheet()) instead of
+    opening the configured sheet.
+    """
+    def __init__(self, config_dir, cache_dir=None, spreadsheet=None):
         self.config_dir = config_dir
         # Resolve credential path relative to project root or use configured path
         base_dir = Config.BASE_DIR
@@ -19,114 +31,203 @@ class FilterSync:
         self.json_path = os.path.join(config_dir, 'filter.json')
         self.manual_json_path = os.path.join(config_dir, 'manual_filter.json')
         self.transient_json_path = os.path.join(config_dir, 'managed_filter.tmp.json')
+        self.cache_dir = cache_dir or os.path.join(base_dir, "transform", "cache", "sheet")
+        self.snapshot_path = os.path.join(self.cache_dir, "snapshot.json")
         self.sheet_id = Config.GOOGLE_SHEET_ID
+        self.spreadsheet = spreadsheet
 
     @staticmethod
     def normalize_filename(filename):
         return re.sub(r'\.(ja|ko|en|de|fr)?(\.(ja|ko|en|de|fr))?\.csv$', '.csv', filename)
 
-    def get_data(self):
-        """Fetches data from Google Sheets using API."""
-        logger.info(f"Fetching data from Google Sheets API...")
-        try:
+    def open_spreadsheet(self):
+        if self.spreadsheet is None:
+            # Only runs that fetch the sheet pay for importing the Google client
+            import gspread
+            from google.oauth2.service_account import Credentials
             scopes = [
                 'https://www.googleapis.com/auth/spreadsheets',
                 'https://www.googleapis.com/auth/drive'
             ]
             creds = Credentials.from_service_account_file(self.creds_path, scopes=scopes)
             client = gspread.authorize(creds)
-            sh = client.open_by_key(self.sheet_id)
-            worksheet = sh.get_worksheet(0)
+            self.spreadsheet = client.open_by_key(self.sheet_id)
+        return self.spreadsheet
+
+    @staticmethod
+    def modified_time(spreadsheet):
+        """Drive modified time of the spreadsheet, or None if it cannot be read."""
+        try:
+            return spreadsheet.get_lastUpdateTime()
+        except Exception as e:
+            logger.warning(f"Could not read the spreadsheet modified time: {e}")
+            return None
+
+    def get_data(self, spreadsheet=None):
+        """Fetches data from Google Sheets using API."""
+        logger.info(f"Fetching data from Google Sheets API...")
+        try:
+            spreadsheet = spreadsheet or self.open_spreadsheet()
+            worksheet = spreadsheet.get_worksheet(0)
             return worksheet.get_all_records()
         except Exception as e:
             logger.warning(f"Failed to fetch from Google Sheets API: {e}")
             return None
 
-    def update_config(self):
-        """Generates managed_filter.tmp.json from Spreadsheet data."""
-        # Initialize empty collections for Sheet data
-        new_delete_rows = {}
-        new_remap_keys = {}
-        new_remap_columns = {} # Only row-level remaps come from sheet
+    def load_snapshot(self):
+        if not os.path.exists(self.snapshot_path):
+            return None
+        try:
+            with open(self.snapshot_path, 'r', encoding='utf-8') as f:
+                snapshot = json.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable sheet snapshot: {e}")
+            return None
+        return snapshot if snapshot.get("sheet_id") == self.sheet_id else None
+
+    def save_snapshot(self, snapshot):
+        os.makedirs(self.cache_dir, exist_ok=True)
+        temp = self.snapshot_path + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(snapshot, f, ensure_ascii=False)
+        os.replace(temp, self.snapshot_path)
+
+    def update_config(self, offline=False):
+        """
+        Generates managed_filter.tmp.json from Spreadsheet data. offline only
+        uses the local snapshot, without opening the spreadsheet.
+        """
+        snapshot = self.load_snapshot()
+        if offline:
+            if snapshot:
+                logger.info("Sheet sync skipped, using the local snapshot.")
+                return self.write_config(snapshot["files"])
+            logger.warning("Sheet sync skipped and no local snapshot found.")
+            return False
+        try:
+            spreadsheet = self.open_spreadsheet()
+        except Exception as e:
+            logger.warning(f"Failed to open the spreadsheet: {e}")
+            spreadsheet = None
 
-        data = self.get_data()
+        modified = self.modified_time(spreadsheet) if spreadsheet is not None else None
+        if snapshot and modified and snapshot.get("modified") == modified:
+            logger.info(f"Spreadsheet unchanged since {modified}, using the local snapshot.")
+            return self.write_config(snapshot["files"])
+
+        data = self.get_data(spreadsheet) if spreadsheet is not None else None
         if data is None:
+            if snapshot:
+                logger.warning("Could not retrieve data from spreadsheet, using the last snapshot.")
+                return self.write_config(snapshot["files"])
             logger.error("Error: Could not retrieve data from spreadsheet.")
             return False
 
+        files = self.build_files(data, snapshot["files"] if snapshot else {})
+        self.save_snapshot({"sheet_id": self.sheet_id, "modified": modified, "files": files})
+        return self.write_config(files)
+
+    def build_files(self, data, previous):
+        """
+        Returns {filename: {"hash", *SHEET_SECTIONS}} for the sheet rows. Files
+        whose rows hash the same as in previous reuse the sections built then.
+        """
+        rows_by_file = {}
         for row in data:
             # Headers: idx, File, Key, Offset, Type, Global, KR, Exclude, Swap_Key, Swap_Offset
             if not row.get('File') or not row.get('Key'):
                 continue
-                
             filename = self.normalize_filename(str(row['File']))
+            rows_by_file.setdefault(filename, []).append(row)
+
+        files = {}
+        rebuilt = 0
+        for filename, rows in rows_by_file.items():
+            digest = hashlib.sha1(json.dumps(rows, sort_keys=True, ensure_ascii=False, default=str)
+                                  .encode('utf-8')).hexdigest()
+            cached = previous.get(filename)
+            if cached and cached["hash"] == digest:
+                files[filename] = cached
+            else:
+                files[filename] = {"hash": digest, **self.build_sections(rows)}
+                rebuilt += 1
+        removed = len(set(previous) - set(files))
+        logger.info(f"Sheet sync: {len(files)} files, {rebuilt} rebuilt, {removed} removed.")
+        return files
+
+    @staticmethod
+    def build_sections(rows):
+        """Filter sections of one file from its sheet rows (None where the file has none)."""
+        delete_rows = None
+        remap_keys = None
+        remap_columns = None
+
+        for row in rows:
             rid = str(row['Key']).strip()
-            
+
             # 2a. Handle Exclude
             is_excluded = str(row.get('Exclude', '')).upper() == 'TRUE'
             if is_excluded:
-                if filename not in new_delete_rows:
-                    new_delete_rows[filename] = []
+                if delete_rows is None:
+                    delete_rows = set()
                 try:
-                    ival = int(rid)
-                    if ival not in new_delete_rows[filename]:
-                        new_delete_rows[filename].append(ival)
+                    delete_rows.add(int(rid))
                 except ValueError:
                     pass
 
             # 2b. Handle Swap_Key
             swap_target = str(row.get('Swap_Key', '')).strip()
             if swap_target:
-                if filename not in new_remap_keys:
-                    new_remap_keys[filename] = {}
-                new_remap_keys[filename][rid] = swap_target
+                if remap_keys is None:
+                    remap_keys = {}
+                remap_keys[rid] = swap_target
 
             # 2c. Handle Swap_Offset (Row-specific column remap)
             swap_offset = str(row.get('Swap_Offset', '')).strip()
             gl_offset = str(row.get('Offset', '')).strip()
             if swap_offset and gl_offset:
-                if filename not in new_remap_columns:
-                    new_remap_columns[filename] = {}
-                if rid not in new_remap_columns[filename]:
-                    new_remap_columns[filename][rid] = {}
+                if remap_columns is None:
+                    remap_columns = {}
+                if rid not in remap_columns:
+                    remap_columns[rid] = {}
                 
                 # If "G" is specified, fetch the literal Global value from the sheet
                 if swap_offset.lower() == "g":
                     gl_val = str(row.get('Global', ''))
                     # Store as a literal String value
-                    new_remap_columns[filename][rid][gl_offset] = gl_val
+                    remap_columns[rid][gl_offset] = gl_val
                 else:
                     # Try to store as an Integer Offset
                     try:
-                        new_remap_columns[filename][rid][gl_offset] = int(swap_offset)
+                        remap_columns[rid][gl_offset] = int(swap_offset)
                     except ValueError:
                         # Fallback to String if not a number
-                        new_remap_columns[filename][rid][gl_offset] = swap_offset
-                    
-        sorted_delete_rows = {}
-        for filename in sorted(new_delete_rows.keys()):
-            sorted_delete_rows[filename] = sorted(new_delete_rows[filename])
-
-        sorted_remap_keys = {}
-        for filename in sorted(new_remap_keys.keys()):
-            sorted_remap_keys[filename] = dict(sorted(new_remap_keys[filename].items(), key=lambda x: int(x[0]) if x[0].isdigit() else x[0]))
-
-        # Sort remap_columns by filename and row ID
-        sorted_remap_columns = {}
-        for filename, row_mappings in new_remap_columns.items():
-            if filename not in sorted_remap_columns:
-                sorted_remap_columns[filename] = {}
-            for rid, col_mapping in row_mappings.items():
-                sorted_remap_columns[filename][rid] = col_mapping
-                
+                        remap_columns[rid][gl_offset] = swap_offset
+
+        if remap_keys is not None:
+            remap_keys = dict(sorted(remap_keys.items(), key=lambda x: int(x[0]) if x[0].isdigit() else x[0]))
+        return {
+            "delete_rows": sorted(delete_rows) if delete_rows is not None else None,
+            "remap_keys": remap_keys,
+            "remap_columns": remap_columns,
+        }
+
+    def write_config(self, files):
+        """Writes managed_filter.tmp.json from the per-file sections."""
+        sections = {name: {} for name in SHEET_SECTIONS}
+        for filename in sorted(files):
+            for name in SHEET_SECTIONS:
+                if files[filename][name] is not None:
+                    sections[name][filename] = files[filename][name]
+
         transient_config = {
             "delete_files": [], # Sheet doesn't manage file deletion
-            "remap_keys": sorted_remap_keys,
-            "remap_columns": dict(sorted(sorted_remap_columns.items())),
+            "remap_keys": sections["remap_keys"],
+            "remap_columns": sections["remap_columns"],
             "keep_rows": {},
             "delete_columns": {},
             "keep_columns": {},
-            "delete_rows": sorted_delete_rows
+            "delete_rows": sections["delete_rows"]
         }
 
         # Write to TRANSIENT file, NOT filter.json
@@ -0,0 +1,169 @@
+import os
+import zlib
+import zipfile
+import posixpath
+from concurrent.futures import ThreadPoolExecutor
+from .logging_setup import get_logger
+
+logger = get_logger()
+
+BLOCK_SIZE = 1024 * 1024 # bytes read at a time by deflate_file
+
+def deflate(data):
+    """Compresses data as a raw deflate stream, like zipfile does for ZIP_DEFLATED."""
+    co = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    return len(data), zlib.crc32(data), co.compress(data) + co.flush()
+
+def deflate_file(path):
+    """deflate() of a file's contents, read in blocks (the output is the same)."""
+    co = zlib.compressobj(zlib.Z_DEFAULT_COMPRESSION, zlib.DEFLATED, -15)
+    size, crc, parts = 0, 0, []
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+            size += len(block)
+            crc = zlib.crc32(block, crc)
+            parts.append(co.compress(block))
+    parts.append(co.flush())
+    return size, crc, b"".join(parts)
+
+def archive_name(rel_path):
+    """Name of a transformed file in rawexd.zip (Phase 11 drops the .ko suffix)."""
+    head, tail = posixpath.split(rel_path.replace('\\', '/'))
+    return posixpath.join(head, tail.replace(".ko.csv", ".csv"))
+
+class ZipPackager:
+    """
+    Builds rawexd.zip from entries compressed while the transform is running.
+
+    Finished files are handed over with submit() and deflated on a thread pool
+    (zlib releases the GIL), or passed in already compressed with add(). Files
+    changed after that are resubmitted or dropped with discard(). write() then
+    only lays the compressed entries out in the same order and with the same
+    metadata as shutil.make_archive; files that were never submitted, or whose
+    size no longer matches, are compressed at that point.
+
+    With workers=0 submit() compresses inline, which is used inside transform
+    worker processes that hand their entries back to the main process.
+    """
+    def __init__(self, workers=0):
+        self.executor = ThreadPoolExecutor(max_workers=workers) if workers > 0 else None
+        self.entries = {} # {archive name: (size, crc, data) or Future}
+
+    def submit(self, rel_path, data):
+        name = archive_name(rel_path)
+        if self.executor is None:
+            self.entries[name] = deflate(data)
+        else:
+            self.entries[name] = self.executor.submit(deflate, data)
+
+    def submit_file(self, rel_path, path):
+        """Like submit(), reading the file in blocks instead of taking its contents."""
+        name = archive_name(rel_path)
+        if self.executor is None:
+            self.entries[name] = deflate_file(path)
+        else:
+            self.entries[name] = self.executor.submit(self._deflate_later, path)
+
+    def add(self, entries):
+        self.entries.update(entries)
+
+    def discard(self, rel_path):
+        self.entries.pop(archive_name(rel_path), None)
+
+    def take(self):
+        entries, self.entries = self.entries, {}
+        return entries
+
+    def _entry(self, name):
+        entry = self.entries.get(name)
+        if entry is not None and not isinstance(entry, tuple):
+            entry = entry.result()
+        return entry
+
+    def write(self, zip_path, root_dir, names=None, extra=None):
+        """
+        Writes root_dir to zip_path using the precompressed entries.
+
+        names limits the archive to those files (without directory entries);
+        extra maps additional archive names to their contents.
+        """
+        # Same traversal as shutil.make_archive(base, 'zip', root_dir)
+        items = []
+        for dirpath, dirnames, filenames in os.walk(root_dir):
+            arcdir = os.path.relpath(dirpath, root_dir)
+            if names is None:
+                for name in sorted(dirnames):
+                    items.append((os.path.join(dirpath, name), os.path.join(arcdir, name), True))
+            for name in filenames:
+                path = os.path.join(dirpath, name)
+                arcname = os.path.join(arcdir, name)
+                if names is not None and archive_name(os.path.normpath(arcname)) not in names:
+                    continue
+                if os.path.isfile(path):
+                    items.append((path, arcname, False))
+
+        # Compress whatever is missing or stale in parallel before writing
+        late = {}
+        pool = self.executor or ThreadPoolExecutor(max_workers=os.cpu_count() or 1)
+        for path, arcname, is_dir in items:
+            if is_dir: continue
+            name = archive_name(os.path.normpath(arcname))
+            entry = self._entry(name)
+            if entry is None or entry[0] != os.path.getsize(path):
+                late[name] = pool.submit(deflate_file, path)
+        if late:
+            logger.info(f"Compressing {len(late)} files not packaged during the transform...")
+
+        reused = 0
+        with zipfile.ZipFile(zip_path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+            for path, arcname, is_dir in items:
+                if is_dir:
+                    zf.write(path, arcname)
+                    continue
+                name = archive_name(os.path.normpath(arcname))
+                if name in late:
+                    entry = self.entries[name] = late[name].result()
+                else:
+                    entry = self._entry(name)
+                    reused += 1
+                self._write_entry(zf, zipfile.ZipInfo.from_file(path, arcname), entry)
+            for arcname, data in (extra or {}).items():
+                zf.writestr(arcname, data)
+
+        if pool is not self.executor:
+            pool.shutdown()
+        logger.info(f"Packaged {reused} files compressed during the transform, {len(late)} at the end.")
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+        self.entries = {}
+
+    @staticmethod
+    def _deflate_later(path):
+        # The file may be renamed before this runs (Phase 11); write() then
+        # finds no entry and compresses it again
+        try:
+            return deflate_file(path)
+        except OSError:
+            return None
+
+    @staticmethod
+    def _write_entry(zf, zinfo, entry):
+        # Mirrors ZipFile.write for a seekable file, with the data already deflated
+        size, crc, data = entry
+        zinfo.compress_type = zipfile.ZIP_DEFLATED
+        zinfo.flag_bits = 0x00
+        zinfo.file_size = size
+        zinfo.CRC = crc
+        zinfo.compress_size = len(data)
+        zip64 = size * 1.05 > zipfile.ZIP64_LIMIT
+
+        zinfo.header_offset = zf.fp.tell()
+        zf.fp.write(zinfo.FileHeader(zip64))
+        zf.fp.write(data)
+        zf.start_dir = zf.fp.tell()
+        zf.filelist.append(zinfo)
+        zf.NameToInfo[zinfo.filename] = zinfo
+        zf._didModify = True
@@ -2,31 +2,63 @@ import os
 import shutil
 import datetime
 from .logging_setup import get_logger
+from .rule_plan import RulePlan
 
 logger = get_logger()
 
+TARGET_NAME = "raw-exd-all" # SaintCoinach allrawexd output folder
+
+def tree_state(path):
+    """[files, bytes, latest mtime] of the tree under path; changes whenever a file in it does."""
+    count = size = latest = 0
+    for root, _, files in os.walk(path):
+        for f in files:
+            try:
+                st = os.stat(os.path.join(root, f))
+            except OSError:
+                continue
+            count += 1
+            size += st.st_size
+            latest = max(latest, st.st_mtime_ns)
+    return [count, size, latest]
+
 class PathManager:
-    def __init__(self, base_dir, folder_name, sub_path=""):
+    def __init__(self, base_dir, folder_name, sub_path="", version_string=None, isolated=False):
         self.base_dir = base_dir
         self.folder_name = folder_name
         self.timestamp = datetime.datetime.now().strftime("%m%d.%H%M")
-        self.version_string = folder_name.replace(".0000.0000", f".{self.timestamp}")
+        # A resumed run keeps the version string of the run it continues
+        self.version_string = version_string or folder_name.replace(".0000.0000", f".{self.timestamp}")
         
         # Language-specific paths
         self.src_root = os.path.join(base_dir, "transform", "original", sub_path, folder_name)
         self.dst_root = os.path.join(base_dir, "transform", "output", sub_path, self.version_string)
-        self.target_dir = os.path.join(self.dst_root, "raw-exd-all")
+        self.target_dir = os.path.join(self.dst_root, TARGET_NAME)
         
         self.config_path = os.path.join(base_dir, "transform", "config", "filter.json")
         self.rsv_json_path = os.path.join(base_dir, "transform", "config", "rsv.json")
+        self.rsv_db_path = os.path.join(base_dir, "transform", "config", "rsv.sqlite3")
         self.preset_json_path = os.path.join(base_dir, "transform", "config", "preset.json")
         self.validation_json_path = os.path.join(base_dir, "transform", "validation.json")
+        self.profile_json_path = os.path.join(base_dir, "transform", "profile.json")
+        self.build_cache_dir = os.path.join(base_dir, "transform", "cache", "build", sub_path)
+        if isolated:
+            # Runs of several versions at once (batch mode) keep their reports apart;
+            # the build cache is content-addressed and shared
+            reports_dir = os.path.join(base_dir, "transform", "reports", sub_path, self.version_string)
+            self.validation_json_path = os.path.join(reports_dir, "validation.json")
+            self.profile_json_path = os.path.join(reports_dir, "profile.json")
+        self.act_cache_dir = os.path.join(base_dir, "transform", "cache", "act")
         
+    @property
+    def checkpoint_path(self):
+        return os.path.join(self.dst_root, "checkpoint.json")
+
     @property
     def data_json_path(self):
         return os.path.join(self.dst_root, "data.json")
 
-    def prepare_output_dir(self):
+    def prepare_output_dir(self, plan=None):
         if not os.path.exists(self.src_root):
             logger.error(f"Error: Source directory not found: {self.src_root}")
             return False
@@ -35,12 +67,63 @@ class PathManager:
         try:
             if os.path.exists(self.dst_root):
                 shutil.rmtree(self.dst_root)
-            shutil.copytree(self.src_root, self.dst_root)
+            self._isolate(plan)
             return True
         except Exception as e:
             logger.error(f"Failed to copy directory: {e}")
             return False
 
+    def _isolate(self, plan):
+        """
+        Mirrors src_root into dst_root, keeping only the .ko.csv files of the
+        target folder that delete_files does not exclude.
+
+        Target files are hardlinked where the filesystem allows it. Phases never
+        write into an existing file (they write a temp file and replace it), so
+        a linked source is never modified. Read-only sources are copied instead,
+        since clearing the flag before a delete would change the source too.
+        """
+        plan = RulePlan.of(plan) if plan else None
+        src_target = os.path.join(self.src_root, TARGET_NAME)
+        linked = copied = skipped = 0
+        for root, _, files in os.walk(self.src_root):
+            dst = os.path.normpath(os.path.join(self.dst_root, os.path.relpath(root, self.src_root)))
+            os.makedirs(dst, exist_ok=True)
+            in_target = root == src_target or root.startswith(src_target + os.sep)
+
+            for f in files:
+                src = os.path.join(root, f)
+                if not in_target:
+                    shutil.copy2(src, os.path.join(dst, f))
+                    copied += 1
+                    continue
+
+                if not f.endswith(".ko.csv"):
+                    skipped += 1
+                    continue
+                if plan and plan.resolve(os.path.relpath(src, src_target).replace('\\', '/')).deleted:
+                    skipped += 1
+                    continue
+
+                if self._link(src, os.path.join(dst, f)):
+                    linked += 1
+                else:
+                    copied += 1
+
+        logger.info(f"Isolated {linked + copied} files ({linked} linked, {copied} copied), skipped {skipped}.")
+
+    @staticmethod
+    def _link(src, dst):
+        # Returns False when the file had to be copied
+        if os.access(src, os.W_OK):
+            try:
+                os.link(src, dst)
+                return True
+            except OSError:
+                pass # cross-device or no hardlink support
+        shutil.copy2(src, dst)
+        return False
+
     def get_version_txt_path(self):
         return os.path.join(self.dst_root, "version.txt")
 
@@ -48,3 +131,35 @@ class PathManager:
         # Zip location alongside extracted files
         zip_base = os.path.join(self.dst_root, "rawexd")
         return zip_base, f"{zip_base}.zip"
+
+    def get_delta_path(self, from_version):
+        return os.path.join(self.dst_root, "delta", f"delta-{from_version}.zip")
+
+    @property
+    def published_path(self):
+        # Version string of the last upload, next to the version directories
+        return os.path.join(os.path.dirname(self.dst_root), "published.txt")
+
+    def mark_published(self):
+        """Records this version as the one clients download, after a successful upload."""
+        temp = self.published_path + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            f.write(self.version_string)
+        os.replace(temp, self.published_path)
+
+    def find_previous_version(self):
+        """
+        Root of the last published version, if it still has its rawexd
+        folder. Local builds that were never uploaded (transform-only,
+        failed or batch runs) are not what clients have, so they are never
+        a delta base.
+        """
+        try:
+            with open(self.published_path, 'r', encoding='utf-8') as f:
+                version = f.read().strip()
+        except OSError:
+            return None
+        if not version or version == self.version_string:
+            return None
+        root = os.path.join(os.path.dirname(self.dst_root), version)
+        return root if os.path.isdir(os.path.join(root, "rawexd")) else None
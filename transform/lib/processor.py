@@ -5,9 +5,21 @@ import stat
 import time
 import json
 import sys
+import hashlib
+from itertools import chain
+from concurrent.futures import ProcessPoolExecutor
 
 from .common import CommonUtils
-from .logging_setup import get_logger
+from .build_cache import hash_file, UNSET_RSV
+from .packager import ZipPackager, archive_name, BLOCK_SIZE
+from .profiler import Profiler
+from .rsv import RSVManager
+from .rule_plan import RulePlan
+from .validator import header_issue, rows_issue
+from .sheet import Sheet, HEADER_LINES
+from .streaming import (SheetStream, KoreanColumns, split_header, reparse_rows, row_text, project,
+                        has_candidates, write_rows)
+from .logging_setup import get_logger, setup_logging
 
 logger = get_logger()
 
@@ -20,14 +32,67 @@ while True:
     except OverflowError:
         max_int = int(max_int / 10)
 
+HEX_TAG_RE = re.compile(r'<hex:[A-F0-9]+>')
+QUOTE_RE = re.compile(r'["\'](.*?)["\']') # quoted strings in chat instructions
+# Phase 4 only changes files with a "Say" instruction, which contains both of these
+CHAT_MARKERS = ("대화창", "'말하기'")
+
+# Per-process state for parallel transform workers
+_worker = {}
+
+def _init_transform_worker(rsv_data, plan, package, trace_memory, streaming, integrity):
+    setup_logging()
+    # Packaged files are compressed in the worker and handed back with the results,
+    # as are profile records (trace_memory is None when profiling is off)
+    packager = ZipPackager() if package else None
+    profiler = Profiler(trace_memory=trace_memory) if trace_memory is not None else None
+    _worker["processor"] = CSVProcessor(RSVManager(None, rsv_data=rsv_data), packager=packager, profiler=profiler,
+                                        streaming=streaming, integrity=integrity)
+    _worker["plan"] = plan
+
+def _transform_worker(path, target_dir):
+    proc = _worker["processor"]
+    rm = proc.rsv_manager
+
+    # Every file starts from the same RSV snapshot; state is returned, not kept
+    proc.anonymized_ids = {}
+    proc.korean_content = {}
+    proc.rsv_cells = {}
+    proc.file_stats = {}
+    proc.file_issues = {}
+    rm.rsv_files = {}
+    rm.dirty = {}
+
+    proc._transform_file(path, target_dir, _worker["plan"])
+
+    # Keys the file added are handed back and dropped from the snapshot
+    new_keys = list(rm.dirty)
+    for key in new_keys:
+        del rm.rsv_data[key]
+    entries = proc.packager.take() if proc.packager else {}
+    records = proc.profiler.take_files() if proc.profiler else []
+    return (rm.rsv_files, new_keys, proc.anonymized_ids, proc.korean_content, proc.rsv_cells,
+            proc.file_stats, proc.file_issues, entries, records)
+
 class CSVProcessor:
-    def __init__(self, rsv_manager):
+    def __init__(self, rsv_manager, workers=1, packager=None, profiler=None, streaming=False, integrity=False):
         self.rsv_manager = rsv_manager
+        self.workers = workers if workers > 0 else (os.cpu_count() or 1) # 0 = all cores
+        self.packager = packager # ZipPackager fed with files as they are finished
+        self.profiler = profiler # Profiler receiving per-file records
+        self.streaming = streaming # process files row by row instead of loading them (see _stream_transform_file)
+        self.integrity = integrity # check header and row widths of the files transform() writes
         self.anonymized_ids = {} # {rel_path: set(row_ids)}
+        self.korean_content = {} # {rel_path: bool}, filled by transform() for Phase 10
+        self.rsv_cells = {} # {rel_path: [(line, column, rsv key)]} of replaced keys, for patch_rsv and the build cache
+        self.rsv_written = {} # {rsv key: value} the indexed cells were written with
+        self.file_stats = {} # {archive name: {size, sha256, rows}} of finished files, for data.json
+        self.file_issues = {} # {archive name: problem} of files failing the integrity check, for validation
 
     @staticmethod
     def make_writable(path):
-        if os.path.exists(path):
+        # Writable files are left alone: they may be hardlinks of the sources
+        if os.path.exists(path) and not os.access(path, os.W_OK):
             os.chmod(path, stat.S_IWRITE)
 
     @staticmethod
@@ -45,6 +110,81 @@ class CSVProcessor:
                 time.sleep(0.1)
         return False
 
+    def write_sheet(self, path, sheet):
+        # Returns the written bytes so finished files can be packaged without a re-read
+        temp = path + ".tmp"
+        data = sheet.to_text().encode('utf-8')
+        with open(temp, 'wb') as f:
+            f.write(data)
+        self.safe_replace(temp, path)
+        return data
+
+    def _finish_file(self, path, rel_path, rows, data=None):
+        # Records size, hash and data row count of a finished file and packages it
+        if data is None and self.streaming:
+            # Hashed and packaged from disk in blocks, the file is never loaded whole
+            digest = hashlib.sha256()
+            with open(path, 'rb') as f:
+                for block in iter(lambda: f.read(BLOCK_SIZE), b''):
+                    digest.update(block)
+            self.file_stats[archive_name(rel_path)] = {
+                "size": os.path.getsize(path),
+                "sha256": digest.hexdigest(),
+                "rows": rows,
+            }
+            if self.packager is not None:
+                self.packager.submit_file(rel_path, path)
+            return
+        if data is None:
+            with open(path, 'rb') as f:
+                data = f.read()
+        self.file_stats[archive_name(rel_path)] = {
+            "size": len(data),
+            "sha256": hashlib.sha256(data).hexdigest(),
+            "rows": rows,
+        }
+        if self.packager is not None:
+            self.packager.submit(rel_path, data)
+
+    def checkpoint_state(self):
+        """Per-file state the phases after the transform depend on, as JSON-ready values."""
+        return {
+            "anonymized_ids": {rel_path: list(ids) for rel_path, ids in self.anonymized_ids.items()},
+            "korean_content": self.korean_content,
+            "rsv_cells": self.rsv_cells,
+            "rsv_written": self.rsv_written,
+            "file_stats": self.file_stats,
+            "file_issues": self.file_issues,
+        }
+
+    def restore_checkpoint(self, state):
+        self.anonymized_ids = {rel_path: set(ids) for rel_path, ids in state["anonymized_ids"].items()}
+        self.korean_content = state["korean_content"]
+        self.rsv_cells = {rel_path: [tuple(cell) for cell in cells] for rel_path, cells in state["rsv_cells"].items()}
+        self.rsv_written = state["rsv_written"]
+        self.file_stats = state["file_stats"]
+        self.file_issues = state["file_issues"]
+
+    def forget_missing(self, root_dir):
+        """
+        Drops the state of files no longer under root_dir, e.g. files removed by
+        a Phase 10 that was interrupted before it was checkpointed.
+        """
+        present = set()
+        for root, _, files in os.walk(root_dir):
+            for f in files:
+                present.add(archive_name(os.path.relpath(os.path.join(root, f), root_dir)))
+        for state in (self.file_stats, self.file_issues):
+            for name in set(state) - present:
+                del state[name]
+        for state in (self.korean_content, self.rsv_cells):
+            for rel_path in [r for r in state if archive_name(r) not in present]:
+                del state[rel_path]
+
+    def file_manifest(self):
+        """Per-file stats for data.json, keyed by the final rawexd path."""
+        return dict(sorted(self.file_stats.items()))
+
     def initial_cleanup(self, target_dir):
         # Remove all files except those ending in .ko.csv
         for root, _, files in os.walk(target_dir):
@@ -54,160 +194,678 @@ class CSVProcessor:
                     self.make_writable(path)
                     os.remove(path)
 
+    def transform(self, target_dir, config, cache=None):
+        """
+        Runs Phases 2-7 as one pass: every file is read once, passed through the
+        per-file rules in phase order, and written once.
+
+        With a BuildCache, files whose source, rules and RSV values match a
+        previous run are copied from the cache instead of being processed.
+        """
+        plan = RulePlan.of(config)
+        paths = []
+        for root, _, files in os.walk(target_dir):
+            for f in files:
+                path = os.path.join(root, f)
+                if not f.endswith(".ko.csv"):
+                    # Phase 2: initial cleanup
+                    self.make_writable(path)
+                    os.remove(path)
+                    continue
+                paths.append(path)
+
+        hits, sources = {}, {}
+        if cache is not None:
+            hits, sources = self._lookup_cached(paths, target_dir, plan, cache)
+
+        if self.workers > 1 and len(paths) - len(hits) > 1:
+            self._transform_parallel(paths, target_dir, plan, hits, cache)
+        else:
+            for path in paths:
+                if path in hits:
+                    self._restore_cached(path, target_dir, hits[path], cache)
+                else:
+                    self._transform_file(path, target_dir, plan)
+
+        if cache is not None:
+            self._store_cached(paths, target_dir, plan, cache, hits, sources)
+        self._snapshot_rsv()
+
+    def _transform_parallel(self, paths, target_dir, plan, hits=None, cache=None):
+        # Results come back in walk order, so merged state matches a serial run
+        hits = hits or {}
+        pending = [path for path in paths if path not in hits]
+        logger.info(f"Transforming {len(pending)} files with {self.workers} workers...")
+        chunksize = max(1, len(pending) // (self.workers * 8))
+        with ProcessPoolExecutor(max_workers=self.workers, initializer=_init_transform_worker,
+                                 initargs=(self.rsv_manager.rsv_data, plan, self.packager is not None,
+                                           self.profiler.trace_memory if self.profiler else None,
+                                           self.streaming, self.integrity)) as executor:
+            results = executor.map(_transform_worker, pending, [target_dir] * len(pending), chunksize=chunksize)
+            for path in paths:
+                if path in hits:
+                    self._restore_cached(path, target_dir, hits[path], cache)
+                    continue
+                (rsv_files, new_keys, anonymized_ids, korean_content, rsv_cells,
+                 file_stats, file_issues, entries, records) = next(results)
+                self.rsv_manager.merge_found(rsv_files, new_keys)
+                self.anonymized_ids.update(anonymized_ids)
+                self.korean_content.update(korean_content)
+                self.rsv_cells.update(rsv_cells)
+                self.file_stats.update(file_stats)
+                self.file_issues.update(file_issues)
+                if self.packager:
+                    self.packager.add(entries)
+                if self.profiler:
+                    self.profiler.add_files(records)
+
+    def _lookup_cached(self, paths, target_dir, plan, cache):
+        # Returns cache entries that can be reused and source hashes of the rest
+        hits, sources = {}, {}
+        rsv_data = self.rsv_manager.rsv_data
+        for path in paths:
+            rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
+            rules = plan.resolve(rel_path)
+            if rules.deleted: continue
+            source_hash = hash_file(path)
+            entry = cache.lookup(rel_path, source_hash, rules.fingerprint(), rsv_data)
+            if entry is not None and self.integrity and entry["issue"] is None:
+                # Stored by a run that did not check the file
+                entry = None
+            if entry is not None:
+                hits[path] = entry
+            else:
+                sources[path] = source_hash
+        logger.info(f"Build cache: {len(hits)} of {len(paths)} files unchanged.")
+        return hits, sources
+
+    def _restore_cached(self, path, target_dir, entry, cache):
+        rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
+        self.make_writable(path)
+        os.remove(path)
+        cache.restore(entry, path)
+        self._finish_file(path, rel_path, entry["rows"])
+
+        # Replay what the file added to the RSV state and the Phase 10 check
+        rsv_files = {}
+        if entry["rsv_count"] is not None:
+            rsv_files[RSVManager.found_path(rel_path)] = entry["rsv_count"]
+        self.rsv_manager.merge_found(rsv_files, [key for key, _, _ in entry["rsv"]])
+        if entry["rsv_cells"]:
+            self.rsv_cells[rel_path] = [tuple(cell) for cell in entry["rsv_cells"]]
+        if entry["korean"] is not None:
+            self.korean_content[rel_path] = entry["korean"]
+        if entry["issue"]:
+            self.file_issues[archive_name(rel_path)] = entry["issue"]
+        if entry["anonymized"] is not None:
+            ids = set(entry["anonymized"])
+            self.anonymized_ids[rel_path] = ids
+            self.anonymized_ids[rel_path.replace(".ko.csv", ".csv")] = ids
+
+    def _store_cached(self, paths, target_dir, plan, cache, hits, sources):
+        rsv_data = self.rsv_manager.rsv_data
+        rsv_files = self.rsv_manager.rsv_files
+        for path in paths:
+            if path in hits or not os.path.exists(path): continue
+            rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
+
+            cells = self.rsv_cells.get(rel_path, [])
+            used = dict.fromkeys(key for _, _, key in cells)
+            cache.store(rel_path, path, sources[path], plan.resolve(rel_path).fingerprint(),
+                        [(key, rsv_data.get(key, UNSET_RSV)) for key in used], cells,
+                        rsv_files.get(RSVManager.found_path(rel_path)),
+                        self.korean_content.get(rel_path),
+                        self.file_stats[archive_name(rel_path)]["rows"],
+                        self.file_issues.get(archive_name(rel_path), "") if self.integrity else None,
+                        self.anonymized_ids.get(rel_path))
+        cache.save()
+
+    def _transform_file(self, path, target_dir, plan):
+        if self.streaming:
+            return self._stream_transform_file(path, target_dir, plan)
+        rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
+        base_rel_path = rel_path.replace(".ko.csv", ".csv")
+        rules = plan.resolve(rel_path)
+        dirty = False
+
+        # Phase 2: manual filters
+        if rules.deleted:
+            self.make_writable(path)
+            os.remove(path)
+            return
+
+        if self.profiler:
+            started = self.profiler.start_file()
+            bytes_in = os.path.getsize(path)
+        sheet = Sheet.read(path)
+        rows_in = sheet.data_count
+
+        if rules.delete_rows or rules.remap_keys:
+            dirty = self._row_operations(sheet, rules) or dirty
+
+        # Phase 3: column remapping
+        if rules.remap_columns and self._col_remaps(sheet, rules.remap_columns):
+            logger.info(f"Applied column remapping to: {path}")
+            dirty = True
+
+        # Phase 4: chat phrase anonymization
+        if rel_path.startswith("quest/") and self._may_have_chat(path, rules):
+            quest_sheet = self._reread_quest_sheet(sheet, path, dirty)
+            if self._anonymize_sheet(quest_sheet, rel_path):
+                sheet = quest_sheet
+                logger.info(f"Anonymized chat phrases in: {os.path.relpath(path, target_dir)}")
+                dirty = True
+
+        # Phase 5: column filtering
+        if len(sheet) >= 4:
+            self._filter_sheet_columns(sheet, rules)
+            dirty = True
+
+        # Phase 6: empty row removal
+        if self._remove_empty_sheet_rows(sheet, rel_path, base_rel_path, rules):
+            dirty = True
+
+        # Phase 7: RSV keys
+        dirty = self._process_sheet_rsv(sheet, os.path.relpath(path, target_dir)) or dirty
+        if self.integrity:
+            self._check_sheet(sheet, rel_path)
+
+        data = None
+        if dirty:
+            data = self.write_sheet(path, sheet)
+        self._finish_file(path, rel_path, sheet.data_count, data)
+        if self.profiler:
+            self.profiler.record_file(started, rel_path, bytes_in, self.file_stats[archive_name(rel_path)]["size"],
+                                      rows_in, sheet.data_count)
+
+        # Phase 10 runs after the ACT sync, which only rewrites cells that still hold
+        # an RSV key, so the check is only cached for files without such cells
+        if not any(self._column_has_rsv(sheet.column(c)) for c in range(sheet.width)):
+            self.korean_content[rel_path] = self._sheet_has_korean(sheet)
+
+    @staticmethod
+    def _may_have_chat(path, rules):
+        # Byte-level pre-check for Phase 4; remapped literals could add the markers
+        if CommonUtils.file_contains(path, CHAT_MARKERS):
+            return True
+        for row_remap in (rules.remap_columns or {}).values():
+            if isinstance(row_remap, dict) and any(
+                    isinstance(v, str) and any(m in v for m in CHAT_MARKERS) for v in row_remap.values()):
+                return True
+        return False
+
+    def _reread_quest_sheet(self, sheet, path, dirty):
+        # Phase 4 re-reads quest files with utf-8-sig, which drops a leading BOM
+        # and can re-tokenize the first cell, so mirror that read here
+        if not (sheet.header and sheet.header[0] and sheet.header[0][0].startswith('\ufeff')):
+            return sheet
+        if not self._sheet_contains(sheet, "말하기"):
+            return sheet
+
+        if not dirty:
+            return Sheet.read(path, encoding='utf-8-sig')
+        text = sheet.to_text()
+        if not text.startswith('\ufeff'):
+            return sheet
+        return Sheet.from_text(text[1:], newline=None)
+
+    @staticmethod
+    def _sheet_contains(sheet, needle):
+        if any(needle in cell for row in sheet.header for cell in row):
+            return True
+        return any(needle in "\0".join(sheet.column(c)) for c in range(sheet.width))
+
+    def _stream_transform_file(self, path, target_dir, plan):
+        """
+        Row-streaming variant of _transform_file with the same output.
+
+        The file is never loaded as a whole: a scan pass works out what the
+        whole-file rules depend on (whether a row edit happened, which columns
+        hold Korean text), then a second pass streams the rows through
+        Phases 2-7 into the output. Quest files with chat instructions take
+        two more passes to match quoted hints with their target rows.
+        """
+        rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
+        base_rel_path = rel_path.replace(".ko.csv", ".csv")
+        rules = plan.resolve(rel_path)
+        dirty = False
+
+        # Phase 2: manual filters
+        if rules.deleted:
+            self.make_writable(path)
+            os.remove(path)
+            return
+
+        if self.profiler:
+            started = self.profiler.start_file()
+            bytes_in = os.path.getsize(path)
+        source = SheetStream(path)
+
+        def edited(drop_blank, flags):
+            # Rows after Phases 2-3
+            header, data = split_header(source.rows())
+            data = self._tally(data, flags)
+            if rules.delete_rows or rules.remap_keys:
+                data = self._stream_row_operations(data, rules, drop_blank, flags)
+            if rules.remap_columns and len(header) == HEADER_LINES:
+                data = self._stream_col_remaps(data, header, rules.remap_columns, flags)
+            return header, data
+
+        # Scan pass
+        scan = {}
+        header, data = edited(False, scan)
+        columns = KoreanColumns(*self._header_columns(header, rules)) if len(header) == HEADER_LINES else None
+        quest = rel_path.startswith("quest/") and self._may_have_chat(path, rules)
+        say = quest and any("말하기" in cell for row in header for cell in row)
+        live = blank = 0
+        for row in data:
+            if not row:
+                blank += 1
+                continue
+            live += 1
+            if columns:
+                columns.add(row)
+            if quest and not say and "말하기" in "\0".join(row):
+                say = True
+
+        # Blank rows only survive Phase 2 in files it leaves unchanged
+        drop_blank = scan.get("row_ops", False)
+        data_count = live if drop_blank else live + blank
+        if scan.get("remapped"):
+            logger.info(f"Applied column remapping to: {path}")
+            dirty = True
+        dirty = dirty or drop_blank
+
+        def output():
+            header, data = edited(drop_blank, {})
+            return chain(header, data)
+        final = output
+
+        # Phase 4: chat phrase anonymization
+        if quest:
+            quest_rows = self._stream_quest_rows(source, header, say, dirty, output)
+            anonymized = self._stream_anonymize(quest_rows or output, rel_path,
+                                                width=None if quest_rows else scan["width"])
+            if anonymized:
+                replacements, data_count = anonymized
+                final = lambda: self._with_replacements(quest_rows or output, replacements)
+                columns = self._stream_columns(final(), rules)
+                logger.info(f"Anonymized chat phrases in: {os.path.relpath(path, target_dir)}")
+                dirty = True
+
+        header, data = split_header(final())
+
+        # Phase 5: column filtering
+        if len(header) == HEADER_LINES:
+            indices = columns.indices()
+            header = [project(row, indices) for row in header]
+            data = (project(row, indices) for row in data)
+            dirty = True
+
+        # Phase 6: empty row removal (blank header lines are dropped)
+        header_all = [h for h in header if h]
+        if header_all:
+            header = header_all
+            content_indices = sorted(self._content_columns(header_all, rules))
+            if not rules.keep_all_rows and data_count:
+                file_anon_ids = self.anonymized_ids.get(rel_path) or self.anonymized_ids.get(base_rel_path) or set()
+                data = self._stream_keep_rows(data, rules.keep_rows | file_anon_ids, content_indices)
+            dirty = True
+
+        # Phase 7: RSV keys
+        state = {"rsv": False, "rsv_left": False, "korean": False}
+        data = self._stream_rsv(data, rel_path, state, len(header))
+        if self.integrity:
+            data = self._check_rows(data, header, rel_path)
+        temp, count = self._stream_write(path, chain(header, data))
+
+        if dirty or state["rsv"]:
+            self.safe_replace(temp, path)
+        else:
+            os.remove(temp)
+        rows_out = count - len(header)
+        self._finish_file(path, rel_path, rows_out)
+        if self.profiler:
+            self.profiler.record_file(started, rel_path, bytes_in, self.file_stats[archive_name(rel_path)]["size"],
+                                      scan["rows"], rows_out)
+
+        # Cached for Phase 10 as in _transform_file
+        if not state["rsv_left"]:
+            self.korean_content[rel_path] = state["korean"]
+
+    def _check_sheet(self, sheet, rel_path):
+        # Integrity check of a transformed sheet, from the row widths it already holds
+        issue = header_issue(sheet.header)
+        widths, order = sheet.widths, sheet.order
+        width = len(sheet.header[0]) if sheet.header else 0
+        if issue is None and widths.count(width) != len(widths):
+            bad = [n for n, p in enumerate(order) if widths[p] != width]
+            if bad:
+                issue = rows_issue(width, len(bad), bad[0], widths[order[bad[0]]])
+        if issue:
+            self.file_issues[archive_name(rel_path)] = issue
+
+    def _check_rows(self, data, header, rel_path):
+        # Integrity check of a streamed sheet, done while its data rows are written
+        width = len(header[0]) if header else 0
+        bad, first = 0, None
+        for n, row in enumerate(data):
+            if len(row) != width:
+                if not bad:
+                    first = (n, len(row))
+                bad += 1
+            yield row
+        issue = header_issue(header)
+        if issue is None and bad:
+            issue = rows_issue(width, bad, *first)
+        if issue:
+            self.file_issues[archive_name(rel_path)] = issue
+
+    def _stream_write(self, path, rows):
+        # Writes rows next to path; returns the temporary file and the row count
+        temp = path + ".tmp"
+        try:
+            count = write_rows(temp, rows)
+        except BaseException:
+            if os.path.exists(temp): os.remove(temp)
+            raise
+        return temp, count
+
+    @staticmethod
+    def _tally(data, flags):
+        # Counts the rows read and the widest one (Sheet.width of the unedited sheet)
+        rows = width = 0
+        for row in data:
+            rows += 1
+            if len(row) > width: width = len(row)
+            yield row
+        flags["rows"] = rows
+        flags["width"] = width
+
+    @staticmethod
+    def _stream_row_operations(data, rules, drop_blank, flags):
+        # Row-by-row _row_operations; flags["row_ops"] is set once a row is changed
+        delete_set = rules.delete_rows
+        remap_dict = rules.remap_keys # Target: Source
+        source_to_targets = rules.key_sources # Source: [Targets]
+        for row in data:
+            if not row:
+                if not drop_blank: yield row
+                continue
+            current_key = row[0]
+            if current_key in source_to_targets:
+                for target_key in source_to_targets[current_key]:
+                    yield [target_key] + row[1:]
+                flags["row_ops"] = True
+            if current_key in remap_dict or current_key in delete_set:
+                flags["row_ops"] = True
+                continue
+            yield row
+
+    def _stream_col_remaps(self, data, header, file_remaps, flags):
+        # Row-by-row _col_remaps; flags["remapped"] is set once a row is changed
+        offset_to_idx = {str(off): i for i, off in enumerate(header[2])}
+        global_remap = file_remaps.get("*")
+        for row in data:
+            if row:
+                effective_remap = self._effective_remap(file_remaps, global_remap, row[0])
+                if effective_remap:
+                    updates = self._remap_updates(effective_remap, offset_to_idx, row.__getitem__)
+                    if updates is not None:
+                        for target_idx, value in updates:
+                            row[target_idx] = value
+                        flags["remapped"] = True
+            yield row
+
+    @staticmethod
+    def _stream_quest_rows(source, header, say, dirty, edited_rows):
+        # Row source _reread_quest_sheet would hand to Phase 4, None if it keeps the sheet
+        if not (header and header[0] and header[0][0].startswith('\ufeff')) or not say:
+            return None
+        if not dirty:
+            return SheetStream(source.path, encoding='utf-8-sig').rows
+        if not row_text(header[0]).startswith('\ufeff'):
+            return None
+        return lambda: reparse_rows(edited_rows(), strip_bom=True)
+
+    def _stream_anonymize(self, rows, rel_path, width=None):
+        """
+        Row-streaming _anonymize_sheet over the row source rows (a callable).
+
+        Returns the replaced texts by data row and the data row count, or None
+        when nothing was anonymized. width overrides the sheet width checked
+        by the size guard (the rows may be an edited view of a wider sheet).
+        """
+        # Pass 1: instructions and the hints they quote
+        header, data = split_header(rows())
+        say = any("말하기" in cell for row in header for cell in row)
+        count = max_width = 0
+        instructions = []
+        hints = set()
+        for k, row in enumerate(data):
+            count += 1
+            if len(row) > max_width: max_width = len(row)
+            if not say and "말하기" in "\0".join(row):
+                say = True
+            if len(row) < 3: continue
+            instruction = self._say_instruction(row[2])
+            if instruction is not None:
+                instructions.append((k, row[0], instruction))
+                hints.update(self._clean_for_match(h) for h in instruction[2])
+
+        if len(header) + count < 5 or (max_width if width is None else width) < 3: return None
+        if not say or not instructions: return None
+
+        # Pass 2: standalone rows matching a hint
+        candidates = {} # clean_text -> list of (data row, key)
+        header, data = split_header(rows())
+        for k, row in enumerate(data):
+            if len(row) < 3: continue
+            clean_t = self._chat_candidate(row[2])
+            if clean_t in hints:
+                candidates.setdefault(clean_t, []).append((k, row[0]))
+
+        replacements = {}
+        file_anonymized_ids = set()
+        for k, key, instruction in instructions:
+            scrubbed = self._scrub_instruction(instruction, candidates)
+            if scrubbed is None: continue
+            replacements[k], matched = scrubbed
+            file_anonymized_ids.add(str(key))
+            for cleaned_hint in matched:
+                for idx, target_key in candidates[cleaned_hint]:
+                    replacements[idx] = "r"
+                    file_anonymized_ids.add(str(target_key))
+
+        if not replacements: return None
+        self.anonymized_ids[rel_path] = file_anonymized_ids
+        self.anonymized_ids[rel_path.replace(".ko.csv", ".csv")] = file_anonymized_ids
+        return replacements, count
+
+    @staticmethod
+    def _with_replacements(rows, replacements):
+        header, data = split_header(rows())
+        yield from header
+        for k, row in enumerate(data):
+            if k in replacements:
+                row[2] = replacements[k]
+            yield row
+
+    def _stream_columns(self, rows, rules):
+        header, data = split_header(rows)
+        columns = KoreanColumns(*self._header_columns(header, rules))
+        for row in data:
+            columns.add(row)
+        return columns
+
+    def _stream_keep_rows(self, data, keep_ids, content_indices):
+        # Row-by-row _remove_empty_sheet_rows filter
+        is_kr = self.has_korean
+        for row in data:
+            if not row: continue
+            if (row[0] in keep_ids
+                    or any(row[i] for i in content_indices if i < len(row))
+                    or (has_candidates(row) and any(is_kr(cell) for cell in row[1:]))):
+                yield row
+
+    def _stream_rsv(self, data, rel_path, state, first_line):
+        # Row-by-row _process_sheet_rsv, also noting what the Phase 10 check needs;
+        # first_line is the line number of the first data row in the written file
+        resolved, cells = {}, []
+        unresolved = 0
+        for n, row in enumerate(data, first_line):
+            joined = "\0".join(row)
+            if "_rsv_" in joined:
+                for c, cell in enumerate(row):
+                    if cell.startswith("_rsv_"):
+                        val, unres = self._lookup_rsv(cell, resolved)
+                        unresolved += unres
+                        cells.append((n, c, cell))
+                        row[c] = val
+                        if val != cell: state["rsv"] = True
+                joined = "\0".join(row)
+                if not state["rsv_left"] and any(cell.startswith("_rsv_") for cell in row):
+                    state["rsv_left"] = True
+            if not state["korean"] and not joined.isascii() and any(self.has_korean(cell) for cell in row):
+                state["korean"] = True
+            yield row
+        self._record_rsv(rel_path, cells, unresolved)
+
     def apply_manual_filters(self, target_dir, config):
         # Apply manual deletions and remappings from config
-        if not config: return
-
-        
-        del_files = config.get("delete_files", [])
-        del_rows_conf = config.get("delete_rows", {})
-        remap_keys_conf = config.get("remap_keys", {})
+        plan = RulePlan.of(config)
+        if not plan: return
 
         for root, _, files in os.walk(target_dir):
             for f in files:
                 path = os.path.join(root, f)
-                rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
-                base_rel_path = rel_path.replace(".ko.csv", ".csv")
+                rules = plan.resolve(os.path.relpath(path, target_dir).replace('\\', '/'))
 
-                # File deletion
-                is_deleted = False
-                if rel_path in del_files or base_rel_path in del_files:
-                    is_deleted = True
-                else:
-                    # Support folder-level deletion (e.g., "transport/")
-                    for d in del_files:
-                        if d.endswith('/') and (rel_path.startswith(d) or base_rel_path.startswith(d)):
-                            is_deleted = True
-                            break
-                
-                if is_deleted:
-                    path = os.path.join(root, f)
+                if rules.deleted:
                     self.make_writable(path)
                     os.remove(path)
                     continue
 
-                # Row operations
-                rows_to_del = del_rows_conf.get(rel_path) or del_rows_conf.get(base_rel_path)
-                keys_to_remap = remap_keys_conf.get(rel_path) or remap_keys_conf.get(base_rel_path)
-                
-                # Try folder-level row config if needed (though rarer)
-                if not rows_to_del or not keys_to_remap:
-                    for k in sorted(del_rows_conf.keys(), key=len, reverse=True):
-                        if k.endswith('/') and (rel_path.startswith(k) or base_rel_path.startswith(k)):
-                            rows_to_del = del_rows_conf[k]
-                            break
-                    for k in sorted(remap_keys_conf.keys(), key=len, reverse=True):
-                        if k.endswith('/') and (rel_path.startswith(k) or base_rel_path.startswith(k)):
-                            keys_to_remap = remap_keys_conf.get(k)
-                            break
-                
-                if rows_to_del or keys_to_remap:
-                    self._apply_row_operations(os.path.join(root, f), rows_to_del, keys_to_remap)
+                if rules.delete_rows or rules.remap_keys:
+                    self._apply_row_operations(path, rules)
 
     def apply_column_remapping(self, target_dir, config):
         # Apply row-specific column value swaps or literal injections
-        if not config: return
-
-        
-        remap_cols_conf = config.get("remap_columns", {})
-        if not remap_cols_conf: return
+        plan = RulePlan.of(config)
+        if not plan.remap_columns: return
 
         for root, _, files in os.walk(target_dir):
             for f in files:
                 if not f.endswith(".ko.csv"): continue
-                
-                path = os.path.join(root, f)
-                rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
-                base_rel_path = rel_path.replace(".ko.csv", ".csv")
 
-                file_remaps = remap_cols_conf.get(rel_path) or remap_cols_conf.get(base_rel_path)
-                
-                if file_remaps and isinstance(file_remaps, dict):
-                    # Check if it has row-specific mappings (dict vs string handle)
-                    has_row_remaps = any(isinstance(v, dict) for v in file_remaps.values())
-                    if has_row_remaps:
-                        self._apply_col_remaps(os.path.join(root, f), file_remaps)
+                path = os.path.join(root, f)
+                file_remaps = plan.resolve(os.path.relpath(path, target_dir).replace('\\', '/')).remap_columns
+                if file_remaps:
+                    self._apply_col_remaps(path, file_remaps)
 
     def _apply_col_remaps(self, path, file_remaps):
-        temp = path + ".tmp"
-        rows = []
-        with open(path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            rows = list(reader)
-        
-        if len(rows) < 4: return
-        
-        offsets = rows[2]
+        if self.streaming:
+            return self._stream_apply_col_remaps(path, file_remaps)
+        sheet = Sheet.read(path)
+        if self._col_remaps(sheet, file_remaps):
+            self.write_sheet(path, sheet)
+            logger.info(f"Applied column remapping to: {path}")
+
+    def _stream_apply_col_remaps(self, path, file_remaps):
+        header, data = split_header(SheetStream(path).rows())
+        if len(header) < HEADER_LINES: return
+
+        flags = {}
+        temp, _ = self._stream_write(path, chain(header, self._stream_col_remaps(data, header, file_remaps, flags)))
+        if flags.get("remapped"):
+            self.safe_replace(temp, path)
+            logger.info(f"Applied column remapping to: {path}")
+        else:
+            os.remove(temp)
+
+    def _col_remaps(self, sheet, file_remaps):
+        if len(sheet) < 4 or not sheet.columns: return False
+
+        offsets = sheet.header[2]
         # Map offset string to column index
         offset_to_idx = {str(off): i for i, off in enumerate(offsets)}
-        
+
         modified = False
         # Handle global remapping if "*" is present
         global_remap = file_remaps.get("*")
 
-        for r_idx in range(4, len(rows)):
-            row = rows[r_idx]
-            if not row: continue
-            rid = row[0]
-            
-            row_remap = file_remaps.get(str(rid))
-            # Merge with global remap if exists (specific row remap takes priority)
-            effective_remap = dict(global_remap) if global_remap and isinstance(global_remap, dict) else {}
-            if row_remap and isinstance(row_remap, dict):
-                effective_remap.update(row_remap)
-            
+        keys = sheet.columns[0]
+        for p in sheet.order:
+            if not sheet.widths[p]: continue
+            effective_remap = self._effective_remap(file_remaps, global_remap, keys[p])
             if not effective_remap:
                 continue
-            
-            new_row = list(row)
-            for gl_off, mapped_val in effective_remap.items():
-                if gl_off not in offset_to_idx: continue
-                target_idx = offset_to_idx[gl_off]
-                
-                if isinstance(mapped_val, str):
-                    # Literal injection or placeholder substitution
-                    if "{" in mapped_val and "}" in mapped_val:
-                        # Substitute {offset} with actual column value
-                        updated_val = mapped_val
-                        placeholders = re.findall(r'\{(\d+)\}', mapped_val)
-                        for ph_off in placeholders:
-                            if ph_off in offset_to_idx:
-                                val_idx = offset_to_idx[ph_off]
-                                updated_val = updated_val.replace(f"{{{ph_off}}}", row[val_idx])
-                        new_row[target_idx] = updated_val
-                    else:
-                        new_row[target_idx] = mapped_val
-                    modified = True
-                elif isinstance(mapped_val, int):
-                    # Column data swap
-                    src_off = str(mapped_val)
-                    if src_off in offset_to_idx:
-                        src_idx = offset_to_idx[src_off]
-                        new_row[target_idx] = row[src_idx]
-                        modified = True
-            
-            rows[r_idx] = new_row
 
-        if modified:
-            with open(temp, 'w', encoding='utf-8', newline='') as f:
-                csv.writer(f).writerows(rows)
-            self.safe_replace(temp, path)
-            logger.info(f"Applied column remapping to: {path}")
+            updates = self._remap_updates(effective_remap, offset_to_idx, lambda c: sheet.cell(p, c))
+            if updates is None: continue
+            for target_idx, value in updates:
+                sheet.set_cell(p, target_idx, value)
+            modified = True
+
+        return modified
+
+    @staticmethod
+    def _effective_remap(file_remaps, global_remap, rid):
+        row_remap = file_remaps.get(str(rid))
+        # Merge with global remap if exists (specific row remap takes priority)
+        effective_remap = dict(global_remap) if global_remap and isinstance(global_remap, dict) else {}
+        if row_remap and isinstance(row_remap, dict):
+            effective_remap.update(row_remap)
+        return effective_remap
+
+    @staticmethod
+    def _remap_updates(effective_remap, offset_to_idx, cell):
+        # Returns the (column, value) writes of one row, or None if no mapping applies.
+        # Values are read from the row as it was before this remap
+        updates = []
+        modified = False
+        for gl_off, mapped_val in effective_remap.items():
+            if gl_off not in offset_to_idx: continue
+            target_idx = offset_to_idx[gl_off]
+
+            if isinstance(mapped_val, str):
+                # Literal injection or placeholder substitution
+                if "{" in mapped_val and "}" in mapped_val:
+                    # Substitute {offset} with actual column value
+                    updated_val = mapped_val
+                    placeholders = re.findall(r'\{(\d+)\}', mapped_val)
+                    for ph_off in placeholders:
+                        if ph_off in offset_to_idx:
+                            val_idx = offset_to_idx[ph_off]
+                            updated_val = updated_val.replace(f"{{{ph_off}}}", cell(val_idx))
+                    updates.append((target_idx, updated_val))
+                else:
+                    updates.append((target_idx, mapped_val))
+                modified = True
+            elif isinstance(mapped_val, int):
+                # Column data swap
+                src_off = str(mapped_val)
+                if src_off in offset_to_idx:
+                    src_idx = offset_to_idx[src_off]
+                    updates.append((target_idx, cell(src_idx)))
+                    modified = True
+        return updates if modified else None
 
     def anonymize_chat_phrases(self, target_dir):
         # Automatically find and anonymize chat quest phrases to "/"
         quest_dir = os.path.join(target_dir, "quest")
         if not os.path.exists(quest_dir): return
 
-        quote_regex = re.compile(r'["\']([^"\']+)["\']')
-        hex_regex = re.compile(r'<hex:[A-F0-9]+>')
-
         for root, _, files in os.walk(quest_dir):
             for f in files:
                 if not f.endswith(".ko.csv"): continue
                 path = os.path.join(root, f)
                 rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
-                
+                if not CommonUtils.file_contains(path, CHAT_MARKERS): continue
+                if self.streaming:
+                    self._stream_anonymize_file(path, rel_path, target_dir)
+                    continue
+
                 # Robust content reading (UTF8/UTF16)
                 content = None
                 try:
@@ -218,315 +876,357 @@ class CSVProcessor:
                         with open(path, 'r', encoding='utf-16') as file:
                             content = file.read()
                     except: continue
-                
+
                 if not content or "말하기" not in content: continue
 
-                import io
-                f_io = io.StringIO(content)
-                reader = csv.reader(f_io)
                 try:
-                    rows = list(reader)
+                    sheet = Sheet.from_text(content)
                 except: continue
-                
-                if len(rows) < 5: continue
-                
-                def clean_for_match(s):
-                    # Remove hex tags, quotes, and common punctuation at ends
-                    s = hex_regex.sub('', s).strip()
-                    s = s.strip('"\'').strip()
-                    # Strip common trailing punctuation often found in instructions but not target rows
-                    s = s.rstrip('.?!,').strip()
-                    return s
-
-                file_anonymized_ids = set()
-                modified = False
-                
-                # PHASE 1: Collect ALL standalone phrases in the file (potential targets)
-                # A phrase is a candidate if it's longer than 1 char and not "말하기"
-                candidates = {} # clean_text -> list of row indices
-                for j, crow in enumerate(rows):
-                    if j < 4 or len(crow) < 3: continue
-                    ctext = crow[2]
-                    if not ctext: continue
-                    clean_t = clean_for_match(ctext)
-                    if len(clean_t) > 1 and clean_t != "말하기":
-                        if clean_t not in candidates:
-                            candidates[clean_t] = []
-                        candidates[clean_t].append(j)
-
-                # PHASE 2: Process "Say" instructions using hints verified by candidates
-                if candidates:
-                    # Regex for finding quoted strings
-                    quote_regex = re.compile(r'["\'](.*?)["\']')
-                    
-                    for i, row in enumerate(rows):
-                        if i < 4 or len(row) < 3: continue
-                        text = row[2]
-                        if "대화창" in text and "'말하기'" in text:
-                            # 1. Find the earliest anchor to define the suffix
-                            split_idx = -1
-                            for anchor in ["키보드로", "가상 키보드로", "방식으로"]:
-                                idx = text.find(anchor)
-                                if idx != -1:
-                                    split_idx = idx + len(anchor)
-                                    break 
-                            
-                            prefix = text[:split_idx] if split_idx != -1 else ""
-                            suffix = text[split_idx:] if split_idx != -1 else text
-                            
-                            file_already_modified = False
-                            collected_originals = []
-                            
-                            # 2. Extract potential hints (quoted strings) from the suffix
-                            found_hints = quote_regex.findall(suffix)
-                            if not found_hints: continue
-                            
-                            for hint in set(found_hints):
-                                if hint == "말하기": continue
-                                cleaned_hint = clean_for_match(hint)
-                                
-                                if cleaned_hint in candidates:
-                                    # SUCCESS: The hint in the instruction matches a standalone row
-                                    # Scrub instruction suffix (preserve quotes style) - Now using 'r'
-                                    new_suffix = suffix.replace(f'"{hint}"', '"r"').replace(f"'{hint}'", '"r"')
-                                    if new_suffix == suffix: # Fallback if no quotes found around it
-                                         new_suffix = suffix.replace(hint, "r")
-                                    
-                                    if new_suffix != suffix:
-                                        suffix = new_suffix
-                                        collected_originals.append(hint)
-                                        # Scrub all matching standalone target rows to 'r'
-                                        for idx in candidates[cleaned_hint]:
-                                            rows[idx][2] = "r"
-                                            file_anonymized_ids.add(str(rows[idx][0]))
-                                        file_already_modified = True
-                                        modified = True
-
-                            if file_already_modified:
-                                final_text = prefix + suffix
-                                if collected_originals:
-                                    # Append original text reference in (phrase) format
-                                    ref_text = "".join([f"({h})" for h in collected_originals])
-                                    final_text += ref_text
-                                rows[i][2] = final_text.strip()
-                                file_anonymized_ids.add(str(row[0]))
-
-                if modified:
-                    if file_anonymized_ids:
-                        self.anonymized_ids[rel_path] = file_anonymized_ids
-                        self.anonymized_ids[rel_path.replace(".ko.csv", ".csv")] = file_anonymized_ids
-                    temp = path + ".tmp"
-                    with open(temp, 'w', encoding='utf-8', newline='') as file:
-                        csv.writer(file).writerows(rows)
-                    self.safe_replace(temp, path)
+
+                if self._anonymize_sheet(sheet, rel_path):
+                    self.write_sheet(path, sheet)
                     logger.info(f"Anonymized chat phrases in: {os.path.relpath(path, target_dir)}")
 
-    def _apply_row_operations(self, path, rows_to_del, keys_to_remap):
-        # Convert config to strings for comparison
-        delete_set = set(str(k) for k in (rows_to_del or []))
-        remap_dict = {str(k): str(v) for k, v in (keys_to_remap or {}).items()} # Target: Source
-        
-        # Build reverse map: Source -> [Targets]
-        source_to_targets = {}
-        for target, source in remap_dict.items():
-            if source not in source_to_targets:
-                source_to_targets[source] = []
-            source_to_targets[source].append(target)
+    def _stream_anonymize_file(self, path, rel_path, target_dir):
+        # Robust content reading (UTF8/UTF16), as in anonymize_chat_phrases
+        source = SheetStream(path, encoding='utf-8-sig')
+        try:
+            anonymized = self._stream_anonymize(source.rows, rel_path)
+        except UnicodeDecodeError:
+            source = SheetStream(path, encoding='utf-16')
+            try:
+                anonymized = self._stream_anonymize(source.rows, rel_path)
+            except (UnicodeError, csv.Error):
+                return
+        except csv.Error:
+            return
+        if not anonymized: return
+
+        temp, _ = self._stream_write(path, self._with_replacements(source.rows, anonymized[0]))
+        self.safe_replace(temp, path)
+        logger.info(f"Anonymized chat phrases in: {os.path.relpath(path, target_dir)}")
 
-        temp = path + ".tmp"
+    def _anonymize_sheet(self, sheet, rel_path):
+        if len(sheet) < 5 or sheet.width < 3: return False
+        if not self._sheet_contains(sheet, "말하기"): return False
+
+        file_anonymized_ids = set()
         modified = False
-        rows = []
-        with open(path, 'r', encoding='utf-8') as f:
-            reader = csv.reader(f)
-            for i, row in enumerate(reader):
-                # Preserve 4-line header
-                if i < 4:
-                    rows.append(row)
-                    continue
-                
-                if not row: continue
-                current_key = row[0]
-
-                # 1. If this ID is a source for any targets, generate the new rows
-                if current_key in source_to_targets:
-                    for target_key in source_to_targets[current_key]:
-                        new_row = list(row)
-                        new_row[0] = target_key
-                        rows.append(new_row)
-                    modified = True
 
+        # PHASE 1: Collect ALL standalone phrases in the file (potential targets)
+        keys, texts, widths = sheet.columns[0], sheet.columns[2], sheet.widths
+        candidates = {} # clean_text -> list of row positions
+        for j in sheet.order:
+            if widths[j] < 3: continue
+            clean_t = self._chat_candidate(texts[j])
+            if clean_t:
+                if clean_t not in candidates:
+                    candidates[clean_t] = []
+                candidates[clean_t].append(j)
 
-                # 2. If this ID is explicitly a target of a remap, it will be handled when its source is processed
-                if current_key in remap_dict:
-                    modified = True
-                    continue
+        # PHASE 2: Process "Say" instructions using hints verified by candidates
+        if candidates:
+            for i in sheet.order:
+                if widths[i] < 3: continue
+                instruction = self._say_instruction(texts[i])
+                if instruction is None: continue
 
-                # 3. If key is in delete set, skip
-                if current_key in delete_set:
-                    modified = True
-                    continue
-                
-                rows.append(row)
+                scrubbed = self._scrub_instruction(instruction, candidates)
+                if scrubbed is None: continue
+                texts[i], matched = scrubbed
+                file_anonymized_ids.add(str(keys[i]))
+                # Scrub all matching standalone target rows to 'r'
+                for cleaned_hint in matched:
+                    for idx in candidates[cleaned_hint]:
+                        texts[idx] = "r"
+                        file_anonymized_ids.add(str(keys[idx]))
+                modified = True
+
+        if modified and file_anonymized_ids:
+            self.anonymized_ids[rel_path] = file_anonymized_ids
+            self.anonymized_ids[rel_path.replace(".ko.csv", ".csv")] = file_anonymized_ids
+        return modified
+
+    @staticmethod
+    def _clean_for_match(s):
+        # Remove hex tags, quotes, and common punctuation at ends
+        s = HEX_TAG_RE.sub('', s).strip()
+        s = s.strip('"\'').strip()
+        # Strip common trailing punctuation often found in instructions but not target rows
+        s = s.rstrip('.?!,').strip()
+        return s
+
+    def _chat_candidate(self, text):
+        # A phrase is a candidate if it's longer than 1 char and not "말하기"
+        if not text: return None
+        clean_t = self._clean_for_match(text)
+        if len(clean_t) > 1 and clean_t != "말하기":
+            return clean_t
+        return None
 
+    @staticmethod
+    def _say_instruction(text):
+        # Splits a "Say" instruction into (prefix, suffix, quoted hints), None for other text
+        if not ("대화창" in text and "'말하기'" in text):
+            return None
+
+        # 1. Find the earliest anchor to define the suffix
+        split_idx = -1
+        for anchor in ["키보드로", "가상 키보드로", "방식으로"]:
+            idx = text.find(anchor)
+            if idx != -1:
+                split_idx = idx + len(anchor)
+                break
+
+        prefix = text[:split_idx] if split_idx != -1 else ""
+        suffix = text[split_idx:] if split_idx != -1 else text
+
+        # 2. Extract potential hints (quoted strings) from the suffix
+        found_hints = QUOTE_RE.findall(suffix)
+        if not found_hints: return None
+        return prefix, suffix, found_hints
+
+    def _scrub_instruction(self, instruction, candidates):
+        # Returns the rewritten instruction and the matched cleaned hints, None if nothing matched
+        prefix, suffix, found_hints = instruction
+        collected_originals = []
+        matched = []
+
+        for hint in dict.fromkeys(found_hints):
+            if hint == "말하기": continue
+            cleaned_hint = self._clean_for_match(hint)
+
+            if cleaned_hint in candidates:
+                # SUCCESS: The hint in the instruction matches a standalone row
+                # Scrub instruction suffix (preserve quotes style) - Now using 'r'
+                new_suffix = suffix.replace(f'"{hint}"', '"r"').replace(f"'{hint}'", '"r"')
+                if new_suffix == suffix: # Fallback if no quotes found around it
+                     new_suffix = suffix.replace(hint, "r")
+
+                if new_suffix != suffix:
+                    suffix = new_suffix
+                    collected_originals.append(hint)
+                    matched.append(cleaned_hint)
+
+        if not collected_originals:
+            return None
+        # Append original text reference in (phrase) format
+        final_text = prefix + suffix + "".join([f"({h})" for h in collected_originals])
+        return final_text.strip(), matched
+
+    def _apply_row_operations(self, path, rules):
+        sheet = Sheet.read(path)
+        if self._row_operations(sheet, rules):
+            self.write_sheet(path, sheet)
+
+    def _row_operations(self, sheet, rules):
+        # Keys are compared as strings (normalized by RulePlan)
+        delete_set = rules.delete_rows
+        remap_dict = rules.remap_keys # Target: Source
+        source_to_targets = rules.key_sources # Source: [Targets]
+
+        modified = False
+        new_order = []
+        keys = sheet.columns[0] if sheet.columns else None
+        # The 4-line header is kept as is
+        for p in sheet.order:
+            if not sheet.widths[p]: continue
+            current_key = keys[p]
+
+            # 1. If this ID is a source for any targets, generate the new rows
+            if current_key in source_to_targets:
+                for target_key in source_to_targets[current_key]:
+                    new_order.append(sheet.copy_row(p, target_key))
+                modified = True
+
+
+            # 2. If this ID is explicitly a target of a remap, it will be handled when its source is processed
+            if current_key in remap_dict:
+                modified = True
+                continue
+
+            # 3. If key is in delete set, skip
+            if current_key in delete_set:
+                modified = True
+                continue
+
+            new_order.append(p)
+
+        # Unmodified files are left untouched on disk, blank rows included
         if modified:
-            with open(temp, 'w', encoding='utf-8', newline='') as f:
-                csv.writer(f).writerows(rows)
-            self.safe_replace(temp, path)
+            sheet.select_rows(new_order)
+        return modified
 
     def filter_columns(self, target_dir, config=None):
-        # Load explicit configs
-        delete_cols_conf = {}
-        keep_cols_conf = {}
-        if config:
-            delete_cols_conf = config.get("delete_columns", {})
-            keep_cols_conf = config.get("keep_columns", {})
-
         # Keep columns containing Korean text or specific keywords
+        plan = RulePlan.of(config)
         for root, _, files in os.walk(target_dir):
             for file in files:
                 if file.endswith(".csv"):
                     path = os.path.join(root, file)
-                    temp = path + ".tmp"
-                    
-                    rows = []
-                    with open(path, 'r', encoding='utf-8') as f:
-                        reader = csv.reader(f)
-                        rows = list(reader)
-                    
-                    if len(rows) < 4: continue
-                    
-                    remap_cols_conf = config.get("remap_columns", {})
-                    
+                    if self.streaming:
+                        self._stream_filter_columns(path, plan.resolve(os.path.relpath(path, target_dir).replace('\\', '/')))
+                        continue
+
+                    sheet = Sheet.read(path)
+
+                    if len(sheet) < 4: continue
+
                     # Determine rules for this file
-                    rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
-                    base_rel_path = rel_path.replace(".ko.csv", ".csv")
+                    rules = plan.resolve(os.path.relpath(path, target_dir).replace('\\', '/'))
 
-                    explicit_deletes = set(str(c) for c in (delete_cols_conf.get(rel_path) or delete_cols_conf.get(base_rel_path) or []))
-                    explicit_keeps = set(str(c) for c in (keep_cols_conf.get(rel_path) or keep_cols_conf.get(base_rel_path) or []))
-                    
-
-
-                    # Identify which columns to keep
-                    col_indices = {0} # Always keep Key column (usually # or key)
-                    
-                    # Scan headers
-                    field_names = rows[0] # First line (Field names)
-                    offsets = rows[2]    # Third line (Offsets)
-                    
-                    for i in range(len(field_names)):
-                        if i == 0: continue
-                        
-                        field_val = field_names[i]
-                        offset_val = offsets[i]
-                        
-                        # Rule 1: Always keep if explicitly in keep_columns
-                        if offset_val in explicit_keeps or field_val in explicit_keeps or "ALL" in explicit_keeps:
-                            col_indices.add(i)
-                            continue
-                        
-                        # Rule 2: Skip if offset or field name is explicitly deleted
-                        if offset_val in explicit_deletes or field_val in explicit_deletes:
-                            continue
-                            
-                        # Rule 3: Keep if header has Korean or specific keywords
-                        if self.has_korean(field_val) or 'Name' in field_val or 'Description' in field_val:
-                            col_indices.add(i)
-                    
-                    # Scan rows for Korean text (further identification)
-                    for row in rows:
-                        for i, cell in enumerate(row):
-                            if i in col_indices: continue
-                            
-                            # Skip if explicitly deleted
-                            field_val = field_names[i] if i < len(field_names) else ""
-                            offset_val = offsets[i] if i < len(offsets) else ""
-                            if offset_val in explicit_deletes or field_val in explicit_deletes:
-                                continue
-
-                            if self.has_korean(cell):
-                                col_indices.add(i)
-                    
-                    # Sort indices to maintain order
-                    sorted_indices = sorted(list(col_indices))
-                    
-                    # Write cleaned rows
-                    new_rows = [[row[i] for i in sorted_indices if i < len(row)] for row in rows]
-                    
-                    with open(temp, 'w', encoding='utf-8', newline='') as f:
-                        csv.writer(f).writerows(new_rows)
-                    self.safe_replace(temp, path)
+                    self._filter_sheet_columns(sheet, rules)
+                    self.write_sheet(path, sheet)
+
+    def _stream_filter_columns(self, path, rules):
+        # Scan pass for the kept columns, then a pass writing them out
+        source = SheetStream(path)
+        header, data = split_header(source.rows())
+        if len(header) < HEADER_LINES: return
+        columns = KoreanColumns(*self._header_columns(header, rules))
+        for row in data:
+            columns.add(row)
+
+        indices = columns.indices()
+        temp, _ = self._stream_write(path, (project(row, indices) for row in source.rows()))
+        self.safe_replace(temp, path)
+
+    def _filter_sheet_columns(self, sheet, rules):
+        col_indices, is_deleted = self._header_columns(sheet.header, rules)
+
+        # Scan data columns for Korean text (further identification)
+        for i in range(sheet.width):
+            if i in col_indices or is_deleted(i): continue
+            if self._column_has_korean(sheet.column(i)):
+                col_indices.add(i)
+
+        # Sort indices to maintain order
+        sheet.select_columns(sorted(col_indices))
+
+    def _header_columns(self, header, rules):
+        # Returns the columns kept by the header rules and a check for explicitly deleted ones
+        explicit_deletes = rules.delete_columns
+        explicit_keeps = rules.keep_columns
+
+        # Identify which columns to keep
+        col_indices = {0} # Always keep Key column (usually # or key)
+
+        # Scan headers
+        field_names = header[0] # First line (Field names)
+        offsets = header[2]    # Third line (Offsets)
+
+        for i in range(len(field_names)):
+            if i == 0: continue
+
+            field_val = field_names[i]
+            offset_val = offsets[i]
+
+            # Rule 1: Always keep if explicitly in keep_columns
+            if offset_val in explicit_keeps or field_val in explicit_keeps or "ALL" in explicit_keeps:
+                col_indices.add(i)
+                continue
+
+            # Rule 2: Skip if offset or field name is explicitly deleted
+            if offset_val in explicit_deletes or field_val in explicit_deletes:
+                continue
+
+            # Rule 3: Keep if header has Korean or specific keywords
+            if self.has_korean(field_val) or 'Name' in field_val or 'Description' in field_val:
+                col_indices.add(i)
+
+        def is_deleted(i):
+            field_val = field_names[i] if i < len(field_names) else ""
+            offset_val = offsets[i] if i < len(offsets) else ""
+            return offset_val in explicit_deletes or field_val in explicit_deletes
+
+        # Scan header rows for Korean text
+        for row in header:
+            for i, cell in enumerate(row):
+                if i in col_indices or is_deleted(i): continue
+                if self.has_korean(cell):
+                    col_indices.add(i)
+
+        return col_indices, is_deleted
 
     def remove_empty_rows(self, target_dir, config=None):
         # Remove rows without Korean text and delete empty files
-        keep_rows_conf = {}
-        keep_cols_conf = {}
-        if config:
-            keep_rows_conf = config.get("keep_rows", {})
-            keep_cols_conf = config.get("keep_columns", {})
-
+        plan = RulePlan.of(config)
         for root, _, files in os.walk(target_dir):
             for file in files:
                 if file.endswith(".csv"):
                     path = os.path.join(root, file)
-                    
+
                     # Determine rules
                     rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
                     base_rel_path = rel_path.replace(".ko.csv", ".csv")
 
-                    file_keep_rows = set()
-                    keep_all_rows = False
-                    
-                    conf_val = keep_rows_conf.get(rel_path) or keep_rows_conf.get(base_rel_path)
-                    if conf_val:
-                        if isinstance(conf_val, list) and "ALL" in conf_val:
-                            keep_all_rows = True
-                        else:
-                            file_keep_rows = set(str(rid) for rid in conf_val)
-
-                    explicit_keep_cols = set(str(c) for c in (keep_cols_conf.get(rel_path) or keep_cols_conf.get(base_rel_path) or []))
-
-                    temp = path + ".tmp"
-                    rows = []
-                    with open(path, 'r', encoding='utf-8') as f:
-                        reader = csv.reader(f)
-                        # Read 4 header lines
-                        header_all = []
-                        for _ in range(4):
-                            h = next(reader, None)
-                            if h: header_all.append(h)
-                        
-                        if not header_all: continue
-                        rows.extend(header_all)
-                        
-                        # Identify indices of columns that should trigger row preservation
-                        content_indices = set()
-                        field_names = header_all[0]
-                        offsets = header_all[2]
-                        
-                        for i in range(len(field_names)):
-                            f_val = field_names[i]
-                            o_val = offsets[i]
-                            if o_val in explicit_keep_cols or f_val in explicit_keep_cols or "ALL" in explicit_keep_cols:
-                                content_indices.add(i)
-
-                        # Filter data rows
-                        file_anon_ids = self.anonymized_ids.get(rel_path) or self.anonymized_ids.get(base_rel_path) or set()
-                        for row in reader:
-                            # Keep row if:
-                            # 1. keep_all_rows is True
-                            # 2. contains Korean text
-                            # 3. is in explicit keep_rows list or was anonymized
-                            # 4. has non-empty content in an explicitly preserved column (keep_columns)
-                            has_ko = any(self.has_korean(cell) for cell in row[1:])
-                            is_kept_id = row and (row[0] in file_keep_rows or row[0] in file_anon_ids)
-                            has_preserved_content = any(row[i] for i in content_indices if i < len(row))
-                            
-                            if keep_all_rows or has_ko or is_kept_id or has_preserved_content:
-                                rows.append(row)
-                    
-                    with open(temp, 'w', encoding='utf-8', newline='') as f:
-                        csv.writer(f).writerows(rows)
-                    self.safe_replace(temp, path)
+                    sheet = Sheet.read(path)
+                    if self._remove_empty_sheet_rows(sheet, rel_path, base_rel_path, plan.resolve(rel_path)):
+                        self.write_sheet(path, sheet)
+
+    def _remove_empty_sheet_rows(self, sheet, rel_path, base_rel_path, rules):
+        # Returns False when the file has no header and is left untouched
+        file_keep_rows = rules.keep_rows
+        keep_all_rows = rules.keep_all_rows
+
+        # Blank header lines are dropped
+        header_all = [h for h in sheet.header if h]
+
+        if not header_all: return False
+        sheet.header = header_all
+        content_indices = self._content_columns(header_all, rules)
+
+        # Filter data rows
+        # Keep row if:
+        # 1. keep_all_rows is True
+        # 2. contains Korean text
+        # 3. is in explicit keep_rows list or was anonymized
+        # 4. has non-empty content in an explicitly preserved column (keep_columns)
+        if keep_all_rows or not sheet.data_count:
+            return True
+
+        file_anon_ids = self.anonymized_ids.get(rel_path) or self.anonymized_ids.get(base_rel_path) or set()
+        order = sheet.order
+        keep = bytearray(len(order))
+        if sheet.width:
+            keep_ids = file_keep_rows | file_anon_ids
+            keys = sheet.column(0)
+            widths = sheet.widths
+            for k, p in enumerate(order):
+                if widths[p] and keys[k] in keep_ids:
+                    keep[k] = 1
+
+        # Cells past a row's width are padded with "", which never counts
+        for i in range(1, sheet.width):
+            self._mark_rows(keep, sheet.column(i), self.has_korean)
+        for i in sorted(content_indices):
+            if i < sheet.width:
+                self._mark_rows(keep, sheet.column(i), bool)
+
+        if keep.count(1) != len(order):
+            sheet.select_rows([p for k, p in enumerate(order) if keep[k]])
+        return True
+
+    @staticmethod
+    def _content_columns(header_all, rules):
+        # Identify indices of columns that should trigger row preservation
+        explicit_keep_cols = rules.keep_columns
+        content_indices = set()
+        field_names = header_all[0]
+        offsets = header_all[2]
+
+        for i in range(len(field_names)):
+            f_val = field_names[i]
+            o_val = offsets[i]
+            if o_val in explicit_keep_cols or f_val in explicit_keep_cols or "ALL" in explicit_keep_cols:
+                content_indices.add(i)
+        return content_indices
+
+    @staticmethod
+    def _mark_rows(keep, values, predicate):
+        for k, value in enumerate(values):
+            if not keep[k] and value and predicate(value):
+                keep[k] = 1
 
     def process_rsv(self, target_dir):
         # Replace RSV keys with English or user-defined values
@@ -534,33 +1234,151 @@ class CSVProcessor:
             for file in files:
                 if file.endswith(".csv"):
                     path = os.path.join(root, file)
-                    temp = path + ".tmp"
-                    modified = False
-                    rows = []
-                    with open(path, 'r', encoding='utf-8') as f:
-                        reader = csv.reader(f)
-                        rel_path = os.path.relpath(path, target_dir)
-                        for i, row in enumerate(reader):
-                            # Skip RSV processing for 4 header lines
-                            if i < 4:
-                                rows.append(row)
-                                continue
-                            
-                            new_row = []
-                            for cell in row:
-                                if cell.startswith("_rsv_"):
-                                    is_unres = self.rsv_manager.is_unresolved(cell)
-                                    self.rsv_manager.add_found_file(rel_path, is_unres)
-                                    val = self.rsv_manager.get_value(cell)
-                                    new_row.append(val)
-                                    if val != cell: modified = True
-                                else:
-                                    new_row.append(cell)
-                            rows.append(new_row)
-                    if modified:
-                        with open(temp, 'w', encoding='utf-8', newline='') as f:
-                            csv.writer(f).writerows(rows)
-                        self.safe_replace(temp, path)
+                    rel_path = os.path.relpath(path, target_dir)
+                    if self.profiler:
+                        started = self.profiler.start_file()
+                        bytes_in = os.path.getsize(path)
+                    if self.streaming:
+                        rows, bytes_out = self._stream_process_rsv(path, rel_path)
+                    else:
+                        sheet = Sheet.read(path)
+                        rows, bytes_out = sheet.data_count, 0
+                        if self._process_sheet_rsv(sheet, rel_path):
+                            data = self.write_sheet(path, sheet)
+                            self.korean_content.pop(rel_path.replace('\\', '/'), None)
+                            self._finish_file(path, rel_path, sheet.data_count, data)
+                            bytes_out = len(data)
+                    if self.profiler:
+                        self.profiler.record_file(started, rel_path, bytes_in, bytes_out, rows, rows)
+        self._snapshot_rsv()
+
+    def _stream_process_rsv(self, path, rel_path):
+        # Returns the data row count and the bytes written (0 if unchanged)
+        source = SheetStream(path)
+        header, data = split_header(source.rows())
+        rows = 0
+        has_rsv = False
+        for row in data:
+            rows += 1
+            if not has_rsv and any(cell.startswith("_rsv_") for cell in row):
+                has_rsv = True
+        if not has_rsv:
+            return rows, 0
+
+        state = {"rsv": False, "rsv_left": False, "korean": False}
+        header, data = split_header(source.rows())
+        temp, _ = self._stream_write(path, chain(header, self._stream_rsv(data, rel_path, state, len(header))))
+        if not state["rsv"]:
+            os.remove(temp)
+            return rows, 0
+        self.safe_replace(temp, path)
+        self.korean_content.pop(rel_path.replace('\\', '/'), None)
+        self._finish_file(path, rel_path, rows)
+        return rows, os.path.getsize(path)
+
+    def _process_sheet_rsv(self, sheet, rel_path):
+        # Skip RSV processing for 4 header lines
+        hits = []
+        for c in range(sheet.width):
+            values = sheet.column(c)
+            if not self._column_has_rsv(values): continue
+            for k, cell in enumerate(values):
+                if cell.startswith("_rsv_"):
+                    hits.append((k, c))
+
+        # New keys are recorded in row-major order, as a row-by-row scan would
+        hits.sort()
+        modified = False
+        order = sheet.order
+        first_line = len(sheet.header)
+        resolved, cells = {}, []
+        unresolved = 0
+        for k, c in hits:
+            p = order[k]
+            cell = sheet.columns[c][p]
+            val, unres = self._lookup_rsv(cell, resolved)
+            unresolved += unres
+            cells.append((first_line + k, c, cell))
+            sheet.columns[c][p] = val
+            if val != cell: modified = True
+        self._record_rsv(rel_path, cells, unresolved)
+        return modified
+
+    def _lookup_rsv(self, key, resolved):
+        # Value and unresolved flag of key, looked up once per file
+        if key not in resolved:
+            is_unres = self.rsv_manager.is_unresolved(key)
+            resolved[key] = (self.rsv_manager.get_value(key), is_unres)
+        return resolved[key]
+
+    def _record_rsv(self, rel_path, cells, unresolved):
+        # RSV bookkeeping of a file, done once with the totals rather than per cell
+        if not cells: return
+        self.rsv_manager.add_found_count(rel_path, unresolved)
+        self.rsv_cells[rel_path.replace('\\', '/')] = cells
+
+    def _snapshot_rsv(self):
+        # Values the indexed cells hold now, compared by patch_rsv after the ACT sync
+        keys = {key for cells in self.rsv_cells.values() for _, _, key in cells}
+        self.rsv_written = {key: self.rsv_manager.get_value(key) for key in keys}
+
+    def patch_rsv(self, target_dir):
+        """
+        Rewrites the RSV cells whose value changed since they were written,
+        e.g. new keys the ACT sync found an English name for. The cells are
+        located through the index built by transform() and process_rsv(), so
+        files without such cells are never opened.
+        """
+        changed = {}
+        for key, value in self.rsv_written.items():
+            current = self.rsv_manager.get_value(key)
+            if current != value:
+                changed[key] = current
+        if not changed:
+            return
+
+        patched = 0
+        for rel_path, cells in self.rsv_cells.items():
+            edits = {} # {line: [(column, old value, new value)]}
+            for line, c, key in cells:
+                if key in changed:
+                    edits.setdefault(line, []).append((c, self.rsv_written[key], changed[key]))
+            if not edits: continue
+            path = os.path.join(target_dir, *rel_path.split('/'))
+            if not os.path.exists(path): continue
+            self._patch_rsv_file(path, rel_path, edits)
+            patched += 1
+        self.rsv_written.update(changed)
+        logger.info(f"Patched {len(changed)} changed RSV values in {patched} files.")
+
+    def _patch_rsv_file(self, path, rel_path, edits):
+        if self.profiler:
+            started = self.profiler.start_file()
+            bytes_in = os.path.getsize(path)
+
+        def patched_rows():
+            # newline='' reads back exactly the cells the file was written with
+            for n, row in enumerate(SheetStream(path, newline='').rows()):
+                for c, _, value in edits.get(n, ()):
+                    row[c] = value
+                yield row
+
+        temp, count = self._stream_write(path, patched_rows())
+        self.safe_replace(temp, path)
+        stats = self.file_stats.get(archive_name(rel_path))
+        rows = stats["rows"] if stats else max(0, count - HEADER_LINES)
+        self._finish_file(path, rel_path, rows)
+        if self.profiler:
+            self.profiler.record_file(started, rel_path, bytes_in, os.path.getsize(path), rows, rows)
+
+        # The Phase 10 result only changes if a replaced or new value holds Korean text
+        changes = [v for cell_edits in edits.values() for _, old, new in cell_edits for v in (old, new)]
+        if any(self.has_korean(v) for v in changes):
+            self.korean_content.pop(rel_path, None)
+
+    @staticmethod
+    def _column_has_rsv(values):
+        return "_rsv_" in "\0".join(values) and any(v.startswith("_rsv_") for v in values)
 
     def remove_non_korean_files(self, target_dir):
         # Delete files containing no Korean content except RSV-referenced ones
@@ -569,27 +1387,41 @@ class CSVProcessor:
                 if file.endswith(".csv"):
                     path = os.path.join(root, file)
                     rel_path = os.path.relpath(path, target_dir).replace('\\', '/')
-                    
+
                     # Check if this file is an RSV file
                     rsv_key = f"rawexd/{rel_path}"
                     if rsv_key in self.rsv_manager.rsv_files:
                         continue
 
-                    has_ko = False
-                    with open(path, 'r', encoding='utf-8') as f:
-                        reader = csv.reader(f)
-                        # Skip 4 header lines before checking for Korean content
-                        for _ in range(4): next(reader, None)
-                        
-                        # Check remaining rows for Korean
-                        for row in reader:
-                            if any(self.has_korean(cell) for cell in row):
-                                has_ko = True
-                                break
-                    
+                    has_ko = self.korean_content.get(rel_path)
+                    if has_ko is None:
+                        with open(path, 'r', encoding='utf-8') as f:
+                            has_ko = self._has_korean_rows(csv.reader(f))
+
                     if not has_ko:
                         self.make_writable(path)
                         os.remove(path)
+                        self.file_stats.pop(archive_name(rel_path), None)
+                        self.file_issues.pop(archive_name(rel_path), None)
+                        if self.packager:
+                            self.packager.discard(rel_path)
+
+    def _sheet_has_korean(self, sheet):
+        return any(self._column_has_korean(sheet.column(c)) for c in range(sheet.width))
+
+    def _column_has_korean(self, values):
+        return CommonUtils.column_is_kr(values)
+
+    def _has_korean_rows(self, rows):
+        reader = iter(rows)
+        # Skip 4 header lines before checking for Korean content
+        for _ in range(4): next(reader, None)
+
+        # Check remaining rows for Korean
+        for row in reader:
+            if any(self.has_korean(cell) for cell in row):
+                return True
+        return False
 
     def rename_files(self, target_dir):
         # Rename .ko.csv to .csv and cleanup empty folders
@@ -599,7 +1431,7 @@ class CSVProcessor:
                     old = os.path.join(root, f)
                     new = os.path.join(root, f.replace(".ko.csv", ".csv"))
                     self.safe_replace(old, new)
-            
+
             # Remove empty folders
             if not os.listdir(root) and root != target_dir:
                 try:
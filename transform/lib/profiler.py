@@ -0,0 +1,131 @@
+import os
+import json
+import time
+import cProfile
+import datetime
+import tracemalloc
+from contextlib import contextmanager
+from .logging_setup import get_logger
+
+logger = get_logger()
+
+def cpu_time():
+    # Includes finished child processes (e.g. transform workers) where the OS reports them
+    t = os.times()
+    return t.user + t.system + t.children_user + t.children_system
+
+class Profiler:
+    """
+    Collects timing, I/O and row counts per pipeline phase and per file.
+
+    Phases are wrapped with phase(); file-level work reports through
+    start_file()/record_file(). Peak memory is only measured when
+    trace_memory is set, since tracemalloc slows allocation-heavy code
+    considerably. The phase matching cprofile_phase also runs under
+    cProfile and its stats are dumped to cprofile_dir.
+    """
+    def __init__(self, trace_memory=False, cprofile_phase=None, cprofile_dir=None):
+        self.trace_memory = trace_memory
+        self.cprofile_phase = cprofile_phase
+        self.cprofile_dir = cprofile_dir
+        self.started = datetime.datetime.now()
+        self.phases = []
+        self.files = []
+        self.current = None # id of the running phase
+        self.startup = None # seconds the entry point spent importing modules, if it measured them
+        self._peak = 0
+        if trace_memory and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    def _reset_peak(self):
+        if self.trace_memory:
+            tracemalloc.reset_peak()
+
+    def _read_peak(self):
+        if not self.trace_memory:
+            return None
+        peak = tracemalloc.get_traced_memory()[1]
+        self._peak = max(self._peak, peak)
+        return peak
+
+    @contextmanager
+    def phase(self, phase_id, name):
+        previous, self.current = self.current, phase_id
+        first_file = len(self.files)
+        self._peak = 0
+        self._reset_peak()
+        profile = cProfile.Profile() if phase_id == self.cprofile_phase else None
+
+        wall, cpu = time.perf_counter(), cpu_time()
+        if profile: profile.enable()
+        try:
+            yield
+        finally:
+            if profile: profile.disable()
+            files = self.files[first_file:]
+            self._read_peak()
+            self.phases.append({
+                "phase": phase_id,
+                "name": name,
+                "wall": round(time.perf_counter() - wall, 4),
+                "cpu": round(cpu_time() - cpu, 4),
+                "files": len(files),
+                "bytes_in": sum(f["bytes_in"] for f in files),
+                "bytes_out": sum(f["bytes_out"] for f in files),
+                "rows_in": sum(f["rows_in"] for f in files),
+                "rows_out": sum(f["rows_out"] for f in files),
+                "peak_memory": self._peak if self.trace_memory else None,
+            })
+            self.current = previous
+            if profile:
+                self._dump_cprofile(profile, phase_id)
+
+    def _dump_cprofile(self, profile, phase_id):
+        os.makedirs(self.cprofile_dir, exist_ok=True)
+        path = os.path.join(self.cprofile_dir, f"cprofile-phase-{phase_id}.prof")
+        profile.dump_stats(path)
+        logger.info(f"cProfile stats for phase {phase_id} saved to {path} (open with pstats or snakeviz)")
+
+    def start_file(self):
+        """Returns the start marker passed to record_file()."""
+        self._reset_peak()
+        return time.perf_counter(), time.process_time()
+
+    def record_file(self, started, rel_path, bytes_in, bytes_out, rows_in, rows_out):
+        wall, cpu = started
+        self.files.append({
+            "phase": self.current,
+            "file": rel_path.replace('\\', '/'),
+            "wall": round(time.perf_counter() - wall, 5),
+            "cpu": round(time.process_time() - cpu, 5),
+            "bytes_in": bytes_in,
+            "bytes_out": bytes_out,
+            "rows_in": rows_in,
+            "rows_out": rows_out,
+            "peak_memory": self._read_peak(),
+        })
+
+    def take_files(self):
+        files, self.files = self.files, []
+        return files
+
+    def add_files(self, files):
+        # Records from worker processes belong to the phase running here
+        for record in files:
+            record["phase"] = self.current
+        self.files.extend(files)
+
+    def save(self, path):
+        report = {
+            "started": self.started.isoformat(timespec="seconds"),
+            "wall": round(sum(p["wall"] for p in self.phases), 4),
+            "startup": round(self.startup, 4) if self.startup is not None else None,
+            "phases": self.phases,
+            "files": sorted(self.files, key=lambda f: f["wall"], reverse=True),
+        }
+        try:
+            with open(path, 'w', encoding='utf-8') as f:
+                json.dump(report, f, indent=4, ensure_ascii=False)
+            logger.info(f"Profile report saved to {path}")
+        except Exception as e:
+            logger.error(f"Failed to save profile report: {e}")
@@ -1,47 +1,107 @@
 import os
 import json
+from .act_overrides import ActOverrides
+from .rsv_store import RSVStore, RSVTable, read_rsv_json
 from .logging_setup import get_logger
 
 logger = get_logger()
 
 class RSVManager:
-    def __init__(self, json_path):
+    def __init__(self, json_path, rsv_data=None, act=None, db_path=None):
         self.json_path = json_path
+        self.act = act # ActOverrides used by sync_act_overrides (uncached when None)
+        self.store = None # RSVStore behind rsv_data when db_path is given; rsv.json is then imported/exported
         self.rsv_data = {}
         self.rsv_files = {} # dict: filename -> unresolved_count
         self.new_keys_found = False
-        self.load()
+        self.dirty = {} # keys added or changed since the last save, in order
+        self.json_stale = False # store has changes rsv.json does not have yet
+        if rsv_data is not None:
+            # Detached copy (e.g. in a worker process), nothing is read from disk
+            self.rsv_data = rsv_data
+        else:
+            if db_path:
+                self.store = RSVStore(db_path, self.transform_key)
+            self.load()
 
     def load(self):
+        if self.store is not None:
+            try:
+                # Manual edits of rsv.json win over the store
+                if self.store.needs_import(self.json_path):
+                    self.store.import_json(self.json_path)
+            except Exception as e:
+                logger.error(f"Error importing rsv.json: {e}")
+            # Keys are read from the store as they are looked up
+            self.rsv_data = RSVTable(self.store)
+            return
+
         if os.path.exists(self.json_path):
             try:
-                with open(self.json_path, 'r', encoding='utf-8') as f:
-                    content = f.read().strip()
-                    if content:
-                        raw = json.loads(content)
-                        # Handle migration for older RSV data formats
-                        for k, v in raw.items():
-                            if isinstance(v, list):
-                                self.rsv_data[k] = v
-                            else:
-                                self.rsv_data[k] = [v, ""]
+                # Handle migration for older RSV data formats
+                self.rsv_data = read_rsv_json(self.json_path)
             except Exception as e:
                 logger.error(f"Error loading rsv.json: {e}")
 
     def save(self):
+        if self.store is not None:
+            try:
+                self._store_dirty()
+                self.new_keys_found = False
+            except Exception as e:
+                logger.error(f"Failed to save RSV store: {e}")
+            return
+
         try:
             with open(self.json_path, 'w', encoding='utf-8') as f:
                 json.dump(self.rsv_data, f, indent=4, ensure_ascii=False)
             logger.info(f"Updated {self.json_path} with RSV data.")
+            self.dirty = {}
             self.new_keys_found = False
         except Exception as e:
             logger.error(f"Failed to save rsv.json: {e}")
 
+    def _store_dirty(self):
+        # Only the keys added or changed since the last save are written
+        if not self.dirty:
+            return
+        self.store.write([(key, *self.rsv_data[key]) for key in self.dirty])
+        logger.info(f"Stored {len(self.dirty)} RSV keys in {self.store.db_path}.")
+        self.dirty = {}
+        self.json_stale = True
+
+    def export_json(self, force=False):
+        """Writes the store to rsv.json for manual editing, if it has changes rsv.json lacks."""
+        if self.store is None:
+            return
+        try:
+            self._store_dirty()
+            if not (self.json_stale or force):
+                return
+            count = self.store.export_json(self.json_path)
+            self.json_stale = False
+            logger.info(f"Exported {count} RSV keys to {self.json_path}.")
+        except Exception as e:
+            logger.error(f"Failed to export rsv.json: {e}")
+
+    def checkpoint_state(self):
+        """File counts and the keys not saved yet, as JSON-ready values."""
+        return {
+            "rsv_files": self.rsv_files,
+            "unsaved": {key: self.rsv_data[key] for key in self.dirty},
+            "new_keys_found": self.new_keys_found,
+        }
+
+    def restore_checkpoint(self, state):
+        self.rsv_files = state["rsv_files"]
+        for key, value in state["unsaved"].items():
+            self.rsv_data[key] = value
+            self.dirty[key] = None
+        self.new_keys_found = state["new_keys_found"]
+
     def add_found_file(self, rel_path, is_unresolved=False):
         """Records a relative path where an RSV key was found and tracks unresolved count."""
-        clean_path = rel_path.replace('.ko.csv', '.csv').replace('\\', '/')
-        if not clean_path.startswith("rawexd/"):
-            clean_path = f"rawexd/{clean_path}"
+        clean_path = self.found_path(rel_path)
         
         if clean_path not in self.rsv_files:
             self.rsv_files[clean_path] = 0
@@ -49,6 +109,29 @@ class RSVManager:
         if is_unresolved:
             self.rsv_files[clean_path] += 1
 
+    def add_found_count(self, rel_path, unresolved):
+        """Bulk add_found_file: records rel_path once with its number of unresolved cells."""
+        clean_path = self.found_path(rel_path)
+        self.rsv_files[clean_path] = self.rsv_files.get(clean_path, 0) + unresolved
+
+    @staticmethod
+    def found_path(rel_path):
+        """Key of rel_path in rsv_files (e.g. "rawexd/quest/Foo.csv")."""
+        clean_path = rel_path.replace('.ko.csv', '.csv').replace('\\', '/')
+        if not clean_path.startswith("rawexd/"):
+            clean_path = f"rawexd/{clean_path}"
+        return clean_path
+
+    def merge_found(self, rsv_files, new_keys):
+        """Merges file counts and new keys collected by a detached copy."""
+        for clean_path, count in rsv_files.items():
+            self.rsv_files[clean_path] = self.rsv_files.get(clean_path, 0) + count
+        for key in new_keys:
+            if key not in self.rsv_data:
+                self.rsv_data[key] = ["", ""]
+                self.dirty[key] = None
+                self.new_keys_found = True
+
     def is_unresolved(self, key):
         """Checks if an RSV key has a valid Korean translation."""
         if key in self.rsv_data:
@@ -62,6 +145,7 @@ class RSVManager:
             return val_pair[0] if val_pair[0] else val_pair[1]
         else:
             self.rsv_data[key] = ["", ""]
+            self.dirty[key] = None
             self.new_keys_found = True
             return ""
 
@@ -76,49 +160,31 @@ class RSVManager:
 
     def sync_act_overrides(self):
         """Automatically fetch English names from ACT repository."""
-        filenames = self._fetch_file_list()
-        if not filenames:
+        if self.store is not None:
+            # The store keeps the ACT keys precomputed; unsaved keys are written first
+            self._store_dirty()
+            missing = self.store.missing_english()
+            # Rows read earlier miss the values another run on the same store synced since (batch mode)
+            listed = {key for key, _ in missing}
+            missing += [(key, self.transform_key(key)) for key, val_pair in self.rsv_data.rows.items()
+                        if not val_pair[1] and key not in listed]
+        else:
+            missing = [(key, self.transform_key(key)) for key, val_pair in self.rsv_data.items() if not val_pair[1]]
+        if not missing:
+            logger.info("All RSV keys have English values, skipping ACT sync.")
             return
-            
-        lookup_map = self._fetch_overrides_content(filenames)
+
+        lookup_map = (self.act or ActOverrides()).lookup()
         if not lookup_map:
             return
 
         updated_count = 0
-        for key, val_pair in self.rsv_data.items():
-            if not val_pair[1]:
-                t_key = self.transform_key(key)
-                if t_key in lookup_map:
-                    val_pair[1] = lookup_map[t_key]
-                    updated_count += 1
+        for key, t_key in missing:
+            if t_key in lookup_map:
+                self.rsv_data[key][1] = lookup_map[t_key]
+                self.dirty[key] = None
+                updated_count += 1
         
         if updated_count > 0:
             logger.info(f"Synced {updated_count} English overrides from ACT Plugin.")
             self.save()
-
-    def _fetch_file_list(self):
-        api_url = "https://api.github.com/repos/ravahn/FFXIV_ACT_Plugin/contents/Overrides"
-        try:
-            with urllib.request.urlopen(api_url) as response:
-                data = json.loads(response.read().decode('utf-8'))
-                return [f['name'] for f in data if f['name'].startswith('global_')]
-        except Exception as e:
-            logger.warning(f"Failed to fetch ACT file list: {e}")
-            return []
-
-    def _fetch_overrides_content(self, filenames):
-        base_url = "https://raw.githubusercontent.com/ravahn/FFXIV_ACT_Plugin/master/Overrides/"
-        lookup_map = {}
-        logger.info("Fetching ACT overrides content...")
-        for filename in filenames:
-            url = base_url + filename
-            try:
-                with urllib.request.urlopen(url) as response:
-                    content = response.read().decode('utf-8')
-                    for line in content.splitlines():
-                        if '|' in line:
-                            k, v = line.split('|', 1)
-                            lookup_map[k.strip()] = v.strip()
-            except:
-                pass
-        return lookup_map
@@ -0,0 +1,187 @@
+import os
+import json
+import sqlite3
+from .logging_setup import get_logger
+
+logger = get_logger()
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS rsv (
+    key TEXT PRIMARY KEY,
+    ko TEXT NOT NULL DEFAULT '',
+    en TEXT NOT NULL DEFAULT '',
+    act_key TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS rsv_missing_en ON rsv (en) WHERE en = '';
+CREATE TABLE IF NOT EXISTS meta (
+    name TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+"""
+
+def read_rsv_json(path):
+    """Reads an rsv.json file, migrating plain string values to [ko, en] pairs."""
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read().strip()
+    data = {}
+    if content:
+        for k, v in json.loads(content).items():
+            data[k] = v if isinstance(v, list) else [v, ""]
+    return data
+
+def json_state(path):
+    # Changes whenever the file is edited or replaced
+    st = os.stat(path)
+    return f"{st.st_mtime_ns}:{st.st_size}"
+
+def json_meta(path):
+    return "json:" + os.path.abspath(path)
+
+class RSVStore:
+    """
+    SQLite store for the RSV table.
+
+    Rows keep the order keys were first seen (rowid), so exports match the
+    rsv.json layout, and each row holds the ACT lookup key precomputed with
+    act_key. Keys are looked up one at a time and writes only touch the
+    given keys, so neither depends on the size of the table. rsv.json stays
+    the file for manual editing: it is imported when it changed since the
+    last import or export, and exported on request.
+    """
+    def __init__(self, db_path, act_key=None, readonly=False):
+        self.db_path = db_path
+        self.act_key = act_key
+        if readonly:
+            self.conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def _meta(self, name):
+        row = self.conn.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.conn.execute("INSERT INTO meta (name, value) VALUES (?, ?) "
+                          "ON CONFLICT (name) DO UPDATE SET value = excluded.value", (name, value))
+
+    def needs_import(self, json_path):
+        """True when json_path exists and was not written or read by this store in its current state."""
+        return os.path.exists(json_path) and self._meta(json_meta(json_path)) != json_state(json_path)
+
+    def import_json(self, json_path):
+        """
+        Writes the values of json_path into the table. Keys missing from the
+        file are kept, so a stale rsv.json never drops keys found since.
+        """
+        data = read_rsv_json(json_path)
+        with self.conn:
+            self._upsert((key, ko, en) for key, (ko, en) in data.items())
+            self._set_meta(json_meta(json_path), json_state(json_path))
+        logger.info(f"Imported {len(data)} RSV keys from {json_path}.")
+
+    def export_json(self, json_path):
+        """Writes the table to json_path in the rsv.json format."""
+        data = self.load()
+        temp = json_path + ".tmp"
+        with open(temp, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=4, ensure_ascii=False)
+        os.replace(temp, json_path)
+        with self.conn:
+            self._set_meta(json_meta(json_path), json_state(json_path))
+        return len(data)
+
+    def load(self):
+        """Returns the table as {key: [ko, en]} in insertion order."""
+        return {key: [ko, en] for key, ko, en in self.conn.execute("SELECT key, ko, en FROM rsv ORDER BY rowid")}
+
+    def get(self, key):
+        """[ko, en] of key, or None if the table does not have it."""
+        row = self.conn.execute("SELECT ko, en FROM rsv WHERE key = ?", (key,)).fetchone()
+        return list(row) if row else None
+
+    def count(self):
+        return self.conn.execute("SELECT COUNT(*) FROM rsv").fetchone()[0]
+
+    def write(self, rows):
+        """Inserts or updates (key, ko, en) rows; new keys are appended."""
+        with self.conn:
+            self._upsert(rows)
+
+    def _upsert(self, rows):
+        self.conn.executemany(
+            "INSERT INTO rsv (key, ko, en, act_key) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (key) DO UPDATE SET ko = excluded.ko, en = excluded.en",
+            ((key, ko, en, self.act_key(key)) for key, ko, en in rows))
+
+    def missing_english(self):
+        """(key, ACT lookup key) of the keys without an English value."""
+        return self.conn.execute("SELECT key, act_key FROM rsv WHERE en = '' ORDER BY rowid").fetchall()
+
+class RSVTable:
+    """
+    Dict-like view of an RSVStore used as RSVManager.rsv_data.
+
+    Rows are read from the store on first access and kept, like the values
+    of a dict, so callers may update them in place; writes stay in memory
+    until RSVManager.save() stores them. Copies in worker processes (forked
+    or pickled) keep the rows read so far and open the store read-only.
+    """
+    def __init__(self, store):
+        self.db_path = store.db_path
+        self.rows = {} # {key: [ko, en]} read or set so far
+        self.absent = set() # keys the store does not have
+        self._store = store
+        self._pid = os.getpid()
+
+    @property
+    def store(self):
+        # A connection must not be used across processes
+        if self._pid != os.getpid():
+            self._store = RSVStore(self.db_path, readonly=True)
+            self._pid = os.getpid()
+        return self._store
+
+    def __getstate__(self):
+        return {"db_path": self.db_path, "rows": self.rows, "absent": self.absent}
+
+    def __setstate__(self, state):
+        self.db_path = state["db_path"]
+        self.rows = state["rows"]
+        self.absent = state["absent"]
+        self._store = None
+        self._pid = None
+
+    def get(self, key, default=None):
+        row = self.rows.get(key)
+        if row is not None:
+            return row
+        if key in self.absent:
+            return default
+        row = self.store.get(key)
+        if row is None:
+            self.absent.add(key)
+            return default
+        self.rows[key] = row
+        return row
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        row = self.get(key)
+        if row is None:
+            raise KeyError(key)
+        return row
+
+    def __setitem__(self, key, value):
+        self.rows[key] = value
+        self.absent.discard(key)
+
+    def __delitem__(self, key):
+        # Only drops the in-memory row; a stored key is read again on next access
+        del self.rows[key]
@@ -0,0 +1,187 @@
+import sys
+import json
+import hashlib
+
+
+class FileRules:
+    """Filter rules resolved for a single file, normalized to string sets."""
+    __slots__ = ("deleted", "delete_rows", "remap_keys", "key_sources", "remap_columns",
+                 "delete_columns", "keep_columns", "keep_rows", "keep_all_rows")
+
+    def __init__(self):
+        self.deleted = False
+        self.delete_rows = frozenset()
+        self.remap_keys = {}       # target key -> source key
+        self.key_sources = {}      # source key -> [target keys]
+        self.remap_columns = None  # row-level column remaps, if any
+        self.delete_columns = frozenset()
+        self.keep_columns = frozenset()
+        self.keep_rows = frozenset()
+        self.keep_all_rows = False
+
+    def fingerprint(self):
+        """Stable hash of the rules, used as part of build cache keys."""
+        state = {
+            "deleted": self.deleted,
+            "delete_rows": sorted(self.delete_rows),
+            "remap_keys": self.remap_keys,
+            "remap_columns": self.remap_columns,
+            "delete_columns": sorted(self.delete_columns),
+            "keep_columns": sorted(self.keep_columns),
+            "keep_rows": sorted(self.keep_rows),
+            "keep_all_rows": self.keep_all_rows,
+        }
+        text = json.dumps(state, sort_keys=True, ensure_ascii=False)
+        return hashlib.blake2b(text.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class PrefixTrie:
+    """Maps folder prefixes such as "quest/sub/" to values by path segment."""
+    def __init__(self):
+        self.root = {}
+        self.size = 0
+
+    def insert(self, prefix, value):
+        node = self.root
+        for segment in prefix[:-1].split('/'):
+            node = node.setdefault(segment, {})
+        node[None] = value
+        self.size += 1
+
+    def longest(self, rel_path, default=None):
+        """Value of the deepest folder prefix of rel_path."""
+        found = default
+        node = self.root
+        for segment in rel_path.split('/')[:-1]:
+            node = node.get(segment)
+            if node is None: break
+            if None in node:
+                found = node[None]
+        return found
+
+
+class RulePlan:
+    """
+    Compiled form of the merged filter configuration.
+
+    File rules are looked up by path and folder rules through a segment trie,
+    so resolving a file costs O(path depth) regardless of how many rules the
+    config holds. A file entry wins over the ".ko.csv"-less name only when its
+    value is non-empty, matching the `conf.get(rel) or conf.get(base)` lookups.
+    """
+    def __init__(self, config=None):
+        config = config or {}
+        self.config = config
+        self.empty = not config
+        self._cache = {}
+        self._shared = {} # equal id sets are kept once, which also keeps pickled plans small
+
+        del_files = config.get("delete_files", [])
+        self.deleted_files = set(del_files)
+        self.deleted_folders = PrefixTrie()
+        for d in del_files:
+            if isinstance(d, str) and d.endswith('/'):
+                self.deleted_folders.insert(d, True)
+
+        self.delete_rows, self.delete_rows_folders = self._split(config.get("delete_rows", {}), self._id_set)
+        self.remap_keys, self.remap_keys_folders = self._split(
+            config.get("remap_keys", {}), self._normalize_remap_keys)
+        self.remap_columns, _ = self._split(config.get("remap_columns", {}), self._normalize_col_remaps)
+        self.delete_columns, _ = self._split(config.get("delete_columns", {}), self._id_set)
+        self.keep_columns, _ = self._split(config.get("keep_columns", {}), self._id_set)
+        self.keep_rows, _ = self._split(config.get("keep_rows", {}), self._normalize_keep_rows)
+
+    @classmethod
+    def of(cls, config):
+        return config if isinstance(config, cls) else cls(config)
+
+    def __bool__(self):
+        return not self.empty
+
+    def __getstate__(self):
+        # Pickled plans (see FilterLoader) only keep what resolve() needs
+        state = self.__dict__.copy()
+        state["config"] = None
+        state["_cache"] = {}
+        state["_shared"] = {}
+        return state
+
+    def _id_set(self, values):
+        # Row and column ids as a frozenset of interned strings
+        ids = frozenset(sys.intern(str(v)) for v in values)
+        return self._shared.setdefault(ids, ids)
+
+    @staticmethod
+    def _split(conf, normalize):
+        # Empty values are skipped so that lookups fall through like `or` does
+        files = {}
+        folders = PrefixTrie()
+        for key, value in conf.items():
+            if key.endswith('/'):
+                folders.insert(key, normalize(value) if value else None)
+            elif value:
+                files[key] = normalize(value)
+        return files, folders
+
+    @staticmethod
+    def _normalize_remap_keys(mapping):
+        remap = {sys.intern(str(k)): sys.intern(str(v)) for k, v in mapping.items()} # Target: Source
+        sources = {}
+        for target, source in remap.items():
+            sources.setdefault(source, []).append(target)
+        return remap, sources
+
+    @staticmethod
+    def _normalize_col_remaps(file_remaps):
+        # Only row-specific mappings (dict values) are applied per file
+        if isinstance(file_remaps, dict) and any(isinstance(v, dict) for v in file_remaps.values()):
+            return file_remaps
+        return None
+
+    def _normalize_keep_rows(self, conf_val):
+        if isinstance(conf_val, list) and "ALL" in conf_val:
+            return True, frozenset()
+        return False, self._id_set(conf_val)
+
+    @staticmethod
+    def _lookup(table, rel_path, base_rel_path, default=None):
+        if rel_path in table:
+            return table[rel_path]
+        return table.get(base_rel_path, default)
+
+    def resolve(self, rel_path):
+        """Returns the FileRules for a path relative to the data root."""
+        rules = self._cache.get(rel_path)
+        if rules is None:
+            rules = self._cache[rel_path] = self._resolve(rel_path)
+        return rules
+
+    def _resolve(self, rel_path):
+        base_rel_path = rel_path.replace(".ko.csv", ".csv")
+        rules = FileRules()
+
+        # File deletion, including folder-level entries (e.g., "transport/")
+        if (rel_path in self.deleted_files or base_rel_path in self.deleted_files
+                or self.deleted_folders.longest(rel_path)):
+            rules.deleted = True
+            return rules
+
+        # Row operations; folder-level entries apply when either file-level one is missing
+        delete_rows = self._lookup(self.delete_rows, rel_path, base_rel_path)
+        remap_keys = self._lookup(self.remap_keys, rel_path, base_rel_path)
+        if not delete_rows or not remap_keys:
+            delete_rows = self.delete_rows_folders.longest(rel_path, delete_rows)
+            remap_keys = self.remap_keys_folders.longest(rel_path, remap_keys)
+        if delete_rows:
+            rules.delete_rows = delete_rows
+        if remap_keys:
+            rules.remap_keys, rules.key_sources = remap_keys
+
+        rules.remap_columns = self._lookup(self.remap_columns, rel_path, base_rel_path)
+        rules.delete_columns = self._lookup(self.delete_columns, rel_path, base_rel_path, frozenset())
+        rules.keep_columns = self._lookup(self.keep_columns, rel_path, base_rel_path, frozenset())
+
+        keep_rows = self._lookup(self.keep_rows, rel_path, base_rel_path)
+        if keep_rows:
+            rules.keep_all_rows, rules.keep_rows = keep_rows
+        return rules
@@ -0,0 +1,140 @@
+import csv
+import io
+from array import array
+from bisect import bisect_left
+from itertools import islice
+
+HEADER_LINES = 4 # key indices, field names, offsets, types
+
+class Sheet:
+    """
+    In-memory CSV sheet in the SaintCoinach layout.
+
+    The 4 header lines are kept as rows; data rows are stored per column.
+    Data rows are addressed by physical position and `order` lists the live
+    rows in output order, so dropping rows or columns never copies cells.
+    Rows shorter than the widest row are padded with "" and remember their
+    own width, so ragged files are written back unchanged.
+    """
+    CHUNK_ROWS = 4096
+
+    def __init__(self):
+        self.header = []          # list of header rows (up to 4)
+        self.columns = []         # list of per-column lists of cells
+        self.widths = array('I')  # cells per physical data row
+        self.order = array('I')   # live physical rows in output order
+        self._contiguous = True   # order == range(len(widths))
+
+    @classmethod
+    def read(cls, path, encoding='utf-8'):
+        with open(path, 'r', encoding=encoding) as f:
+            return cls.from_rows(csv.reader(f))
+
+    @classmethod
+    def from_text(cls, text, newline='\n'):
+        return cls.from_rows(csv.reader(io.StringIO(text, newline=newline)))
+
+    @classmethod
+    def from_rows(cls, rows):
+        sheet = cls()
+        reader = iter(rows)
+        for row in reader:
+            sheet.header.append(row)
+            if len(sheet.header) == HEADER_LINES: break
+
+        # Repeated short values ("0", "False", ...) share one string object
+        interned = {}
+        while True:
+            chunk = list(islice(reader, cls.CHUNK_ROWS))
+            if not chunk: break
+            sheet._extend(chunk, interned)
+        sheet.order = array('I', range(len(sheet.widths)))
+        return sheet
+
+    def _extend(self, chunk, interned):
+        widths = list(map(len, chunk))
+        width = max(widths)
+        start = len(self.widths)
+        while len(self.columns) < width:
+            self.columns.append([""] * start)
+
+        if min(widths) == width:
+            for col, values in zip(self.columns, zip(*chunk)):
+                col.extend(map(interned.setdefault, values, values))
+        else:
+            for c, col in enumerate(self.columns[:width]):
+                col.extend(interned.setdefault(row[c], row[c]) if c < len(row) else "" for row in chunk)
+        for col in self.columns[width:]:
+            col.extend([""] * len(chunk))
+        self.widths.extend(widths)
+
+    def __len__(self):
+        # Line count, matching len(list(csv.reader(...))) of the written file
+        return len(self.header) + len(self.order)
+
+    @property
+    def width(self):
+        return len(self.columns)
+
+    @property
+    def data_count(self):
+        return len(self.order)
+
+    def cell(self, p, c):
+        if c >= self.widths[p]:
+            raise IndexError("list index out of range")
+        return self.columns[c][p]
+
+    def set_cell(self, p, c, value):
+        if c >= self.widths[p]:
+            raise IndexError("list assignment index out of range")
+        self.columns[c][p] = value
+
+    def row(self, p):
+        return [col[p] for col in self.columns[:self.widths[p]]]
+
+    def column(self, c):
+        """Cells of column c for the live rows, in output order."""
+        col = self.columns[c]
+        if self._contiguous:
+            return col
+        return [col[p] for p in self.order]
+
+    def copy_row(self, p, key):
+        """Appends a copy of row p with a new key cell; returns its position."""
+        for c, col in enumerate(self.columns):
+            col.append(key if c == 0 else col[p])
+        self.widths.append(self.widths[p])
+        return len(self.widths) - 1
+
+    def select_rows(self, positions):
+        self.order = array('I', positions)
+        self._contiguous = False
+
+    def select_columns(self, indices):
+        """Keeps the given sorted column indices, header included."""
+        self.header = [[row[i] for i in indices if i < len(row)] for row in self.header]
+        self.columns = [self.columns[i] for i in indices if i < len(self.columns)]
+        self.widths = array('I', [bisect_left(indices, w) for w in self.widths])
+
+    def iter_rows(self):
+        yield from self.header
+        cols = self.columns
+        if cols and self.widths.count(len(cols)) == len(self.widths):
+            if self._contiguous:
+                yield from zip(*cols)
+            else:
+                for p in self.order:
+                    yield [col[p] for col in cols]
+        else:
+            widths = self.widths
+            for p in self.order:
+                yield [col[p] for col in cols[:widths[p]]]
+
+    def write(self, f):
+        csv.writer(f).writerows(self.iter_rows())
+
+    def to_text(self):
+        buf = io.StringIO()
+        self.write(buf)
+        return buf.getvalue()
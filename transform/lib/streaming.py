@@ -0,0 +1,95 @@
+import io
+import csv
+from itertools import islice
+from .common import CommonUtils
+from .sheet import HEADER_LINES
+
+class SheetStream:
+    """
+    Sheet file read row by row instead of into a Sheet.
+
+    Every call to rows() starts a new pass over the file, so a phase that
+    needs to know something about the whole sheet (which columns hold Korean
+    text, whether a row edit happened) scans it first and streams it again
+    to write the result. Rows are parsed exactly like Sheet.read does, unless
+    newline is set (newline='' keeps line breaks inside cells as written).
+    """
+    def __init__(self, path, encoding='utf-8', newline=None):
+        self.path = path
+        self.encoding = encoding
+        self.newline = newline
+
+    def rows(self):
+        with open(self.path, 'r', encoding=self.encoding, newline=self.newline) as f:
+            yield from csv.reader(f)
+
+def split_header(rows):
+    """Returns the header lines and an iterator over the data rows."""
+    rows = iter(rows)
+    return list(islice(rows, HEADER_LINES)), rows
+
+def row_text(row):
+    """The row as Sheet.write writes it."""
+    buf = io.StringIO()
+    csv.writer(buf).writerow(row)
+    return buf.getvalue()
+
+def reparse_rows(rows, strip_bom=False):
+    """
+    Writes rows out and parses them back with universal newlines, like
+    Sheet.from_text(text, newline=None) does with a whole written sheet.
+    strip_bom drops the first character written, which must be a BOM.
+    """
+    for n, row in enumerate(rows):
+        text = row_text(row)
+        if strip_bom and n == 0:
+            text = text[1:]
+        yield from csv.reader(io.StringIO(text, newline=None))
+
+def project(row, indices):
+    # Same cells as Sheet.select_columns keeps for a row
+    n = len(row)
+    if n > indices[-1]:
+        return [row[i] for i in indices]
+    return [row[i] for i in indices if i < n]
+
+def has_candidates(row):
+    # False when no cell can pass CommonUtils.is_kr (ASCII only, no RSV key)
+    joined = "\0".join(row)
+    return not joined.isascii() or "_rsv_" in joined
+
+class KoreanColumns:
+    """
+    Collects the columns to keep in Phase 5 one data row at a time.
+
+    Starts from the columns kept by the header rules; a column is added as
+    soon as one of its cells passes CommonUtils.is_kr, unless it is
+    explicitly deleted.
+    """
+    def __init__(self, kept, is_deleted):
+        self.kept = set(kept)
+        self.is_deleted = is_deleted
+        self.deleted = {} # {column: bool}, filled lazily
+
+    def add(self, row):
+        if not has_candidates(row): return
+        kept, deleted = self.kept, self.deleted
+        for i, cell in enumerate(row):
+            if i in kept or not cell: continue
+            if i not in deleted:
+                deleted[i] = self.is_deleted(i)
+            if not deleted[i] and CommonUtils.is_kr(cell):
+                kept.add(i)
+
+    def indices(self):
+        return sorted(self.kept)
+
+def write_rows(path, rows):
+    """Writes rows like Sheet.write and returns how many were written."""
+    count = 0
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        writer = csv.writer(f)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    return count
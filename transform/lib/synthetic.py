@@ -0,0 +1,152 @@
+import os
+import csv
+import json
+import random
+
+# Folders the sheets are spread over, like the extracted client layout
+FOLDERS = ["", "quest", "quest/sub", "custom/001", "transport"]
+HANGUL = "가나다라마바사아자차카타파하한국어이름설명대화창안녕하세요"
+NAMES = ["Name", "Description", "Text", "Singular", "Plural", "Unknown"]
+VALUES = ["0", "1", "True", "False", "", "12.5", "abc", "x,y"]
+
+# Chat rows of a quest file; the phrases are anonymized by Phase 4
+QUEST_ROWS = [
+    ("TEXT_TALK_000", "대화창에 키보드로 '말하기' \"안녕하세요\" 라고 입력하세요."),
+    ("TEXT_TALK_001", "안녕하세요"),
+    ("TEXT_TALK_002", "대화창에 방식으로 '말하기' '반가워' '또 봐요' 입력."),
+    ("TEXT_TALK_003", "반가워!"),
+    ("TEXT_TALK_004", "또 봐요"),
+    ("TEXT_TALK_005", "말하기"),
+]
+
+class CorpusSpec:
+    """
+    Shape of a synthetic raw-exd-all tree.
+
+    files sheets are written per language (.ko.csv plus one sibling per
+    entry in languages and a plain .csv), each with rows data rows and
+    columns value columns. hangul_ratio and rsv_ratio are the shares of
+    cells holding Korean text and _rsv_ keys; quest_files extra quest
+    sheets contain '말하기' chat instructions.
+    """
+    def __init__(self, files=100, rows=200, columns=10, hangul_ratio=0.3, rsv_ratio=0.02,
+                 quest_files=5, languages=("ja", "en"), seed=0):
+        self.files = files
+        self.rows = rows
+        self.columns = columns
+        self.hangul_ratio = hangul_ratio
+        self.rsv_ratio = rsv_ratio
+        self.quest_files = quest_files
+        self.languages = tuple(languages)
+        self.seed = seed
+
+    def to_dict(self):
+        return {k: list(v) if isinstance(v, tuple) else v for k, v in vars(self).items()}
+
+class CorpusGenerator:
+    """
+    Writes a synthetic raw-exd-all tree in the SaintCoinach format (4 header
+    lines: keys, names, offsets, types; UTF-8 with BOM, CRLF) together with
+    matching filter.json, rsv.json and preset.json files. The output only
+    depends on the spec, so the same seed always gives the same corpus.
+    """
+    def __init__(self, spec):
+        self.spec = spec
+        self.random = random.Random(spec.seed)
+        self.rsv_keys = [f"_rsv_{1000 + i}_-1_{self.random.choice((1, 6))}_0_0_S0_E0" for i in range(50)]
+
+    def hangul(self, length):
+        return "".join(self.random.choice(HANGUL) for _ in range(length))
+
+    def cell(self):
+        r = self.random.random()
+        if r < self.spec.rsv_ratio:
+            return self.random.choice(self.rsv_keys)
+        if r < self.spec.rsv_ratio + self.spec.hangul_ratio:
+            return self.hangul(self.random.randint(2, 12)) + self.random.choice(["", ", 확인", ' "인용"', "\n줄"])
+        return self.random.choice(VALUES)
+
+    def header(self, width):
+        return [
+            ["key"] + [str(i) for i in range(width)],
+            ["#"] + [f"{self.random.choice(NAMES)}{i}" for i in range(width)],
+            ["offset"] + [str(i * 4) for i in range(width)],
+            ["int32"] + ["str"] * width,
+        ]
+
+    def sheet(self):
+        rows = [[str(k)] + [self.cell() for _ in range(self.spec.columns)] for k in range(self.spec.rows)]
+        return self.header(self.spec.columns) + rows
+
+    def quest_sheet(self):
+        header = [["key", "0", "1"], ["#", "Id", "Text"], ["offset", "0", "4"], ["int32", "str", "str"]]
+        return header + [[str(k), tag, text] for k, (tag, text) in enumerate(QUEST_ROWS)]
+
+    @staticmethod
+    def write(path, rows):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+            csv.writer(f).writerows(rows)
+
+    def generate(self, root):
+        """Writes the corpus under root and returns the relative .ko.csv paths."""
+        written = []
+        for i in range(self.spec.files):
+            folder = FOLDERS[i % len(FOLDERS)]
+            rel_base = f"{folder}/Sheet{i:05d}".lstrip('/')
+            rows = self.sheet()
+            self.write(os.path.join(root, rel_base + ".ko.csv"), rows)
+            for lang in self.spec.languages:
+                self.write(os.path.join(root, f"{rel_base}.{lang}.csv"), rows)
+            self.write(os.path.join(root, rel_base + ".csv"), rows)
+            written.append(rel_base + ".ko.csv")
+
+        for i in range(self.spec.quest_files):
+            rel_path = f"quest/chat/ChatQuest{i:03d}.ko.csv"
+            self.write(os.path.join(root, rel_path), self.quest_sheet())
+            written.append(rel_path)
+        return written
+
+    def filter_config(self, sheets):
+        """filter.json touching a slice of the generated sheets with every rule type."""
+        csv_names = [p.replace(".ko.csv", ".csv") for p in sheets if "chat/" not in p]
+        step = max(1, len(csv_names) // 10)
+        picked = csv_names[::step]
+        last_col = max(0, self.spec.columns - 1)
+        rows = list(range(0, self.spec.rows, max(1, self.spec.rows // 5)))
+        return {
+            "delete_files": picked[:2],
+            "delete_rows": {name: rows[:2] for name in picked[2:4]},
+            "keep_rows": {name: rows for name in picked[4:6]},
+            "delete_columns": {name: [last_col] for name in picked[6:8]},
+            "keep_columns": {name: [0] for name in picked[8:9]},
+            "remap_keys": {name: {"0": "900000"} for name in picked[9:10]},
+            "remap_columns": {name: {"*": {"0": "{4}"}} for name in picked[5:6]},
+        }
+
+    def rsv_data(self):
+        # Half of the keys already have a Korean value
+        return {key: [self.hangul(6) if i % 2 == 0 else "", f"Name {i}"]
+                for i, key in enumerate(self.rsv_keys)}
+
+    @staticmethod
+    def presets():
+        return {"Presets": [{"name": "rawexd", "description": "synthetic corpus",
+                             "entries": [{"path": "rawexd", "type": "Directory"}]}]}
+
+def generate_corpus(root, spec=None, config_dir=None):
+    """
+    Writes a synthetic raw-exd-all tree to root and, when config_dir is
+    given, filter.json, rsv.json and preset.json for it. Returns the
+    relative paths of the generated .ko.csv files.
+    """
+    generator = CorpusGenerator(spec or CorpusSpec())
+    sheets = generator.generate(root)
+    if config_dir:
+        os.makedirs(config_dir, exist_ok=True)
+        for name, data in (("filter.json", generator.filter_config(sheets)),
+                           ("rsv.json", generator.rsv_data()),
+                           ("preset.json", generator.presets())):
+            with open(os.path.join(config_dir, name), 'w', encoding='utf-8') as f:
+                json.dump(data, f, indent=4, ensure_ascii=False)
+    return sheets
@@ -1,34 +1,144 @@
 import os
-import boto3
+import json
+import time
+import shutil
+import hashlib
+from concurrent.futures import ThreadPoolExecutor
+from .config import Config
 from .logging_setup import get_logger
 
 logger = get_logger()
 
+MB = 1024 * 1024
+HASH_META_KEY = "sha256" # object metadata holding the content hash
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(MB), b''):
+            h.update(block)
+    return h.hexdigest()
+
+class FilesystemS3Client:
+    """
+    Minimal stand-in for the boto3 S3 client that stores objects on disk
+    (<root>/<bucket>/<key>, metadata in a .meta.json sidecar). Used when
+    S3_LOCAL_DIR is set, e.g. in CI without network access.
+    """
+    def __init__(self, root):
+        self.root = root
+
+    def _path(self, bucket, key):
+        return os.path.join(self.root, bucket, *key.split('/'))
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Callback=None, Config=None):
+        path = self._path(Bucket, Key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        shutil.copyfile(Filename, path)
+        with open(path + ".meta.json", 'w', encoding='utf-8') as f:
+            json.dump((ExtraArgs or {}).get("Metadata", {}), f)
+
+    def head_object(self, Bucket, Key):
+        path = self._path(Bucket, Key)
+        if not os.path.exists(path):
+            from botocore.exceptions import ClientError
+            raise ClientError({"Error": {"Code": "404", "Message": "Not Found"}}, "HeadObject")
+        metadata = {}
+        if os.path.exists(path + ".meta.json"):
+            with open(path + ".meta.json", 'r', encoding='utf-8') as f:
+                metadata = json.load(f)
+        return {"ContentLength": os.path.getsize(path), "Metadata": metadata}
+
 class S3Uploader:
-    def __init__(self, bucket_name=None):
+    """
+    Uploads release files to S3. boto3 is imported and the client created
+    on the first upload, so runs that never upload do not pay for either.
+    """
+    def __init__(self, bucket_name=None, client=None):
         self.bucket_name = bucket_name or os.getenv("S3_BUCKET_NAME", "ff14-kr-csv")
-        self.s3 = None
+        self.s3 = client
+        self.transfer_config = None
+        self.connected = False
+
+    def connect(self):
+        """Creates the S3 client and transfer settings once; returns the client or None."""
+        if self.connected:
+            return self.s3
+        self.connected = True
         try:
-            self.s3 = boto3.client('s3')
+            import boto3
+            from boto3.s3.transfer import TransferConfig
+            if self.s3 is None:
+                if Config.S3_LOCAL_DIR:
+                    self.s3 = FilesystemS3Client(Config.S3_LOCAL_DIR)
+                else:
+                    self.s3 = boto3.client('s3', endpoint_url=Config.S3_ENDPOINT_URL or None)
+
+            # Large files (rawexd.zip) are sent as parallel multipart chunks
+            self.transfer_config = TransferConfig(
+                multipart_threshold=Config.S3_MULTIPART_CHUNK_MB * MB,
+                multipart_chunksize=Config.S3_MULTIPART_CHUNK_MB * MB,
+                max_concurrency=Config.S3_MAX_CONCURRENCY,
+            )
         except Exception as e:
             logger.warning(f"Failed to initialize Boto3 client: {e}")
+            self.s3 = None
+        return self.s3
 
-    def upload_files(self, file_paths):
-        if not self.s3:
+    def upload_files(self, file_paths, then=()):
+        """
+        Uploads file_paths concurrently, then the files of then one at a
+        time in their order, only if all of file_paths succeeded. Payloads
+        (rawexd.zip, delta bundles) go in file_paths and the files that
+        announce them (version.txt, data.json) in then, so clients never see
+        a version whose payload is not in the bucket yet.
+        """
+        if not self.connect():
             logger.warning("S3 Client not available. Skipping upload.")
             return False
-            
+
         logger.info("S3 Uploading...")
-        success = True
-        for f in file_paths:
-            if os.path.exists(f):
-                try:
-                    logger.info(f"  Uploading {os.path.basename(f)}...")
-                    self.s3.upload_file(f, self.bucket_name, os.path.basename(f))
-                except Exception as e:
-                    logger.error(f"  Failed to upload {os.path.basename(f)}: {e}")
-                    success = False
-        return success
+        files = [f for f in file_paths if os.path.exists(f)]
+        if files:
+            with ThreadPoolExecutor(max_workers=len(files)) as executor:
+                if not all(list(executor.map(self._upload_file, files))):
+                    logger.error("Payload upload failed, version files were not uploaded.")
+                    return False
+        for path in then:
+            if os.path.exists(path) and not self._upload_file(path):
+                return False
+        return True
+
+    def _upload_file(self, path):
+        key = os.path.basename(path)
+        try:
+            digest = sha256_file(path)
+            if self._remote_hash(key) == digest:
+                logger.info(f"  Skipping {key}: unchanged in bucket.")
+                return True
+
+            size = os.path.getsize(path)
+            start = time.perf_counter()
+            self.s3.upload_file(path, self.bucket_name, key,
+                                ExtraArgs={"Metadata": {HASH_META_KEY: digest}},
+                                Config=self.transfer_config)
+            elapsed = max(time.perf_counter() - start, 1e-6)
+            logger.info(f"  Uploaded {key}: {size / MB:.1f} MB in {elapsed:.1f}s ({size / MB / elapsed:.1f} MB/s)")
+            return True
+        except Exception as e:
+            logger.error(f"  Failed to upload {key}: {e}")
+            return False
+
+    def _remote_hash(self, key):
+        # Content hash stored with the current object, None if there is none
+        from botocore.exceptions import ClientError
+        try:
+            response = self.s3.head_object(Bucket=self.bucket_name, Key=key)
+        except ClientError as e:
+            if e.response.get("Error", {}).get("Code") not in ("404", "NoSuchKey", "NotFound"):
+                logger.warning(f"  Could not check {key} in bucket: {e}")
+            return None
+        return response.get("Metadata", {}).get(HASH_META_KEY)
 
     def cleanup_local(self, file_paths):
         logger.info("Cleaning up temporary local files...")
@@ -1,12 +1,35 @@
 import os
 import json
+from concurrent.futures import ThreadPoolExecutor
+from .sheet import HEADER_LINES
 from .logging_setup import get_logger
 
 logger = get_logger()
 
+# Versioning and manifest files are not validated
+IGNORED_PATTERNS = ("rawexd.zip", "version.txt", "data.json", "delta", "checkpoint.json")
+
+# Marks of a path trie node: the path is ignored, an expected file or an expected directory
+IGNORED, FILE, DIRECTORY = 1, 2, 4
+
+def header_issue(header):
+    """Problem with the header lines of a sheet (truncated or ragged header), or None."""
+    if len(header) < HEADER_LINES:
+        return f"header has {len(header)} of {HEADER_LINES} lines"
+    widths = [len(row) for row in header]
+    if min(widths) != max(widths):
+        return f"header lines have {'/'.join(map(str, widths))} columns"
+    return None
+
+def rows_issue(width, bad, first, first_width):
+    """Problem with data rows whose column count differs from the header."""
+    return (f"{bad} data rows do not have the {width} header columns "
+            f"(first: data row {first + 1} with {first_width})")
+
 class ValidationManager:
-    def __init__(self, preset_path):
+    def __init__(self, preset_path, workers=8):
         self.preset_path = preset_path
+        self.workers = max(1, workers) # threads scanning the output tree
         self.expected_files = set()
         self.expected_dirs = []
         self.load_presets()
@@ -47,66 +70,133 @@ class ValidationManager:
         except Exception as e:
             logger.error(f"Error loading presets: {e}")
 
-    def validate(self, target_dir):
-        """Validate actual files against expected presets."""
+    def _build_trie(self):
+        # Path components -> child nodes; the None key holds the marks of a node
+        trie = {}
+        for paths, mark in ((IGNORED_PATTERNS, IGNORED), (self.expected_files, FILE), (self.expected_dirs, DIRECTORY)):
+            for path in paths:
+                node = trie
+                for part in path.split('/'):
+                    node = node.setdefault(part, {})
+                node[None] = node.get(None, 0) | mark
+        return trie
+
+    @staticmethod
+    def _match(trie, rel_path):
+        """
+        Marks that apply to rel_path: IGNORED or DIRECTORY when the path or
+        one of its parent directories carries them, FILE only for the path
+        itself.
+        """
+        node, marks = trie, 0
+        for part in rel_path.split('/'):
+            node = node.get(part)
+            if node is None:
+                return marks
+            marks |= node.get(None, 0) & (IGNORED | DIRECTORY)
+        return marks | (node.get(None, 0) & FILE)
+
+    def validate(self, target_dir, integrity=None):
+        """
+        Validate actual files against expected presets.
+
+        Expected entries are matched against a trie of their path
+        components, so each file costs one walk down its own path whatever
+        the number of presets. integrity maps relative paths to the problems
+        found while the files were written (see CSVProcessor); those still
+        present are reported as "corrupt".
+        """
         results = {
             "not_found": [],
             "unknown": []
         }
-        
-        # Ignore versioning and manifest files
-        ignored_patterns = ["rawexd.zip", "version.txt", "data.json"]
+        trie = self._build_trie()
+        files, present, dirs = self._scan(target_dir)
 
         # Check for missing files in presets
         for f_path in self.expected_files:
-            if any(f_path == p or f_path.startswith(p + "/") for p in ignored_patterns):
+            if self._match(trie, f_path) & IGNORED:
                 continue
-                
-            full_path = os.path.join(target_dir, f_path)
-            if not os.path.exists(full_path):
+            # Paths the scan cannot see (e.g. through a linked directory) are checked directly
+            if f_path in present or f_path in dirs:
+                continue
+            if not os.path.exists(os.path.join(target_dir, f_path)):
                 results["not_found"].append({
                     "path": f_path,
                     "type": "File"
                 })
-        
+
         # Check for missing directories in presets
         for d_path in self.expected_dirs:
-            if any(d_path == p or d_path.startswith(p + "/") for p in ignored_patterns):
+            if self._match(trie, d_path) & IGNORED:
                 continue
-
-            full_path = os.path.join(target_dir, d_path)
-            if not os.path.exists(full_path) or not os.path.isdir(full_path):
+            if d_path in dirs:
+                continue
+            if not os.path.isdir(os.path.join(target_dir, d_path)):
                 results["not_found"].append({
                     "path": d_path,
                     "type": "Directory"
                 })
 
         # Check for output files not defined in presets
-        for root, dirs, files in os.walk(target_dir):
-            for f in files:
-                full_path = os.path.join(root, f)
-                rel_path = os.path.relpath(full_path, target_dir).replace('\\', '/')
-                
-                if any(rel_path == p or rel_path.startswith(p + "/") for p in ignored_patterns):
-                    continue
+        for rel_path in files:
+            if not self._match(trie, rel_path):
+                results["unknown"].append({
+                    "path": rel_path,
+                    "type": "File"
+                })
+
+        if integrity is not None:
+            results["corrupt"] = [{"path": rel_path, "issue": integrity[rel_path]}
+                                  for rel_path in files if rel_path in integrity]
 
-                is_expected = False
-                if rel_path in self.expected_files:
-                    is_expected = True
-                else:
-                    for d_path in self.expected_dirs:
-                        if rel_path.startswith(d_path + "/") or rel_path == d_path:
-                             is_expected = True
-                             break
-                
-                if not is_expected:
-                    results["unknown"].append({
-                        "path": rel_path,
-                        "type": "File"
-                    })
-            
         return results
 
+    def _scan(self, target_dir):
+        """
+        Lists target_dir like os.walk: returns the relative file paths in walk
+        order, the set of those that exist and the set of directories.
+        Directories are listed concurrently; each listing queues its
+        subdirectories before it returns.
+        """
+        futures = {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            def list_dir(rel_dir):
+                names, subdirs = [], []
+                try:
+                    with os.scandir(os.path.join(target_dir, rel_dir)) as it:
+                        for entry in it:
+                            try:
+                                is_dir = entry.is_dir()
+                            except OSError:
+                                is_dir = False
+                            rel_path = f"{rel_dir}/{entry.name}" if rel_dir else entry.name
+                            if not is_dir:
+                                # Dangling links are listed but do not exist
+                                names.append((rel_path, not entry.is_symlink() or os.path.exists(entry.path)))
+                                continue
+                            # Linked directories are listed but not entered, as in os.walk
+                            subdirs.append((rel_path, not entry.is_symlink()))
+                except OSError:
+                    pass
+                for rel_path, enter in subdirs:
+                    if enter:
+                        futures[rel_path] = executor.submit(list_dir, rel_path)
+                return names, subdirs
+
+            futures[""] = executor.submit(list_dir, "")
+            files, present, dirs = [], set(), set()
+            stack = [""]
+            while stack:
+                names, subdirs = futures.pop(stack.pop()).result()
+                for rel_path, exists in names:
+                    files.append(rel_path)
+                    if exists:
+                        present.add(rel_path)
+                dirs.update(rel_path for rel_path, _ in subdirs)
+                stack.extend(rel_path for rel_path, enter in reversed(subdirs) if enter)
+        return files, present, dirs
+
     def save_report(self, results, output_path):
         try:
             with open(output_path, 'w', encoding='utf-8') as f:
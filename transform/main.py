@@ -1,19 +1,34 @@
-import sys
+import time
+STARTED = time.perf_counter() # start of the module imports, reported at startup
 import os
 import shutil
 import json
+import argparse
+from contextlib import contextmanager, nullcontext
 from dotenv import load_dotenv
-from lib.paths import PathManager
+from lib.paths import PathManager, tree_state
 from lib.rsv import RSVManager
+from lib.act_overrides import ActOverrides
 from lib.processor import CSVProcessor
+from lib.build_cache import BuildCache
+from lib.packager import ZipPackager
+from lib.delta import build_delta
+from lib.profiler import Profiler
 from lib.uploader import S3Uploader
 from lib.validator import ValidationManager
 from lib.filter_loader import FilterLoader
 from lib.filter_sync import FilterSync
+from lib.checkpoint import Checkpoint
 from lib.logging_setup import setup_logging
 from lib.config import Config
 from lib.discord_notifier import DiscordNotifier
 
+# S3 (boto3) and Google Sheets (gspread) are imported by the steps that use them
+IMPORT_TIME = time.perf_counter() - STARTED
+
+# Steps that can be left out of a run (e.g. for local iteration)
+SKIPPABLE = ("sync", "act", "package", "validate", "upload")
+
 # Load environmental variables
 load_dotenv()
 
@@ -21,93 +36,228 @@ load_dotenv()
 logger = setup_logging()
 
 class Orchestrator:
-    def __init__(self, folder_name, sub_path=""):
+    def __init__(self, folder_name, sub_path="", profiler=None, skip=(), checkpoint=None, shared=None):
         self.base_dir = Config.BASE_DIR
-        self.pm = PathManager(self.base_dir, folder_name, sub_path=sub_path)
-        self.rm = RSVManager(self.pm.rsv_json_path)
-        self.cp = CSVProcessor(self.rm)
+        self.shared = shared # BatchShared of a batch run (see batch.py)
+        isolated = shared is not None
+        if checkpoint is not None:
+            # Resumed run: same folder, version string and output directory as the checkpointed one
+            folder_name, sub_path, isolated = checkpoint.folder_name, checkpoint.sub_path, checkpoint.isolated
+        self.pm = PathManager(self.base_dir, folder_name, sub_path=sub_path,
+                              version_string=checkpoint.version_string if checkpoint else None, isolated=isolated)
+        self.checkpoint = checkpoint or Checkpoint(self.pm.checkpoint_path, folder_name,
+                                                   self.pm.version_string, sub_path, isolated)
+        self.skip = set(skip) # steps of SKIPPABLE left out of the run
+        if "package" in self.skip:
+            # Nothing to upload without the zip and version.txt
+            self.skip.add("upload")
+        if shared is not None:
+            act = shared.act
+        else:
+            act = ActOverrides(self.pm.act_cache_dir, api_url=Config.ACT_API_URL, raw_url=Config.ACT_RAW_URL,
+                               workers=Config.ACT_WORKERS, timeout=Config.ACT_TIMEOUT,
+                               offline=Config.ACT_OFFLINE or "act" in self.skip)
+        self.rm = RSVManager(self.pm.rsv_json_path, act=act, db_path=self.pm.rsv_db_path)
+        self.profiler = profiler or Profiler()
+        self.gates = shared.gates if shared else {} # phase id -> semaphore shared with the other runs
+        # A batch divides the cores between the versions that transform at the same time
+        workers = shared.workers if shared else Config.TRANSFORM_WORKERS
+        zip_workers = shared.zip_workers if shared else Config.ZIP_WORKERS or os.cpu_count() or 1
+        self.packager = None
+        if "package" not in self.skip:
+            self.packager = ZipPackager(workers=zip_workers)
+        self.cp = CSVProcessor(self.rm, workers=workers, packager=self.packager,
+                               profiler=self.profiler, streaming=Config.TRANSFORM_STREAMING,
+                               integrity=Config.VALIDATE_INTEGRITY)
         self.uploader = S3Uploader()
-        self.validator = ValidationManager(self.pm.preset_json_path)
+        self.validator = ValidationManager(self.pm.preset_json_path, workers=Config.VALIDATE_WORKERS)
         self.discord = DiscordNotifier(Config.DISCORD_WEBHOOK_URL)
         
         # self.fs and self.fl initialized later
         self.config = {}
+        self.config_hash = None # hash of the filter inputs (FilterLoader.inputs_hash)
+        self.source_state = None # tree_state of the source folder when it was isolated
+        self.delta_path = None
 
     def init_filters(self):
         logger.info("Initializing filters...")
         cdir = os.path.join(self.base_dir, "transform", "config")
         self.fs = FilterSync(cdir)
-        self.fl = FilterLoader(cdir)
+        self.fl = FilterLoader(cdir, cache_dir=os.path.join(self.base_dir, "transform", "cache", "filter"))
+
+    @contextmanager
+    def phase(self, phase_id, name):
+        # Profiled phase; in a batch it first waits for a slot of its gate, outside the timings
+        with self.gates.get(phase_id) or nullcontext(), self.profiler.phase(phase_id, name):
+            yield
+
+    def pending(self, phase_id):
+        return not self.checkpoint.done(phase_id)
+
+    def complete(self, phase_id):
+        # Checkpoints the phase with the state the following phases depend on
+        self.checkpoint.complete(phase_id, {
+            "config_hash": self.config_hash,
+            "source_state": self.source_state,
+            "delta_path": self.delta_path,
+            "rsv": self.rm.checkpoint_state(),
+            "processor": self.cp.checkpoint_state(),
+        })
+
+    def current_config_hash(self):
+        # Filter inputs as a run would load them now, with the sheet from its local snapshot
+        if self.shared is not None:
+            return self.shared.config_hash
+        self.init_filters()
+        self.fs.update_config(offline=True)
+        try:
+            return self.fl.inputs_hash()
+        finally:
+            if os.path.exists(self.fl.transient_path):
+                os.remove(self.fl.transient_path)
+
+    def restore(self):
+        """
+        Restores the state of a checkpointed run. Phases 2-7 edit the output
+        in place, so a run interrupted before they completed starts over, as
+        does one whose filter inputs or source folder changed since.
+        """
+        checkpoint = self.checkpoint
+        if not checkpoint.phases:
+            return
+        if not checkpoint.done("2-7"):
+            logger.info("Checkpoint has no completed transform, starting over.")
+            checkpoint.reset()
+            return
+
+        state = checkpoint.state
+        if tree_state(self.pm.src_root) != state.get("source_state"):
+            logger.info(f"Source folder {self.pm.folder_name} changed since the checkpoint, starting over.")
+            checkpoint.reset()
+            return
+        if self.current_config_hash() != state["config_hash"]:
+            logger.info("Filter configuration changed since the checkpoint, starting over.")
+            checkpoint.reset()
+            return
+
+        logger.info(f"Resuming after phases {', '.join(checkpoint.phases)}.")
+        self.config_hash = state["config_hash"]
+        self.source_state = state["source_state"]
+        self.delta_path = state["delta_path"]
+        self.rm.restore_checkpoint(state["rsv"])
+        self.cp.restore_checkpoint(state["processor"])
+        if not checkpoint.done("11") and os.path.exists(self.pm.target_dir):
+            # Files an interrupted Phase 10 removed are still in the restored state
+            self.cp.forget_missing(self.pm.target_dir)
 
     def run(self):
         logger.info(f"=== Starting Unified CSV Transformation Pipeline ===")
         logger.info(f"Target Version: {self.pm.version_string}")
+        if self.skip:
+            logger.info(f"Skipping: {', '.join(s for s in SKIPPABLE if s in self.skip)}")
+        self.restore()
+        prof = self.profiler
+        os.makedirs(os.path.dirname(self.pm.profile_json_path), exist_ok=True)
 
         try:
-            self.init_filters()
-            
-            # Sync Filter Configuration
-            logger.info(f"Phase 0: Syncing filter configuration from Google Sheets...")
-            if not self.fs.update_config():
-                logger.warning("Warning: Filter sync failed, using cached manual config only.")
-            
-            # Load Merged Config
-            self.config = self.fl.load()
-            logger.info("Loaded merged filter configuration.")
-
-            # Isolate source data to output directory
-            logger.info(f"Phase 1: Isolating {self.pm.folder_name} to output/{self.pm.version_string}...")
-            if not self.pm.prepare_output_dir(): 
-                return
+            if self.pending("0"):
+                if self.shared is not None:
+                    # Synced and loaded once for all versions of the batch
+                    self.config, self.config_hash = self.shared.config, self.shared.config_hash
+                else:
+                    self.init_filters()
 
-            target = self.pm.target_dir
-            
-            logger.info(f"Phase 2: Initial cleanup and manual filters...")
-            self.cp.initial_cleanup(target)
-            self.cp.apply_manual_filters(target, self.config)
+                    # Sync Filter Configuration
+                    with self.phase("0", "filter sync"):
+                        logger.info(f"Phase 0: Syncing filter configuration from Google Sheets...")
+                        if not self.fs.update_config(offline="sync" in self.skip):
+                            logger.warning("Warning: Filter sync failed, using cached manual config only.")
 
-            logger.info(f"Phase 3: Applying column remapping from filter.json...")
-            self.cp.apply_column_remapping(target, self.config)
+                        # Load Merged Config
+                        self.config = self.fl.load(compiled=True)
+                        self.config_hash = self.fl.inputs_hash()
+                        logger.info("Loaded merged filter configuration.")
+                self.complete("0")
 
-            logger.info(f"Phase 4: Anonymizing chat quest phrases to prevent broadcast...")
-            self.cp.anonymize_chat_phrases(target)
-            
-            logger.info(f"Phase 5: Filtering columns...")
-            self.cp.filter_columns(target, config=self.config)
+            # Isolate source data to output directory
+            if self.pending("1"):
+                with self.phase("1", "isolate"):
+                    logger.info(f"Phase 1: Isolating {self.pm.folder_name} to output/{self.pm.version_string}...")
+                    self.source_state = tree_state(self.pm.src_root)
+                    if not self.pm.prepare_output_dir(self.config): 
+                        return False
+                self.complete("1")
 
-            logger.info(f"Phase 6: Removing rows without target language content...")
-            self.cp.remove_empty_rows(target, config=self.config)
+            target = self.pm.target_dir
             
-            logger.info(f"Phase 7: Processing RSV keys...")
-            self.cp.process_rsv(target) 
+            # Phases 2-7 run fused: cleanup, manual filters, column remapping,
+            # chat anonymization, column/row filtering and RSV keys per file
+            if self.pending("2-7"):
+                with self.phase("2-7", "transform"):
+                    logger.info(f"Phase 2-7: Transforming CSV files in a single pass...")
+                    cache = BuildCache(self.pm.build_cache_dir) if Config.INCREMENTAL_BUILD else None
+                    self.cp.transform(target, self.config, cache=cache)
+                self.complete("2-7")
             
-            logger.info(f"Phase 8: Syncing ACT overrides...")
-            if self.rm.new_keys_found:
-                # Sync new keys with ACT overrides
-                self.rm.save()
-                self.rm.sync_act_overrides()
-                self.cp.process_rsv(target)
-            else:
-                self.rm.sync_act_overrides()
+            if self.pending("8"):
+                with self.phase("8", "act sync"):
+                    logger.info(f"Phase 8: Syncing ACT overrides...")
+                    if self.rm.new_keys_found:
+                        # Record new keys before syncing them with ACT overrides
+                        self.rm.save()
+                    self.rm.sync_act_overrides()
+                    # Only indexed RSV cells whose value the sync changed are rewritten
+                    self.cp.patch_rsv(target)
+                    if Config.RSV_EXPORT_JSON:
+                        self.rm.export_json()
+                self.complete("8")
                 
-            logger.info(f"Phase 9: Generating Manifest (data.json)...")
-            self.generate_manifest()
+            if self.pending("9"):
+                with self.phase("9", "manifest"):
+                    logger.info(f"Phase 9: Generating Manifest (data.json)...")
+                    self.generate_manifest()
+                self.complete("9")
 
-            logger.info(f"Phase 10: Removing files without Korean content...")
-            self.cp.remove_non_korean_files(target)
+            if self.pending("10"):
+                with self.phase("10", "remove non-korean"):
+                    logger.info(f"Phase 10: Removing files without Korean content...")
+                    self.cp.remove_non_korean_files(target)
+                self.complete("10")
 
-            logger.info(f"Phase 11: Finalizing file names (.ko.csv -> .csv)...")
-            self.cp.rename_files(target)
+            if self.pending("11"):
+                with self.phase("11", "rename"):
+                    logger.info(f"Phase 11: Finalizing file names (.ko.csv -> .csv)...")
+                    self.cp.rename_files(target)
+                    # Size, sha256 and row count of every file, collected as they were written
+                    self.update_manifest({"files": self.cp.file_manifest()})
+                self.complete("11")
 
             # Package and versioning
-            rawexd_path = self.finalize_directory()
-            self.create_zip(rawexd_path)
-            self.create_version_txt()
+            if self.pending("package"):
+                with self.phase("package", "zip and delta"):
+                    rawexd_path = self.finalize_directory()
+                    if "package" not in self.skip:
+                        self.create_zip(rawexd_path)
+                        self.delta_path = self.create_delta(rawexd_path)
+                        self.create_version_txt()
+                if "package" not in self.skip:
+                    self.complete("package")
 
-            logger.info(f"Phase 12: Running validation...")
-            self.run_validation()
-            
+            if "validate" not in self.skip and self.pending("12"):
+                with self.phase("12", "validation"):
+                    logger.info(f"Phase 12: Running validation...")
+                    self.run_validation()
+                self.complete("12")
+
+        except Exception:
+            # Keep the timings of a failed run
+            prof.save(self.pm.profile_json_path)
+            self.log_resume_hint()
+            raise
         finally:
+            if self.packager:
+                self.packager.close()
+
             # Cleanup Transient Config
             if hasattr(self, 'fl') and os.path.exists(self.fl.transient_path):
                 try:
@@ -116,20 +266,45 @@ class Orchestrator:
                 except Exception as e:
                     logger.warning(f"Failed to cleanup transient config: {e}")
         
-        logger.info(f"Phase 13: Uploading to S3...")
-        zip_base, zip_path = self.pm.get_zip_paths()
-        ver_path = self.pm.get_version_txt_path()
-        data_path = self.pm.data_json_path
-        
-        if self.uploader.upload_files([zip_path, ver_path, data_path]):
-            # Local cleanup: Only delete zip, keep version.txt and data.json
-            self.uploader.cleanup_local([zip_path])
+        if "upload" not in self.skip and self.pending("13"):
+            with self.phase("13", "upload"):
+                logger.info(f"Phase 13: Uploading to S3...")
+                zip_base, zip_path = self.pm.get_zip_paths()
+                ver_path = self.pm.get_version_txt_path()
+                data_path = self.pm.data_json_path
+                delta_path = self.delta_path
+                payload_paths = [zip_path] + ([delta_path] if delta_path else [])
+
+                # version.txt and data.json only once the payloads are in the bucket
+                uploaded = self.uploader.upload_files(payload_paths, then=[ver_path, data_path])
+                if uploaded:
+                    # Later deltas are built against the version clients now have
+                    self.pm.mark_published()
+                    # Local cleanup: Only delete zip and delta bundle, keep version.txt and data.json
+                    self.uploader.cleanup_local([zip_path] + ([delta_path] if delta_path else []))
+            if not uploaded:
+                prof.save(self.pm.profile_json_path)
+                logger.error("Upload failed.")
+                self.log_resume_hint()
+                return False
+            self.complete("13")
+        prof.save(self.pm.profile_json_path)
         
         logger.info(f"\n=== Pipeline Completed Successfully ===")
         logger.info(f"Results located in: {self.pm.dst_root}")
 
-        # Notify Success (Only on success)
-        self.discord.send_notification(self.pm.version_string, self.pm.folder_name)
+        # Notify Success (Only on success, and only for published releases)
+        if "upload" not in self.skip and self.pending("notify"):
+            if self.discord.send_notification(self.pm.version_string, self.pm.folder_name):
+                self.complete("notify")
+            else:
+                self.log_resume_hint()
+        return True
+
+    def log_resume_hint(self):
+        if self.checkpoint.done("2-7"):
+            logger.info(f"Completed phases are checkpointed; run with --resume {self.pm.version_string} "
+                        f"to continue after phase {self.checkpoint.phases[-1]}.")
 
 
     def generate_manifest(self):
@@ -174,8 +349,44 @@ class Orchestrator:
     def create_zip(self, rawexd_path):
         if not os.path.exists(rawexd_path): return
         logger.info("Zipping results...")
-        zip_base, _ = self.pm.get_zip_paths()
-        shutil.make_archive(zip_base, 'zip', rawexd_path)
+        _, zip_path = self.pm.get_zip_paths()
+        # Most entries were compressed while the transform was running
+        self.packager.write(zip_path, rawexd_path)
+
+    def create_delta(self, rawexd_path):
+        # Bundle the files changed since the last published version
+        if not os.path.exists(rawexd_path): return None
+        prev_root = self.pm.find_previous_version()
+        if not prev_root:
+            logger.info("No published version found, skipping delta bundle.")
+            return None
+
+        from_version = os.path.basename(prev_root)
+        logger.info(f"Creating delta bundle from {from_version}...")
+        delta_path = self.pm.get_delta_path(from_version)
+        delta = build_delta(self.packager, delta_path, os.path.join(prev_root, "rawexd"), rawexd_path,
+                            from_version, self.pm.version_string)
+
+        self.update_manifest({"delta": {
+            "from": from_version,
+            "file": os.path.basename(delta_path),
+            "size": os.path.getsize(delta_path),
+            "added": len(delta["added"]),
+            "changed": len(delta["changed"]),
+            "deleted": len(delta["deleted"]),
+        }})
+        return delta_path
+
+    def update_manifest(self, updates):
+        # Merge extra top-level keys into data.json
+        try:
+            with open(self.pm.data_json_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+            manifest.update(updates)
+            with open(self.pm.data_json_path, 'w', encoding='utf-8') as f:
+                json.dump(manifest, f, indent=4, ensure_ascii=False)
+        except Exception as e:
+            logger.error(f"Failed to update manifest: {e}")
 
     def create_version_txt(self):
         logger.info("Creating version.txt...")
@@ -187,14 +398,49 @@ class Orchestrator:
         # Validate against version root
         target_dir = self.pm.dst_root
         
-        results = self.validator.validate(target_dir)
+        integrity = None
+        if Config.VALIDATE_INTEGRITY:
+            # Checked while Phases 2-7 wrote the files; Phase 11 moved them under rawexd/
+            integrity = {f"rawexd/{name}": issue for name, issue in self.cp.file_issues.items()}
+        results = self.validator.validate(target_dir, integrity=integrity)
+        if results.get("corrupt"):
+            logger.warning(f"Integrity check failed for {len(results['corrupt'])} files, see {self.pm.validation_json_path}")
         if results:
             self.validator.save_report(results, self.pm.validation_json_path)
         else:
             logger.info("Validation passed: All expected files present.")
 
 if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print("Usage: python main.py <folder_name>")
-    else:
-        Orchestrator(sys.argv[1]).run()
+    parser = argparse.ArgumentParser(description="Transform extracted KR client data and publish it.")
+    parser.add_argument("folder_name", nargs="?", help="extracted version folder under transform/original")
+    parser.add_argument("--cprofile", metavar="PHASE",
+                        help="run this phase (e.g. 2-7, 8, package) under cProfile and dump its stats")
+    parser.add_argument("--trace-memory", action="store_true",
+                        help="record peak memory per phase and file with tracemalloc (slower)")
+    parser.add_argument("--skip", action="append", default=[], choices=SKIPPABLE, metavar="STEP",
+                        help="leave a step out (repeatable): sync (use the last sheet snapshot), "
+                             "act (use the cached ACT overrides), package (no zip, delta or version.txt; "
+                             "implies upload), validate, upload (no S3 upload or Discord notification)")
+    parser.add_argument("--transform-only", action="store_true",
+                        help="local iteration run, same as skipping all of " + ", ".join(SKIPPABLE))
+    parser.add_argument("--resume", metavar="VERSION",
+                        help="continue the run of output/VERSION after its last checkpointed phase")
+    args = parser.parse_args()
+
+    checkpoint = None
+    if args.resume:
+        checkpoint = Checkpoint.load(PathManager(Config.BASE_DIR, args.folder_name or "",
+                                                 version_string=args.resume).checkpoint_path)
+        if checkpoint is None:
+            parser.error(f"no checkpoint found for version {args.resume}")
+        if args.folder_name and args.folder_name != checkpoint.folder_name:
+            parser.error(f"version {args.resume} was built from {checkpoint.folder_name}, not {args.folder_name}")
+    elif not args.folder_name:
+        parser.error("folder_name is required unless --resume is given")
+
+    logger.info(f"Startup: modules imported in {IMPORT_TIME * 1000:.0f} ms")
+    skip = SKIPPABLE if args.transform_only else args.skip
+    profiler = Profiler(trace_memory=args.trace_memory, cprofile_phase=args.cprofile,
+                        cprofile_dir=os.path.join(Config.BASE_DIR, "transform"))
+    profiler.startup = IMPORT_TIME
+    Orchestrator(args.folder_name, profiler=profiler, skip=skip, checkpoint=checkpoint).run()
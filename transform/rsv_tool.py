@@ -0,0 +1,32 @@
+import argparse
+from lib.config import Config
+from lib.paths import PathManager
+from lib.rsv import RSVManager
+from lib.rsv_store import RSVStore
+from lib.logging_setup import setup_logging
+
+def main():
+    parser = argparse.ArgumentParser(description="Imports or exports the RSV store (transform/config/rsv.sqlite3).")
+    parser.add_argument("command", choices=["import", "export"],
+                        help="import: write the values of a JSON file into the store, export: write the store to one")
+    parser.add_argument("path", nargs="?", help="JSON file (default: transform/config/rsv.json)")
+    args = parser.parse_args()
+
+    setup_logging()
+    pm = PathManager(Config.BASE_DIR, "")
+    store = RSVStore(pm.rsv_db_path, RSVManager.transform_key)
+    try:
+        path = args.path or pm.rsv_json_path
+        if args.command == "import":
+            store.import_json(path)
+            if path != pm.rsv_json_path:
+                # Keep the rsv.json copy in line with the store
+                store.export_json(pm.rsv_json_path)
+        else:
+            count = store.export_json(path)
+            print(f"Exported {count} RSV keys to {path}")
+    finally:
+        store.close()
+
+if __name__ == "__main__":
+    main()
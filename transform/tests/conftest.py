@@ -0,0 +1,5 @@
+import os
+import sys
+
+# The pipeline modules import each other as top-level lib.* (as main.py runs them)
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,101 @@
+import json
+import hashlib
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+
+from lib.act_overrides import ActOverrides
+
+class FakeGitHub:
+    """Serves an Overrides listing and raw files with ETags, recording each request."""
+    def __init__(self, files):
+        self.files = dict(files)
+        self.broken = set() # raw files answered with 500
+        self.requests = [] # (path, If-None-Match, status)
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_GET(self):
+                if self.path == "/contents/Overrides":
+                    # No shas, so every file is revalidated rather than trusted
+                    body = json.dumps([{"name": name} for name in fake.files]).encode()
+                elif self.path.startswith("/raw/") and self.path[5:] in fake.files:
+                    body = fake.files[self.path[5:]].encode()
+                else:
+                    body = None
+                if body is None or self.path[5:] in fake.broken:
+                    status = 404 if body is None else 500
+                    fake.requests.append((self.path, None, status))
+                    self.send_response(status)
+                    self.end_headers()
+                    return
+                etag = '"' + hashlib.md5(body).hexdigest() + '"'
+                status = 304 if self.headers.get("If-None-Match") == etag else 200
+                fake.requests.append((self.path, self.headers.get("If-None-Match"), status))
+                self.send_response(status)
+                self.send_header("ETag", etag)
+                if status == 200:
+                    self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                if status == 200:
+                    self.wfile.write(body)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}"
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def statuses(self):
+        statuses = [status for _, _, status in self.requests]
+        self.requests.clear()
+        return statuses
+
+@pytest.fixture
+def github():
+    fake = FakeGitHub({
+        "global_1.txt": "_rsv_1_-1_1_0_0_S0_E0|Alpha\n_rsv_2_-1_1_0_0_S0_E0|Beta",
+        "global_2.txt": "_rsv_2_-1_1_0_0_S0_E0|Gamma",
+        "other.txt": "_rsv_3_-1_1_0_0_S0_E0|Ignored",
+    })
+    yield fake
+    fake.server.shutdown()
+    fake.server.server_close()
+
+def overrides(github, cache_dir, **kwargs):
+    return ActOverrides(str(cache_dir), api_url=github.url + "/contents/Overrides",
+                        raw_url=github.url + "/raw", workers=2, **kwargs)
+
+def test_cached_files_are_revalidated(github, tmp_path):
+    expected = {"_rsv_1_-1_1_0_0_S0_E0": "Alpha", "_rsv_2_-1_1_0_0_S0_E0": "Gamma"}
+    assert overrides(github, tmp_path).lookup() == expected
+    assert github.statuses() == [200, 200, 200]
+
+    # A later run sends the cached ETags and keeps its copies on 304
+    assert overrides(github, tmp_path).lookup() == expected
+    assert all(etag for _, etag, _ in github.requests)
+    assert github.statuses() == [304, 304, 304]
+
+    # A changed file is downloaded again, the others stay cached
+    github.files["global_2.txt"] = "_rsv_2_-1_1_0_0_S0_E0|Delta"
+    assert overrides(github, tmp_path).lookup()["_rsv_2_-1_1_0_0_S0_E0"] == "Delta"
+    assert sorted(github.statuses()) == [200, 304, 304]
+
+def test_offline_uses_the_cache_only(github, tmp_path):
+    assert overrides(github, tmp_path, offline=True).lookup() == {}
+    overrides(github, tmp_path).lookup()
+    github.statuses()
+
+    assert overrides(github, tmp_path, offline=True).lookup()["_rsv_1_-1_1_0_0_S0_E0"] == "Alpha"
+    assert github.requests == []
+
+def test_failed_request_falls_back_to_the_cache(github, tmp_path):
+    overrides(github, tmp_path).lookup()
+    github.files["global_1.txt"] += "\n_rsv_4_-1_1_0_0_S0_E0|Epsilon"
+    github.broken.add("global_1.txt")
+
+    lookup = overrides(github, tmp_path).lookup()
+    assert lookup["_rsv_1_-1_1_0_0_S0_E0"] == "Alpha"
+    assert "_rsv_4_-1_1_0_0_S0_E0" not in lookup
@@ -0,0 +1,73 @@
+import json
+
+from lib.filter_sync import FilterSync
+
+class FakeSpreadsheet:
+    """Stands in for the gspread spreadsheet: a modified time and one worksheet of rows."""
+    def __init__(self, rows, modified="2026-10-01T00:00:00Z"):
+        self.rows = rows
+        self.modified = modified
+        self.fetches = 0
+
+    def get_lastUpdateTime(self):
+        return self.modified
+
+    def get_worksheet(self, index):
+        return self
+
+    def get_all_records(self):
+        self.fetches += 1
+        return [dict(row) for row in self.rows]
+
+ROWS = [
+    {"File": "Item.ko.csv", "Key": "10", "Exclude": "TRUE"},
+    {"File": "Item.ko.csv", "Key": "11", "Swap_Key": "12"},
+    {"File": "Quest.csv", "Key": "5", "Offset": "3", "Swap_Offset": "G", "Global": "Hello"},
+]
+
+def read_config(sync):
+    with open(sync.transient_json_path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+def test_snapshot_is_reused_until_the_sheet_changes(tmp_path):
+    sheet = FakeSpreadsheet(ROWS)
+    sync = FilterSync(str(tmp_path), cache_dir=str(tmp_path / "sheet"), spreadsheet=sheet)
+    assert sync.update_config()
+    config = read_config(sync)
+    assert config["delete_rows"] == {"Item.csv": [10]}
+    assert config["remap_keys"] == {"Item.csv": {"11": "12"}}
+    assert config["remap_columns"] == {"Quest.csv": {"5": {"3": "Hello"}}}
+    assert sheet.fetches == 1
+
+    # Same modified time: the rows are not fetched again
+    assert sync.update_config()
+    assert read_config(sync) == config
+    assert sheet.fetches == 1
+
+    sheet.rows = ROWS[:2]
+    sheet.modified = "2026-10-02T00:00:00Z"
+    assert sync.update_config()
+    assert sheet.fetches == 2
+    assert read_config(sync)["remap_columns"] == {}
+
+def test_offline_uses_the_snapshot(tmp_path):
+    offline = FilterSync(str(tmp_path), cache_dir=str(tmp_path / "sheet"))
+    assert not offline.update_config(offline=True)
+
+    FilterSync(str(tmp_path), cache_dir=str(tmp_path / "sheet"), spreadsheet=FakeSpreadsheet(ROWS)).update_config()
+    expected = read_config(offline)
+    (tmp_path / "managed_filter.tmp.json").unlink()
+
+    assert offline.update_config(offline=True)
+    assert read_config(offline) == expected
+
+def test_unreadable_sheet_falls_back_to_the_snapshot(tmp_path):
+    sheet = FakeSpreadsheet(ROWS)
+    sync = FilterSync(str(tmp_path), cache_dir=str(tmp_path / "sheet"), spreadsheet=sheet)
+    sync.update_config()
+    expected = read_config(sync)
+
+    sheet.modified = "2026-10-02T00:00:00Z"
+    sheet.get_all_records = lambda: 1 / 0
+    assert sync.update_config()
+    assert read_config(sync) == expected
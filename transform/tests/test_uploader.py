@@ -0,0 +1,52 @@
+from lib.uploader import FilesystemS3Client, S3Uploader
+
+class RecordingClient(FilesystemS3Client):
+    # Local S3 stand-in that records the keys it uploads, in order
+    def __init__(self, root, fail=()):
+        super().__init__(root)
+        self.fail = set(fail)
+        self.uploaded = []
+
+    def upload_file(self, Filename, Bucket, Key, ExtraArgs=None, Callback=None, Config=None):
+        if Key in self.fail:
+            raise OSError(f"refused {Key}")
+        super().upload_file(Filename, Bucket, Key, ExtraArgs=ExtraArgs, Callback=Callback, Config=Config)
+        self.uploaded.append(Key)
+
+def release(tmp_path, version="2026.10.01"):
+    files = {}
+    for name, content in (("rawexd.zip", b"zip" * 1000), ("version.txt", version.encode()),
+                          ("data.json", b'{"version": "%s"}' % version.encode())):
+        files[name] = tmp_path / "release" / name
+        files[name].parent.mkdir(exist_ok=True)
+        files[name].write_bytes(content)
+    return [str(files["rawexd.zip"])], [str(files["version.txt"]), str(files["data.json"])]
+
+def test_version_files_follow_the_payload(tmp_path):
+    client = RecordingClient(str(tmp_path / "bucket"))
+    payload, then = release(tmp_path)
+    assert S3Uploader("bucket", client=client).upload_files(payload, then=then)
+    assert client.uploaded == ["rawexd.zip", "version.txt", "data.json"]
+    assert (tmp_path / "bucket" / "bucket" / "version.txt").read_text() == "2026.10.01"
+
+def test_unchanged_files_are_skipped(tmp_path):
+    client = RecordingClient(str(tmp_path / "bucket"))
+    payload, then = release(tmp_path)
+    assert S3Uploader("bucket", client=client).upload_files(payload, then=then)
+    client.uploaded.clear()
+
+    # A new uploader, as the next run would create
+    assert S3Uploader("bucket", client=client).upload_files(payload, then=then)
+    assert client.uploaded == []
+
+    # Only the file whose content changed is sent again
+    (tmp_path / "release" / "version.txt").write_text("2026.10.02")
+    assert S3Uploader("bucket", client=client).upload_files(payload, then=then)
+    assert client.uploaded == ["version.txt"]
+
+def test_failed_payload_keeps_the_version_files(tmp_path):
+    client = RecordingClient(str(tmp_path / "bucket"), fail=["rawexd.zip"])
+    payload, then = release(tmp_path)
+    assert not S3Uploader("bucket", client=client).upload_files(payload, then=then)
+    assert client.uploaded == []
+    assert not (tmp_path / "bucket" / "bucket" / "version.txt").exists()